@@ -0,0 +1,35 @@
+"""add_ai_analysis_cache
+
+Revision ID: a1c4e9d27f03
+Revises: 34bae2adbb18
+Create Date: 2026-02-09 10:14:22.518904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a1c4e9d27f03'
+down_revision: Union[str, None] = '34bae2adbb18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('ai_analysis_cache',
+    sa.Column('cache_key', sa.String(length=64), nullable=False),
+    sa.Column('kind', sa.String(length=20), nullable=False),
+    sa.Column('result', sa.JSON(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('cache_key')
+    )
+    op.create_index('idx_ai_cache_expires', 'ai_analysis_cache', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_ai_cache_expires', table_name='ai_analysis_cache')
+    op.drop_table('ai_analysis_cache')
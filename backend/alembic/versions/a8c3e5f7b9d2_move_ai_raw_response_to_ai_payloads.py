@@ -0,0 +1,124 @@
+"""move_ai_raw_response_to_ai_payloads
+
+Revision ID: a8c3e5f7b9d2
+Revises: f4a7d2b9c6e1
+Create Date: 2026-02-23 15:48:06.374921
+
+"""
+import hashlib
+import json
+import zlib
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import mysql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a8c3e5f7b9d2'
+down_revision: Union[str, None] = 'f4a7d2b9c6e1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 500
+
+
+# Frozen copies of the app.services.ai_payloads format at this revision, so
+# later app changes can't break the migration. Keys must match what the app
+# computes: sha256 of canonical JSON; zlib only when it saves space.
+def _canonical_json(payload: dict) -> bytes:
+    return json.dumps(
+        payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False
+    ).encode("utf-8")
+
+
+def _encode(raw: bytes) -> tuple[str, bytes]:
+    compressed = zlib.compress(raw, 6)
+    if len(compressed) < len(raw):
+        return "zlib", compressed
+    return "none", raw
+
+
+def _decode(encoding: str, data: bytes) -> dict:
+    if encoding == "zlib":
+        data = zlib.decompress(data)
+    return json.loads(data)
+
+
+def upgrade() -> None:
+    payloads = op.create_table('ai_payloads',
+    sa.Column('id', sa.String(length=64), nullable=False),
+    sa.Column('encoding', sa.String(length=10), nullable=False),
+    sa.Column('data', mysql.MEDIUMBLOB(), nullable=False),
+    sa.Column('size_bytes', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.add_column('food_entries', sa.Column('ai_payload_id', sa.String(length=64), nullable=True))
+    op.create_foreign_key('fk_food_entries_ai_payload_id', 'food_entries', 'ai_payloads', ['ai_payload_id'], ['id'])
+
+    # Store each distinct payload once and point its entries at it
+    bind = op.get_bind()
+    entries = sa.table('food_entries',
+        sa.column('id'), sa.column('ai_raw_response', sa.JSON()), sa.column('ai_payload_id'),
+    )
+    stored = set()
+    last_id = ''
+    while True:
+        rows = bind.execute(
+            sa.select(entries.c.id, entries.c.ai_raw_response)
+            .where(entries.c.ai_raw_response.isnot(None), entries.c.id > last_id)
+            .order_by(entries.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        by_key: dict[str, list[str]] = {}
+        new_payloads = []
+        for entry_id, payload in rows:
+            if isinstance(payload, str):
+                payload = json.loads(payload)
+            raw = _canonical_json(payload)
+            key = hashlib.sha256(raw).hexdigest()
+            if key not in stored:
+                stored.add(key)
+                encoding, data = _encode(raw)
+                new_payloads.append({
+                    'id': key, 'encoding': encoding, 'data': data,
+                    'size_bytes': len(raw), 'created_at': datetime.now(timezone.utc),
+                })
+            by_key.setdefault(key, []).append(entry_id)
+        if new_payloads:
+            op.bulk_insert(payloads, new_payloads)
+        for key, entry_ids in by_key.items():
+            bind.execute(
+                entries.update()
+                .where(entries.c.id.in_(entry_ids))
+                .values(ai_payload_id=key)
+            )
+
+    op.drop_column('food_entries', 'ai_raw_response')
+
+
+def downgrade() -> None:
+    op.add_column('food_entries', sa.Column('ai_raw_response', sa.JSON(), nullable=True))
+
+    bind = op.get_bind()
+    entries = sa.table('food_entries',
+        sa.column('ai_raw_response', sa.JSON()), sa.column('ai_payload_id'),
+    )
+    payloads = sa.table('ai_payloads', sa.column('id'), sa.column('encoding'), sa.column('data'))
+    for payload in bind.execute(sa.select(payloads)):
+        bind.execute(
+            entries.update()
+            .where(entries.c.ai_payload_id == payload.id)
+            .values(ai_raw_response=_decode(payload.encoding, payload.data))
+        )
+
+    op.drop_constraint('fk_food_entries_ai_payload_id', 'food_entries', type_='foreignkey')
+    op.drop_column('food_entries', 'ai_payload_id')
+    op.drop_table('ai_payloads')
@@ -0,0 +1,68 @@
+"""add_user_stats_last_log_date
+
+Revision ID: b1d4f6a8c2e5
+Revises: a8c3e5f7b9d2
+Create Date: 2026-02-25 10:14:33.908127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b1d4f6a8c2e5'
+down_revision: Union[str, None] = 'a8c3e5f7b9d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('user_stats', sa.Column('last_log_date', sa.Date(), nullable=True))
+
+    # Replay every user's log days (calories logged) into last_log_date,
+    # current_streak and longest_streak, as scripts.backfill_streaks does:
+    # consecutive days share log_date - ROW_NUMBER(), so each run groups
+    # together. Verify afterwards with: python -m scripts.backfill_streaks
+    op.execute(
+        """
+        INSERT INTO user_stats (id, user_id, total_xp, level, current_streak, longest_streak,
+                                total_logs, total_photos, perfect_weeks, days_on_target, updated_at)
+        SELECT UUID(), u.id, 0, 1, 0, 0, 0, 0, 0, 0, NOW()
+        FROM users u
+        LEFT JOIN user_stats s ON s.user_id = u.id
+        WHERE s.id IS NULL
+          AND EXISTS (SELECT 1 FROM calorie_logs c WHERE c.user_id = u.id AND c.consumed_kcal > 0)
+        """
+    )
+    op.execute(
+        """
+        WITH days AS (
+            SELECT DISTINCT user_id, log_date FROM calorie_logs WHERE consumed_kcal > 0
+        ), runs AS (
+            SELECT user_id, COUNT(*) AS length, MAX(log_date) AS run_end
+            FROM (
+                SELECT user_id, log_date,
+                       DATE_SUB(log_date, INTERVAL ROW_NUMBER() OVER (
+                           PARTITION BY user_id ORDER BY log_date) DAY) AS run_key
+                FROM days
+            ) d
+            GROUP BY user_id, run_key
+        ), totals AS (
+            SELECT user_id, MAX(run_end) AS last_log_date, MAX(length) AS longest
+            FROM runs
+            GROUP BY user_id
+        )
+        UPDATE user_stats s
+        LEFT JOIN totals t ON t.user_id = s.user_id
+        LEFT JOIN runs r ON r.user_id = t.user_id AND r.run_end = t.last_log_date
+        SET s.last_log_date = t.last_log_date,
+            s.current_streak = COALESCE(r.length, 0),
+            s.longest_streak = COALESCE(t.longest, 0)
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('user_stats', 'last_log_date')
@@ -0,0 +1,26 @@
+"""add_food_name_search_index
+
+Revision ID: c3d8e1f5a7b2
+Revises: b7e2f4a91c55
+Create Date: 2026-02-14 10:21:48.530117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3d8e1f5a7b2'
+down_revision: Union[str, None] = 'b7e2f4a91c55'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('idx_food_entries_user_name', 'food_entries', ['user_id', 'food_name'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_food_entries_user_name', table_name='food_entries')
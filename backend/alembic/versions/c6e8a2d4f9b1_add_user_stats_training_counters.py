@@ -0,0 +1,67 @@
+"""add_user_stats_training_counters
+
+Revision ID: c6e8a2d4f9b1
+Revises: b1d4f6a8c2e5
+Create Date: 2026-03-02 16:41:07.215390
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c6e8a2d4f9b1'
+down_revision: Union[str, None] = 'b1d4f6a8c2e5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('user_stats', sa.Column('sessions_completed', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('user_stats', sa.Column('distance_km', sa.Numeric(precision=8, scale=1), server_default='0', nullable=False))
+    op.add_column('user_stats', sa.Column('races_added', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('user_stats', sa.Column('races_completed', sa.Integer(), server_default='0', nullable=False))
+
+    # Users with training history but no stats row yet need one to backfill
+    op.execute(
+        """
+        INSERT INTO user_stats (id, user_id, total_xp, level, current_streak, longest_streak,
+                                total_logs, total_photos, perfect_weeks, days_on_target, updated_at)
+        SELECT UUID(), u.id, 0, 1, 0, 0, 0, 0, 0, 0, NOW()
+        FROM users u
+        LEFT JOIN user_stats s ON s.user_id = u.id
+        WHERE s.id IS NULL
+          AND (EXISTS (SELECT 1 FROM training_sessions t WHERE t.user_id = u.id AND t.completed = 1)
+               OR EXISTS (SELECT 1 FROM races r WHERE r.user_id = u.id))
+        """
+    )
+    # Same credited distance as training_service._credited_distance: an
+    # actual distance of 0 falls back to the target. Badges are awarded when
+    # a counter crosses its threshold, so run
+    # `python -m scripts.award_badges --apply` once after this migration.
+    op.execute(
+        """
+        UPDATE user_stats s
+        SET s.sessions_completed = (
+                SELECT COUNT(*) FROM training_sessions t
+                WHERE t.user_id = s.user_id AND t.completed = 1),
+            s.distance_km = (
+                SELECT COALESCE(SUM(COALESCE(NULLIF(t.actual_distance_km, 0), t.target_distance_km, 0)), 0)
+                FROM training_sessions t
+                WHERE t.user_id = s.user_id AND t.completed = 1),
+            s.races_added = (
+                SELECT COUNT(*) FROM races r WHERE r.user_id = s.user_id),
+            s.races_completed = (
+                SELECT COUNT(*) FROM races r
+                WHERE r.user_id = s.user_id AND r.status = 'completed')
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('user_stats', 'races_completed')
+    op.drop_column('user_stats', 'races_added')
+    op.drop_column('user_stats', 'distance_km')
+    op.drop_column('user_stats', 'sessions_completed')
@@ -0,0 +1,185 @@
+"""add_user_food_usage
+
+Revision ID: d5f1a9c3e7b4
+Revises: c3d8e1f5a7b2
+Create Date: 2026-02-16 09:12:35.841260
+
+"""
+import re
+import uuid
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5f1a9c3e7b4'
+down_revision: Union[str, None] = 'c3d8e1f5a7b2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 1000
+
+MACRO_SUMS = {
+    'calories': 'calories_sum',
+    'protein_g': 'protein_sum',
+    'carbs_g': 'carbs_sum',
+    'fat_g': 'fat_sum',
+    'fiber_g': 'fiber_sum',
+}
+
+# Frozen copy of app.services.food_usage_service.usage_key (and the
+# app.utils.food_text normalization it uses) at this revision, so later app
+# changes can't break the migration
+_NUMBER_WORDS = {
+    'a': '1', 'an': '1', 'one': '1', 'two': '2', 'three': '3', 'four': '4', 'five': '5',
+    'six': '6', 'seven': '7', 'eight': '8', 'nine': '9', 'ten': '10', 'eleven': '11',
+    'twelve': '12', 'dozen': '12', 'half': '0.5', 'quarter': '0.25',
+}
+_UNIT_WORDS = {
+    'g': 'g', 'gr': 'g', 'gram': 'g', 'grams': 'g', 'kg': 'kg', 'kilogram': 'kg',
+    'kilograms': 'kg', 'ml': 'ml', 'milliliter': 'ml', 'milliliters': 'ml',
+    'millilitre': 'ml', 'millilitres': 'ml', 'l': 'l', 'liter': 'l', 'liters': 'l',
+    'litre': 'l', 'litres': 'l', 'oz': 'oz', 'ounce': 'oz', 'ounces': 'oz', 'lb': 'lb',
+    'lbs': 'lb', 'pound': 'lb', 'pounds': 'lb', 'cup': 'cup', 'cups': 'cup',
+    'tbsp': 'tbsp', 'tablespoon': 'tbsp', 'tablespoons': 'tbsp', 'tsp': 'tsp',
+    'teaspoon': 'tsp', 'teaspoons': 'tsp', 'slice': 'slice', 'slices': 'slice',
+    'piece': 'piece', 'pieces': 'piece', 'pc': 'piece', 'pcs': 'piece', 'bowl': 'bowl',
+    'bowls': 'bowl', 'glass': 'glass', 'glasses': 'glass', 'serving': 'serving',
+    'servings': 'serving', 'scoop': 'scoop', 'scoops': 'scoop', 'can': 'can',
+    'cans': 'can', 'bottle': 'bottle', 'bottles': 'bottle', 'bar': 'bar', 'bars': 'bar',
+    'handful': 'handful', 'handfuls': 'handful',
+}
+_FILLER_WORDS = {'ate', 'had', 'i', 'my', 'of', 'some', 'the'}
+_FRACTION = re.compile(r"\b(\d+)\s*/\s*(\d+)\b")
+_NUMBER_UNIT = re.compile(r"\b(\d+(?:\.\d+)?)([a-z]+)\b")
+_NON_WORD = re.compile(r"[^a-z0-9./\s,;&+]")
+
+
+def _fraction(match: re.Match) -> str:
+    numerator, denominator = int(match.group(1)), int(match.group(2))
+    if denominator == 0:
+        return match.group(0)
+    return f"{numerator / denominator:g}"
+
+
+def _split_number_unit(match: re.Match) -> str:
+    if match.group(2) in _UNIT_WORDS:
+        return f"{match.group(1)} {match.group(2)}"
+    return match.group(0)
+
+
+def _normalize_token(token: str) -> str | None:
+    token = token.strip("./")
+    if not token or token in _FILLER_WORDS:
+        return None
+    if token in _NUMBER_WORDS:
+        return _NUMBER_WORDS[token]
+    if token in _UNIT_WORDS:
+        return _UNIT_WORDS[token]
+    try:
+        return f"{float(token):g}"
+    except ValueError:
+        pass
+    if len(token) > 3 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def _normalize(text: str) -> str:
+    text = _NON_WORD.sub(" ", text.lower())
+    text = _FRACTION.sub(_fraction, text)
+    text = _NUMBER_UNIT.sub(_split_number_unit, text)
+    tokens = (_normalize_token(t) for t in text.split())
+    return " ".join(t for t in tokens if t)
+
+
+def usage_key(food_name: str, portion_desc: str | None) -> tuple[str, str]:
+    name = _normalize(food_name) or food_name.strip().lower()
+    portion = _normalize(portion_desc or "")
+    return name[:255], portion[:255]
+
+
+def upgrade() -> None:
+    usage = op.create_table('user_food_usage',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('user_id', sa.String(length=36), nullable=False),
+    sa.Column('name_key', sa.String(length=255), nullable=False),
+    sa.Column('portion_key', sa.String(length=255), nullable=False),
+    sa.Column('food_name', sa.String(length=255), nullable=False),
+    sa.Column('portion_desc', sa.String(length=255), nullable=True),
+    sa.Column('use_count', sa.Integer(), nullable=False),
+    sa.Column('last_used_at', sa.DateTime(), nullable=False),
+    sa.Column('calories_sum', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.Column('protein_sum', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.Column('carbs_sum', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.Column('fat_sum', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.Column('fiber_sum', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'name_key', 'portion_key', name='uq_food_usage_key')
+    )
+    op.create_index('idx_food_usage_top', 'user_food_usage', ['user_id', 'use_count', 'last_used_at'], unique=False)
+
+    # Backfill from existing entries; keys are computed in Python, as at
+    # runtime. Entries are read in keyset batches in (user_id, id) order, so
+    # only one user's groups are held at a time.
+    bind = op.get_bind()
+    entries = sa.table('food_entries',
+        sa.column('id'), sa.column('user_id'), sa.column('food_name'),
+        sa.column('portion_desc'), sa.column('created_at', sa.DateTime()),
+        *(sa.column(field) for field in MACRO_SUMS),
+    )
+    groups: dict[tuple, dict] = {}
+    pending: list[dict] = []
+    last_user, last_id = '', ''
+    while True:
+        rows = bind.execute(
+            sa.select(entries)
+            .where(sa.or_(
+                entries.c.user_id > last_user,
+                sa.and_(entries.c.user_id == last_user, entries.c.id > last_id),
+            ))
+            .order_by(entries.c.user_id, entries.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+
+        for entry in rows:
+            if entry.user_id != last_user:
+                # The previous user's entries are all counted
+                pending.extend(groups.values())
+                groups = {}
+                last_user = entry.user_id
+            last_id = entry.id
+
+            name_key, portion_key = usage_key(entry.food_name, entry.portion_desc)
+            group = groups.setdefault((name_key, portion_key), {
+                'id': str(uuid.uuid4()), 'user_id': entry.user_id,
+                'name_key': name_key, 'portion_key': portion_key, 'use_count': 0,
+                'last_used_at': None, **{column: 0.0 for column in MACRO_SUMS.values()},
+            })
+            # The latest entry names the food
+            if group['last_used_at'] is None or entry.created_at >= group['last_used_at']:
+                group.update(food_name=entry.food_name, portion_desc=entry.portion_desc,
+                             last_used_at=entry.created_at)
+            group['use_count'] += 1
+            for field, column in MACRO_SUMS.items():
+                group[column] += float(getattr(entry, field) or 0)
+
+        if len(pending) >= BATCH_SIZE:
+            op.bulk_insert(usage, pending)
+            pending = []
+
+    pending.extend(groups.values())
+    if pending:
+        op.bulk_insert(usage, pending)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_food_usage_top', table_name='user_food_usage')
+    op.drop_table('user_food_usage')
@@ -0,0 +1,45 @@
+"""add_calorie_log_meals
+
+Revision ID: e2b6c8d4f1a3
+Revises: d5f1a9c3e7b4
+Create Date: 2026-02-18 14:05:52.117394
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2b6c8d4f1a3'
+down_revision: Union[str, None] = 'd5f1a9c3e7b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('calorie_log_meals',
+    sa.Column('calorie_log_id', sa.String(length=36), nullable=False),
+    sa.Column('meal_type', sa.Enum('breakfast', 'lunch', 'dinner', 'snack', name='meal_type_enum'), nullable=False),
+    sa.Column('entry_count', sa.Integer(), nullable=False),
+    sa.Column('calories', sa.Numeric(precision=8, scale=2), nullable=False),
+    sa.Column('protein_g', sa.Numeric(precision=8, scale=2), nullable=False),
+    sa.Column('carbs_g', sa.Numeric(precision=8, scale=2), nullable=False),
+    sa.Column('fat_g', sa.Numeric(precision=8, scale=2), nullable=False),
+    sa.Column('fiber_g', sa.Numeric(precision=8, scale=2), nullable=False),
+    sa.ForeignKeyConstraint(['calorie_log_id'], ['calorie_logs.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('calorie_log_id', 'meal_type')
+    )
+    op.execute(
+        "INSERT INTO calorie_log_meals "
+        "(calorie_log_id, meal_type, entry_count, calories, protein_g, carbs_g, fat_g, fiber_g) "
+        "SELECT calorie_log_id, meal_type, COUNT(*), SUM(calories), "
+        "COALESCE(SUM(protein_g), 0), COALESCE(SUM(carbs_g), 0), "
+        "COALESCE(SUM(fat_g), 0), COALESCE(SUM(fiber_g), 0) "
+        "FROM food_entries GROUP BY calorie_log_id, meal_type"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('calorie_log_meals')
@@ -0,0 +1,29 @@
+"""index_food_entries_by_log_created
+
+Revision ID: f4a7d2b9c6e1
+Revises: e2b6c8d4f1a3
+Create Date: 2026-02-20 11:37:19.652048
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f4a7d2b9c6e1'
+down_revision: Union[str, None] = 'e2b6c8d4f1a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Create the replacement first: the calorie_log_id foreign key needs an index
+    op.create_index('idx_food_entries_log_created', 'food_entries', ['calorie_log_id', 'created_at'], unique=False)
+    op.drop_index('idx_food_entries_log', table_name='food_entries')
+
+
+def downgrade() -> None:
+    op.create_index('idx_food_entries_log', 'food_entries', ['calorie_log_id'], unique=False)
+    op.drop_index('idx_food_entries_log_created', table_name='food_entries')
@@ -30,11 +30,105 @@ class Settings(BaseSettings):
     # OpenAI
     OPENAI_API_KEY: str = ""
     OPENAI_MODEL: str = "gpt-4o"
+    # Shared HTTP pool for every model call
+    OPENAI_HTTP2: bool = True
+    OPENAI_MAX_CONNECTIONS: int = 50
+    OPENAI_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    OPENAI_KEEPALIVE_EXPIRY_SECONDS: float = 60
+    OPENAI_MAX_RETRIES: int = 2
+    OPENAI_CONNECT_TIMEOUT_SECONDS: float = 5
+    OPENAI_FOOD_TIMEOUT_SECONDS: float = 45
+    OPENAI_PLAN_TIMEOUT_SECONDS: float = 120
+    OPENAI_FEEDBACK_TIMEOUT_SECONDS: float = 60
+
+    # Adaptive (AIMD) limit on in-flight model calls, and the circuit breaker
+    AI_LIMIT_INITIAL: int = 20
+    AI_LIMIT_MIN: int = 2
+    AI_LIMIT_MAX: int = 100
+    AI_LIMIT_BACKOFF: float = 0.7
+    AI_LIMIT_QUEUE_TIMEOUT_SECONDS: float = 10
+    AI_LATENCY_TARGET_FOOD_SECONDS: float = 15
+    AI_LATENCY_TARGET_PLAN_SECONDS: float = 90
+    AI_LATENCY_TARGET_FEEDBACK_SECONDS: float = 30
+    AI_BREAKER_FAILURE_THRESHOLD: int = 5
+    AI_BREAKER_RESET_SECONDS: float = 30
+
+    # AI analysis cache
+    AI_CACHE_ENABLED: bool = True
+    AI_CACHE_MAX_ENTRIES: int = 512
+    AI_TEXT_CACHE_MAX_ENTRIES: int = 5000
+    AI_CACHE_TTL_SECONDS: int = 86400
+    AI_CACHE_PERSISTENT: bool = False
+    # Identical in-flight analyses share one model call; waiters give up after this
+    AI_INFLIGHT_TIMEOUT_SECONDS: float = 60
+    # Resolve common foods in text descriptions from the bundled nutrition table
+    NUTRITION_INDEX_ENABLED: bool = True
+    # Multi-photo meals: photos per request and photos analysed at once
+    AI_BATCH_MAX_PHOTOS: int = 6
+    AI_BATCH_CONCURRENCY: int = 3
+
+    # Photo uploads and preprocessing before vision calls
+    MAX_UPLOAD_BYTES: int = 15 * 1024 * 1024
+    # Room for multipart boundaries and form fields around the photos
+    UPLOAD_REQUEST_OVERHEAD_BYTES: int = 1024 * 1024
+    IMAGE_SPOOL_MAX_MEMORY: int = 1024 * 1024
+    IMAGE_MAX_EDGE: int = 1536
+    IMAGE_JPEG_QUALITY: int = 85
+    IMAGE_PROCESSING_WORKERS: int = 2
+
+    # AI training plans are generated in week chunks, a few at a time
+    TRAINING_PLAN_CHUNK_WEEKS: int = 4
+    TRAINING_PLAN_CHUNK_CONCURRENCY: int = 3
+    TRAINING_PLAN_CHUNK_MAX_TOKENS: int = 4000
+
+    # Background jobs (AI plan generation, weekly feedback)
+    JOB_WORKERS: int = 4
+    JOB_PLAN_CONCURRENCY: int = 2
+    JOB_FEEDBACK_CONCURRENCY: int = 4
+    JOB_MAX_ACTIVE_PER_USER: int = 3
+    JOB_MAX_ATTEMPTS: int = 3
+    JOB_RETRY_BASE_SECONDS: float = 5
+    JOB_RETRY_MAX_SECONDS: float = 300
+    JOB_TIMEOUT_SECONDS: float = 600
+    JOB_POLL_INTERVAL_SECONDS: float = 2
+
+    # Domain events (outbox): a dispatcher leases up to EVENT_BATCH_SIZE
+    # events at a time; a lease outlived by its dispatcher is retried
+    EVENT_BATCH_SIZE: int = 200
+    EVENT_POLL_INTERVAL_SECONDS: float = 2
+    EVENT_LEASE_SECONDS: float = 60
+    EVENT_MAX_ATTEMPTS: int = 5
+
+    # consumed_kcal is maintained by deltas; a periodic pass repairs drift
+    # in the logs of the last CALORIE_RECONCILE_DAYS days
+    CALORIE_RECONCILE_INTERVAL_SECONDS: float = 3600
+    CALORIE_RECONCILE_DAYS: int = 7
+
+    # Level N costs XP_LEVEL_BASE + (N - 1) * XP_LEVEL_STEP XP
+    XP_LEVEL_BASE: int = 100
+    XP_LEVEL_STEP: int = 100
+
+    # Ledger of every model call (JSONL segments, one set per process)
+    AI_LEDGER_ENABLED: bool = True
+    AI_LEDGER_DIR: str = "var/ai_ledger"
+    AI_LEDGER_SEGMENT_BYTES: int = 16 * 1024 * 1024
+    AI_LEDGER_MAX_SEGMENTS: int = 20
+
+    # Operational endpoints (/ops) require this key in X-Ops-Key; empty disables them
+    OPS_API_KEY: str = ""
 
     # CORS - comma-separated for multiple origins
     FRONTEND_URL: str = "http://localhost:5173"
     ALLOWED_ORIGINS: str = ""
 
+    @property
+    def max_upload_request_bytes(self) -> int:
+        """Largest multipart body: a full batch of maximum-size photos."""
+        return (
+            max(1, self.AI_BATCH_MAX_PHOTOS) * self.MAX_UPLOAD_BYTES
+            + self.UPLOAD_REQUEST_OVERHEAD_BYTES
+        )
+
     @property
     def cors_origins(self) -> list[str]:
         origins = [self.FRONTEND_URL]
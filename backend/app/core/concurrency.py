@@ -0,0 +1,235 @@
+"""Adaptive concurrency limit and circuit breaker for upstream AI calls.
+
+Every model call runs inside guard(). The limiter adjusts how many calls
+may be in flight (AIMD): it creeps up while calls come back fast and cuts
+back multiplicatively on overload errors or latency above target. Callers
+beyond the limit queue briefly, then fail fast. The breaker opens after
+repeated overload failures so requests stop piling onto a degraded upstream.
+"""
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+import openai
+
+from app.config import get_settings
+from app.core.exceptions import UpstreamUnavailableError
+
+settings = get_settings()
+
+# Latency above target for these kinds of call counts as congestion
+LATENCY_TARGETS = {
+    "food": settings.AI_LATENCY_TARGET_FOOD_SECONDS,
+    "training_plan": settings.AI_LATENCY_TARGET_PLAN_SECONDS,
+    "feedback": settings.AI_LATENCY_TARGET_FEEDBACK_SECONDS,
+}
+
+OVERLOAD_ERRORS = (
+    openai.RateLimitError,
+    openai.APIConnectionError,  # includes APITimeoutError
+    openai.InternalServerError,
+    asyncio.TimeoutError,
+)
+
+
+class AdaptiveLimiter:
+    """AIMD in-flight limit with a FIFO wait queue."""
+
+    def __init__(
+        self, initial: int, min_limit: int, max_limit: int, backoff: float
+    ):
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.inflight = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        self._last_decrease = 0.0
+        self.peak_queued = 0
+        self.rejected = 0
+        self.decreases = 0
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for waiter in self._waiters if not waiter.done())
+
+    async def acquire(self, timeout: float) -> bool:
+        """Take a slot, waiting at most `timeout` seconds. False if none freed up."""
+        if self.inflight < int(self.limit) and not self._waiters:
+            self.inflight += 1
+            return True
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.peak_queued = max(self.peak_queued, self.queued)
+        try:
+            # shield: a timeout must not cancel a slot that was just handed over
+            await asyncio.wait_for(asyncio.shield(waiter), timeout)
+            return True
+        except (asyncio.TimeoutError, asyncio.CancelledError) as exc:
+            if waiter.done() and not waiter.cancelled():
+                self._release_slot()
+            else:
+                waiter.cancel()
+            if isinstance(exc, asyncio.CancelledError):
+                raise
+            self.rejected += 1
+            return False
+
+    def release(
+        self, started: float, latency_ratio: float | None, overloaded: bool
+    ) -> None:
+        """Give a slot back and adapt the limit from how the call went
+        (latency_ratio None: abandoned call, no signal).
+
+        Only calls started after the last decrease may decrease again, so a
+        burst of slow calls from one congested moment backs off once.
+        """
+        if latency_ratio is None:
+            pass
+        elif overloaded or latency_ratio > 1:
+            if started >= self._last_decrease:
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+                self._last_decrease = time.monotonic()
+                self.decreases += 1
+        elif self.inflight >= self.limit / 2:
+            # Grow by about one per limit's worth of successful calls
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+        self._release_slot()
+
+    def _release_slot(self) -> None:
+        self.inflight -= 1
+        while self._waiters and self.inflight < int(self.limit):
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.inflight += 1
+                waiter.set_result(None)
+
+    def stats(self) -> dict:
+        return {
+            "limit": round(self.limit, 2),
+            "inflight": self.inflight,
+            "queued": self.queued,
+            "peak_queued": self.peak_queued,
+            "rejected": self.rejected,
+            "decreases": self.decreases,
+        }
+
+
+class CircuitBreaker:
+    """Opens after consecutive overload failures; after reset_seconds lets
+    one probe call through (half-open) to decide whether to close."""
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self.short_circuited = 0
+
+    def allow(self) -> bool:
+        if self.state == "open":
+            if time.monotonic() - self.opened_at < self.reset_seconds:
+                self.short_circuited += 1
+                return False
+            self.state = "half_open"
+            self._probing = False
+        if self.state == "half_open":
+            if self._probing:
+                self.short_circuited += 1
+                return False
+            self._probing = True
+        return True
+
+    def record_success(self) -> None:
+        self.state = "closed"
+        self.failures = 0
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            self.state = "open"
+            self.opened_at = time.monotonic()
+        self._probing = False
+
+    def record_abandoned(self) -> None:
+        """The call was cancelled: no verdict, but free the probe slot."""
+        self._probing = False
+
+    def retry_after(self) -> int:
+        if self.state != "open":
+            return 1
+        remaining = self.reset_seconds - (time.monotonic() - self.opened_at)
+        return max(1, int(remaining + 0.999))
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "retry_after_seconds": self.retry_after() if self.state == "open" else 0,
+            "short_circuited": self.short_circuited,
+        }
+
+
+limiter = AdaptiveLimiter(
+    initial=settings.AI_LIMIT_INITIAL,
+    min_limit=settings.AI_LIMIT_MIN,
+    max_limit=settings.AI_LIMIT_MAX,
+    backoff=settings.AI_LIMIT_BACKOFF,
+)
+breaker = CircuitBreaker(
+    failure_threshold=settings.AI_BREAKER_FAILURE_THRESHOLD,
+    reset_seconds=settings.AI_BREAKER_RESET_SECONDS,
+)
+
+
+@asynccontextmanager
+async def guard(endpoint: str) -> AsyncIterator[None]:
+    """Run one upstream call under the breaker and the adaptive limit.
+
+    Raises UpstreamUnavailableError without calling upstream when the
+    breaker is open or no slot frees up within AI_LIMIT_QUEUE_TIMEOUT_SECONDS.
+    """
+    if not breaker.allow():
+        raise UpstreamUnavailableError(retry_after=breaker.retry_after())
+    try:
+        acquired = await limiter.acquire(settings.AI_LIMIT_QUEUE_TIMEOUT_SECONDS)
+    except asyncio.CancelledError:
+        breaker.record_abandoned()
+        raise
+    if not acquired:
+        breaker.record_abandoned()
+        raise UpstreamUnavailableError(retry_after=1)
+
+    started = time.monotonic()
+    overloaded = False
+    abandoned = False
+    try:
+        yield
+    except (asyncio.CancelledError, GeneratorExit):
+        abandoned = True
+        breaker.record_abandoned()
+        raise
+    except OVERLOAD_ERRORS:
+        overloaded = True
+        breaker.record_failure()
+        raise
+    except Exception:
+        # Upstream answered; the failure is ours (bad JSON, validation...)
+        breaker.record_success()
+        raise
+    else:
+        breaker.record_success()
+    finally:
+        latency = time.monotonic() - started
+        latency_ratio = None if abandoned else latency / LATENCY_TARGETS[endpoint]
+        limiter.release(started, latency_ratio, overloaded)
+
+
+def stats() -> dict:
+    return {"limiter": limiter.stats(), "breaker": breaker.stats()}
@@ -24,3 +24,30 @@ class NotFoundError(HTTPException):
 class ConflictError(HTTPException):
     def __init__(self, detail: str = "Conflict"):
         super().__init__(status_code=status.HTTP_409_CONFLICT, detail=detail)
+
+
+class PayloadTooLargeError(HTTPException):
+    def __init__(self, detail: str = "Payload too large"):
+        super().__init__(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=detail)
+
+
+class UpstreamUnavailableError(HTTPException):
+    def __init__(
+        self,
+        detail: str = "AI service is busy right now. Please try again shortly or log the food manually.",
+        retry_after: int | None = None,
+    ):
+        headers = {"Retry-After": str(retry_after)} if retry_after else None
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=detail, headers=headers
+        )
+
+
+class UpstreamTimeoutError(HTTPException):
+    def __init__(self, detail: str = "Upstream service timed out"):
+        super().__init__(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail=detail)
+
+
+class TooManyRequestsError(HTTPException):
+    def __init__(self, detail: str = "Too many requests"):
+        super().__init__(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail=detail)
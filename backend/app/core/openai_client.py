@@ -0,0 +1,107 @@
+"""One pooled OpenAI client shared by every AI call in the process.
+
+Keeping a single httpx pool means connections (and their TLS sessions) are
+reused across food analyses, plan chunks and feedback instead of each
+service paying its own connect/handshake cost.
+"""
+import httpx
+from openai import AsyncOpenAI, OpenAIError
+
+from app.config import get_settings
+
+settings = get_settings()
+
+_client: AsyncOpenAI | None = None
+_http: httpx.AsyncClient | None = None
+
+# Read timeout per kind of call; plan chunks generate far more tokens
+ENDPOINT_TIMEOUTS = {
+    "food": settings.OPENAI_FOOD_TIMEOUT_SECONDS,
+    "training_plan": settings.OPENAI_PLAN_TIMEOUT_SECONDS,
+    "feedback": settings.OPENAI_FEEDBACK_TIMEOUT_SECONDS,
+}
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def get_client() -> AsyncOpenAI:
+    global _client, _http
+    if _client is None:
+        _http = httpx.AsyncClient(
+            http2=settings.OPENAI_HTTP2 and _http2_available(),
+            limits=httpx.Limits(
+                max_connections=settings.OPENAI_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.OPENAI_KEEPALIVE_EXPIRY_SECONDS,
+            ),
+            timeout=timeout_for("food"),
+        )
+        _client = AsyncOpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            http_client=_http,
+            max_retries=settings.OPENAI_MAX_RETRIES,
+        )
+    return _client
+
+
+def timeout_for(endpoint: str) -> httpx.Timeout:
+    """Timeout for one kind of call: a short connect, a per-endpoint read."""
+    return httpx.Timeout(
+        ENDPOINT_TIMEOUTS[endpoint], connect=settings.OPENAI_CONNECT_TIMEOUT_SECONDS
+    )
+
+
+async def warm_up() -> None:
+    """Open a connection at startup so the first user request skips the
+    TCP/TLS handshake. Failures are ignored; requests will connect lazily."""
+    if not settings.OPENAI_API_KEY:
+        return
+    try:
+        await get_client().with_options(timeout=timeout_for("food")).models.list()
+    except (OpenAIError, httpx.HTTPError):
+        pass
+
+
+async def close() -> None:
+    global _client, _http
+    if _client is not None:
+        await _client.close()
+    _client = None
+    _http = None
+
+
+def pool_stats() -> dict:
+    """Connection pool utilization of the shared client."""
+    stats = {
+        "http2": bool(_http is not None and settings.OPENAI_HTTP2 and _http2_available()),
+        "max_connections": settings.OPENAI_MAX_CONNECTIONS,
+        "max_keepalive_connections": settings.OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+        "connections": 0,
+        "active": 0,
+        "idle": 0,
+        "queued_requests": 0,
+        "utilization": 0.0,
+    }
+    # httpx has no public pool API; read the httpcore pool when it is there
+    pool = getattr(getattr(_http, "_transport", None), "_pool", None)
+    if pool is None:
+        return stats
+
+    connections = list(getattr(pool, "connections", []))
+    idle = sum(1 for c in connections if c.is_idle())
+    stats.update(
+        connections=len(connections),
+        idle=idle,
+        active=len(connections) - idle,
+        queued_requests=sum(
+            1 for r in getattr(pool, "_requests", []) if r.connection is None
+        ),
+    )
+    stats["utilization"] = round(stats["active"] / settings.OPENAI_MAX_CONNECTIONS, 3)
+    return stats
@@ -0,0 +1,64 @@
+import asyncio
+from typing import Awaitable, Callable, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key into one in-flight call.
+
+    The first caller for a key starts the call in its own task; every caller
+    (including the first) awaits the shared future, so a cancelled or timed-out
+    waiter never aborts the call for the others. Failures are propagated to
+    all waiters.
+    """
+
+    def __init__(self):
+        self._inflight: dict[Hashable, asyncio.Future] = {}
+        # The loop only keeps weak references to tasks; hold them until done
+        self._tasks: set[asyncio.Task] = set()
+
+    async def do(
+        self,
+        key: Hashable,
+        fn: Callable[[], Awaitable[T]],
+        timeout: float | None = None,
+    ) -> T:
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            # Avoid "exception was never retrieved" when every waiter gave up
+            future.add_done_callback(lambda f: f.cancelled() or f.exception())
+            self._inflight[key] = future
+            task = asyncio.create_task(self._run(key, fn, future, timeout))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+        return await asyncio.wait_for(asyncio.shield(future), timeout)
+
+    async def _run(
+        self,
+        key: Hashable,
+        fn: Callable[[], Awaitable[T]],
+        future: asyncio.Future,
+        timeout: float | None,
+    ) -> None:
+        try:
+            result = await asyncio.wait_for(fn(), timeout)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as exc:
+            if not future.done():
+                future.set_exception(exc)
+        else:
+            if not future.done():
+                future.set_result(result)
+        finally:
+            self._inflight.pop(key, None)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._inflight
+
+    def __len__(self) -> int:
+        return len(self._inflight)
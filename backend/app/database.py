@@ -16,6 +16,15 @@ AsyncSessionLocal = async_sessionmaker(
 )
 
 
+async def release_connection(session: AsyncSession) -> None:
+    """Hand the session's pooled connection back before a slow external call.
+
+    Ends the current transaction; the session checks a connection out again
+    on its next query, so only persistence afterwards touches the pool.
+    """
+    await session.commit()
+
+
 async def get_db():
     async with AsyncSessionLocal() as session:
         try:
@@ -6,7 +6,7 @@ from slowapi.errors import RateLimitExceeded
 
 from app.config import get_settings
 from app.core.rate_limiter import limiter
-from app.routers import auth, users, food, calories, progress, gamification, training
+from app.routers import auth, users, food, calories, progress, gamification, training, jobs, ops
 
 settings = get_settings()
 
@@ -19,6 +19,21 @@ def create_app() -> FastAPI:
         openapi_url="/api/openapi.json",
     )
 
+    # Reject oversized uploads from Content-Length before the body is parsed
+    @app.middleware("http")
+    async def limit_upload_size(request: Request, call_next):
+        content_length = request.headers.get("content-length", "")
+        content_type = request.headers.get("content-type", "")
+        if (
+            content_type.startswith("multipart/")
+            and content_length.isdigit()
+            and int(content_length) > settings.max_upload_request_bytes
+        ):
+            return JSONResponse(
+                status_code=413, content={"detail": "Upload is too large"}
+            )
+        return await call_next(request)
+
     # CORS
     app.add_middleware(
         CORSMiddleware,
@@ -42,13 +57,41 @@ def create_app() -> FastAPI:
     app.include_router(progress.router, prefix=f"{prefix}/progress", tags=["progress"])
     app.include_router(gamification.router, prefix=f"{prefix}/gamification", tags=["gamification"])
     app.include_router(training.router, prefix=f"{prefix}/training", tags=["training"])
+    app.include_router(jobs.router, prefix=f"{prefix}/jobs", tags=["jobs"])
+    app.include_router(ops.router, prefix=f"{prefix}/ops", tags=["ops"])
 
     @app.on_event("startup")
     async def startup_event():
         from app.database import AsyncSessionLocal
+        from app.services.badge_catalog import load_catalog
         from app.services.gamification_service import seed_badges
         async with AsyncSessionLocal() as db:
             await seed_badges(db)
+            await load_catalog(db)
+
+        from app.core.openai_client import warm_up
+        from app.services.events import start_dispatcher
+        from app.services.job_service import start_workers
+        from app.services.reconciler import start_reconciler
+        start_dispatcher()
+        start_workers()
+        start_reconciler()
+        await warm_up()
+
+    @app.on_event("shutdown")
+    async def shutdown_event():
+        from app.core import openai_client
+        from app.services import ai_ledger
+        from app.services.events import stop_dispatcher
+        from app.services.job_service import stop_workers
+        from app.services.reconciler import stop_reconciler
+        from app.utils.image import shutdown_executor
+        await stop_workers()
+        await stop_dispatcher()
+        await stop_reconciler()
+        shutdown_executor()
+        await openai_client.close()
+        ai_ledger.close()
 
     @app.get("/health")
     async def health():
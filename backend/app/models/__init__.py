@@ -1,17 +1,23 @@
 from app.models.base import Base
 from app.models.user import User, UserProfile
-from app.models.calorie_log import CalorieLog
+from app.models.calorie_log import CalorieLog, CalorieLogMeal
 from app.models.food_entry import FoodEntry
 from app.models.progress import ProgressSummary
 from app.models.refresh_token import RefreshToken
 from app.models.training import TrainingPlan, TrainingSession, Race
 from app.models.gamification import Badge, UserBadge, UserStats, WeeklyFeedback
+from app.models.ai_cache import AIAnalysisCache
+from app.models.ai_payload import AIPayload
+from app.models.job import Job
+from app.models.food_usage import UserFoodUsage
+from app.models.outbox import OutboxEvent
 
 __all__ = [
     "Base",
     "User",
     "UserProfile",
     "CalorieLog",
+    "CalorieLogMeal",
     "FoodEntry",
     "ProgressSummary",
     "RefreshToken",
@@ -22,4 +28,9 @@ __all__ = [
     "UserBadge",
     "UserStats",
     "WeeklyFeedback",
+    "AIAnalysisCache",
+    "AIPayload",
+    "Job",
+    "UserFoodUsage",
+    "OutboxEvent",
 ]
@@ -0,0 +1,20 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import String, JSON, Index
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class AIAnalysisCache(Base):
+    __tablename__ = "ai_analysis_cache"
+
+    cache_key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    kind: Mapped[str] = mapped_column(String(20), nullable=False)
+    result: Mapped[dict] = mapped_column(JSON, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        default=lambda: datetime.now(timezone.utc)
+    )
+    expires_at: Mapped[datetime] = mapped_column(nullable=False)
+
+    __table_args__ = (Index("idx_ai_cache_expires", "expires_at"),)
@@ -0,0 +1,21 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import String, Integer
+from sqlalchemy.dialects.mysql import MEDIUMBLOB
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class AIPayload(Base):
+    """A raw AI analysis, stored once and keyed by the hash of its content."""
+
+    __tablename__ = "ai_payloads"
+
+    id: Mapped[str] = mapped_column(String(64), primary_key=True)
+    encoding: Mapped[str] = mapped_column(String(10), nullable=False)
+    data: Mapped[bytes] = mapped_column(MEDIUMBLOB, nullable=False)
+    size_bytes: Mapped[int] = mapped_column(Integer, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        default=lambda: datetime.now(timezone.utc)
+    )
@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime, date, timezone
 
-from sqlalchemy import String, Date, Numeric, Enum, ForeignKey, Index
+from sqlalchemy import String, Date, Numeric, Enum, ForeignKey, Index, Integer
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.models.base import Base
@@ -35,6 +35,9 @@ class CalorieLog(Base):
     entries: Mapped[list["FoodEntry"]] = relationship(
         back_populates="calorie_log", cascade="all, delete-orphan"
     )
+    meals: Mapped[list["CalorieLogMeal"]] = relationship(
+        cascade="all, delete-orphan", passive_deletes=True
+    )
 
     @property
     def remaining_kcal(self) -> float:
@@ -43,3 +46,26 @@ class CalorieLog(Base):
     __table_args__ = (
         Index("idx_calorie_log_user_date", "user_id", "log_date", unique=True),
     )
+
+
+class CalorieLogMeal(Base):
+    """Running totals of one meal type within a daily log, kept in step
+    with its food entries so the day's macros never need the entries."""
+
+    __tablename__ = "calorie_log_meals"
+
+    calorie_log_id: Mapped[str] = mapped_column(
+        String(36),
+        ForeignKey("calorie_logs.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    meal_type: Mapped[str] = mapped_column(
+        Enum("breakfast", "lunch", "dinner", "snack", name="meal_type_enum"),
+        primary_key=True,
+    )
+    entry_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    calories: Mapped[float] = mapped_column(Numeric(8, 2), default=0, nullable=False)
+    protein_g: Mapped[float] = mapped_column(Numeric(8, 2), default=0, nullable=False)
+    carbs_g: Mapped[float] = mapped_column(Numeric(8, 2), default=0, nullable=False)
+    fat_g: Mapped[float] = mapped_column(Numeric(8, 2), default=0, nullable=False)
+    fiber_g: Mapped[float] = mapped_column(Numeric(8, 2), default=0, nullable=False)
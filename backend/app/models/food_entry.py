@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime, timezone
 
-from sqlalchemy import String, Boolean, Numeric, Enum, ForeignKey, Index, JSON
+from sqlalchemy import String, Boolean, Numeric, Enum, ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.models.base import Base
@@ -38,7 +38,9 @@ class FoodEntry(Base):
     fiber_g: Mapped[float] = mapped_column(Numeric(6, 2), nullable=True)
     photo_url: Mapped[str] = mapped_column(String(512), nullable=True)
     ai_confidence: Mapped[float] = mapped_column(Numeric(3, 2), nullable=True)
-    ai_raw_response: Mapped[dict] = mapped_column(JSON, nullable=True)
+    ai_payload_id: Mapped[str] = mapped_column(
+        String(64), ForeignKey("ai_payloads.id"), nullable=True
+    )
     is_favorite: Mapped[bool] = mapped_column(Boolean, default=False, nullable=False)
     created_at: Mapped[datetime] = mapped_column(
         default=lambda: datetime.now(timezone.utc)
@@ -48,6 +50,7 @@ class FoodEntry(Base):
 
     __table_args__ = (
         Index("idx_food_entries_user", "user_id"),
-        Index("idx_food_entries_log", "calorie_log_id"),
+        Index("idx_food_entries_log_created", "calorie_log_id", "created_at"),
         Index("idx_food_entries_favorite", "user_id", "is_favorite"),
+        Index("idx_food_entries_user_name", "user_id", "food_name"),
     )
@@ -0,0 +1,65 @@
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import String, Integer, Numeric, ForeignKey, Index, UniqueConstraint
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class UserFoodUsage(Base):
+    """How often and how recently a user logged one food at one portion.
+
+    Macros are kept as sums so removing an entry is an exact subtraction;
+    the typical value is sum / use_count.
+    """
+
+    __tablename__ = "user_food_usage"
+
+    id: Mapped[str] = mapped_column(
+        String(36), primary_key=True, default=lambda: str(uuid.uuid4())
+    )
+    user_id: Mapped[str] = mapped_column(
+        String(36), ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    name_key: Mapped[str] = mapped_column(String(255), nullable=False)
+    portion_key: Mapped[str] = mapped_column(String(255), nullable=False)
+    food_name: Mapped[str] = mapped_column(String(255), nullable=False)
+    portion_desc: Mapped[str] = mapped_column(String(255), nullable=True)
+    use_count: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    last_used_at: Mapped[datetime] = mapped_column(
+        default=lambda: datetime.now(timezone.utc)
+    )
+    calories_sum: Mapped[float] = mapped_column(Numeric(12, 2), default=0, nullable=False)
+    protein_sum: Mapped[float] = mapped_column(Numeric(12, 2), default=0, nullable=False)
+    carbs_sum: Mapped[float] = mapped_column(Numeric(12, 2), default=0, nullable=False)
+    fat_sum: Mapped[float] = mapped_column(Numeric(12, 2), default=0, nullable=False)
+    fiber_sum: Mapped[float] = mapped_column(Numeric(12, 2), default=0, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "name_key", "portion_key", name="uq_food_usage_key"),
+        Index("idx_food_usage_top", "user_id", "use_count", "last_used_at"),
+    )
+
+    def _typical(self, total) -> float:
+        return round(float(total) / self.use_count, 1) if self.use_count else 0.0
+
+    @property
+    def calories(self) -> float:
+        return self._typical(self.calories_sum)
+
+    @property
+    def protein_g(self) -> float:
+        return self._typical(self.protein_sum)
+
+    @property
+    def carbs_g(self) -> float:
+        return self._typical(self.carbs_sum)
+
+    @property
+    def fat_g(self) -> float:
+        return self._typical(self.fat_sum)
+
+    @property
+    def fiber_g(self) -> float:
+        return self._typical(self.fiber_sum)
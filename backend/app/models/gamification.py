@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime, timezone, date
 
-from sqlalchemy import String, Text, SmallInteger, Integer, ForeignKey, Date, Boolean
+from sqlalchemy import String, Text, SmallInteger, Integer, Numeric, ForeignKey, Date, Boolean
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.models.base import Base
@@ -52,10 +52,16 @@ class UserStats(Base):
     level: Mapped[int] = mapped_column(SmallInteger, default=1, nullable=False)
     current_streak: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
     longest_streak: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    # Day current_streak was last extended; a gap after it means the run ended
+    last_log_date: Mapped[date | None] = mapped_column(Date, nullable=True)
     total_logs: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
     total_photos: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
     perfect_weeks: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
     days_on_target: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    sessions_completed: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    distance_km: Mapped[float] = mapped_column(Numeric(8, 1), default=0, nullable=False)
+    races_added: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
+    races_completed: Mapped[int] = mapped_column(Integer, default=0, nullable=False)
     updated_at: Mapped[datetime] = mapped_column(
         default=lambda: datetime.now(timezone.utc),
         onupdate=lambda: datetime.now(timezone.utc),
@@ -0,0 +1,38 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import BigInteger, String, Text, SmallInteger, ForeignKey, Enum, JSON, Index
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class OutboxEvent(Base):
+    """A domain event written in the same transaction as the change it
+    describes; deleted once every subscriber has handled it."""
+
+    __tablename__ = "event_outbox"
+
+    # Autoincrement keeps delivery in emission order
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    user_id: Mapped[str] = mapped_column(
+        String(36), ForeignKey("users.id", ondelete="CASCADE"), nullable=False
+    )
+    name: Mapped[str] = mapped_column(String(50), nullable=False)
+    payload: Mapped[dict] = mapped_column(JSON, nullable=False)
+    status: Mapped[str] = mapped_column(
+        Enum("pending", "dead", name="outbox_status_enum"),
+        default="pending",
+        nullable=False,
+    )
+    attempts: Mapped[int] = mapped_column(SmallInteger, default=0, nullable=False)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    available_at: Mapped[datetime] = mapped_column(
+        default=lambda: datetime.now(timezone.utc)
+    )
+    created_at: Mapped[datetime] = mapped_column(
+        default=lambda: datetime.now(timezone.utc)
+    )
+
+    __table_args__ = (
+        Index("idx_event_outbox_status_available", "status", "available_at"),
+    )
@@ -6,7 +6,13 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
 from app.dependencies import get_current_user
 from app.models.user import User
-from app.schemas.calorie import CalorieLogResponse, CalorieLogSummary
+from app.schemas.calorie import (
+    CalorieLogResponse,
+    CalorieLogSummary,
+    DailySummaryResponse,
+    FoodEntryPage,
+    MealSubtotal,
+)
 from app.schemas.food import FoodEntryResponse, FoodEntryUpdate
 from app.schemas.auth import MessageResponse
 from app.services import calorie_service, food_service
@@ -16,10 +22,13 @@ router = APIRouter()
 
 @router.get("/today", response_model=CalorieLogResponse)
 async def get_today(
+    include_entries: bool = Query(default=True),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    log = await calorie_service.get_or_create_daily_log(db, current_user.id)
+    log = await calorie_service.get_or_create_daily_log(
+        db, current_user.id, with_entries=include_entries
+    )
     return CalorieLogResponse(
         id=log.id,
         log_date=log.log_date.isoformat(),
@@ -27,17 +36,42 @@ async def get_today(
         consumed_kcal=float(log.consumed_kcal),
         remaining_kcal=log.remaining_kcal,
         status=log.status,
-        entries=[FoodEntryResponse.model_validate(e) for e in log.entries],
+        entries=[FoodEntryResponse.model_validate(e) for e in log.entries]
+        if include_entries else [],
+    )
+
+
+@router.get("/today/summary", response_model=DailySummaryResponse)
+async def get_today_summary(
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    log, meals = await calorie_service.get_daily_summary(db, current_user.id)
+    subtotals = [MealSubtotal.model_validate(m) for m in meals if m.entry_count > 0]
+    return DailySummaryResponse(
+        log_date=log.log_date.isoformat(),
+        target_kcal=float(log.target_kcal),
+        consumed_kcal=float(log.consumed_kcal),
+        remaining_kcal=log.remaining_kcal,
+        status=log.status,
+        protein_g=round(sum(m.protein_g for m in subtotals), 2),
+        carbs_g=round(sum(m.carbs_g for m in subtotals), 2),
+        fat_g=round(sum(m.fat_g for m in subtotals), 2),
+        fiber_g=round(sum(m.fiber_g for m in subtotals), 2),
+        meals=subtotals,
     )
 
 
 @router.get("/date/{log_date}", response_model=CalorieLogResponse)
 async def get_by_date(
     log_date: date,
+    include_entries: bool = Query(default=True),
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
-    log = await calorie_service.get_log_by_date(db, current_user.id, log_date)
+    log = await calorie_service.get_log_by_date(
+        db, current_user.id, log_date, with_entries=include_entries
+    )
     return CalorieLogResponse(
         id=log.id,
         log_date=log.log_date.isoformat(),
@@ -45,7 +79,26 @@ async def get_by_date(
         consumed_kcal=float(log.consumed_kcal),
         remaining_kcal=log.remaining_kcal,
         status=log.status,
-        entries=[FoodEntryResponse.model_validate(e) for e in log.entries],
+        entries=[FoodEntryResponse.model_validate(e) for e in log.entries]
+        if include_entries else [],
+    )
+
+
+@router.get("/entries", response_model=FoodEntryPage)
+async def get_entries(
+    log_date: date | None = Query(default=None),
+    limit: int = Query(default=20, ge=1, le=100),
+    cursor: str | None = Query(default=None),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """A day's entries (default today), a page at a time; pass next_cursor back."""
+    entries, next_cursor = await calorie_service.get_entries_page(
+        db, current_user.id, log_date or date.today(), limit, cursor
+    )
+    return FoodEntryPage(
+        items=[FoodEntryResponse.model_validate(e) for e in entries],
+        next_cursor=next_cursor,
     )
 
 
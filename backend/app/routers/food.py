@@ -1,24 +1,76 @@
-from fastapi import APIRouter, Depends, UploadFile, File, Form, Query
+from typing import AsyncIterator
+
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query
+from fastapi.responses import StreamingResponse
+from openai import OpenAIError
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 from sqlalchemy import select
 
-from app.database import get_db
+from app.config import get_settings
+from app.core.exceptions import BadRequestError
+from app.database import get_db, release_connection
 from app.dependencies import get_current_user
 from app.models.user import User, UserProfile
 from app.schemas.food import (
     AIAnalysisResponse,
+    BatchAnalysisResponse,
+    FoodItemAI,
     TextAnalyzeRequest,
     ConfirmAnalysisRequest,
     ManualFoodEntry,
     FoodEntryResponse,
+    FrequentFoodResponse,
 )
-from app.services import food_service, ai_service
-from app.services import gamification_service
+from app.services import food_service, food_usage_service, ai_service
+from app.services.events import FoodLogged, emit
+from app.utils.sse import SSE_HEADERS, sse_event
+from app.utils.uploads import read_image_upload
 
+settings = get_settings()
 router = APIRouter()
 
 
+async def _get_user_goal(db: AsyncSession, user_id: str) -> str:
+    """Look up the user's goal, then release the connection: every caller
+    goes on to a model call that can take several seconds."""
+    result = await db.execute(
+        select(UserProfile).where(UserProfile.user_id == user_id)
+    )
+    profile = result.scalar_one_or_none()
+    await release_connection(db)
+    return profile.goal if profile else "performance"
+
+
+async def _sse_analysis(
+    events: AsyncIterator[tuple[str, dict]],
+) -> AsyncIterator[str]:
+    """Relay analysis events as SSE: an "item" event per parsed food item,
+    then the validated "result", or an "error" event if the analysis fails."""
+    try:
+        async for event, data in events:
+            if event == "item":
+                try:
+                    item = FoodItemAI(**data)
+                except (TypeError, ValidationError):
+                    # Malformed items are reported by the final validation
+                    continue
+                yield sse_event("item", item.model_dump())
+            else:
+                yield sse_event("result", AIAnalysisResponse(**data).model_dump())
+    except HTTPException as exc:
+        yield sse_event("error", {"detail": exc.detail})
+    except (ValueError, TypeError):
+        yield sse_event(
+            "error", {"detail": "AI returned an invalid analysis. Please try again."}
+        )
+    except OpenAIError:
+        yield sse_event(
+            "error", {"detail": "AI analysis is unavailable. Please try again."}
+        )
+
+
 @router.post("/analyze-photo", response_model=AIAnalysisResponse)
 async def analyze_photo(
     photo: UploadFile = File(...),
@@ -26,14 +78,10 @@ async def analyze_photo(
     current_user: User = Depends(get_current_user),
 ):
     # Get user goal for context-aware analysis
-    result = await db.execute(
-        select(UserProfile).where(UserProfile.user_id == current_user.id)
-    )
-    profile = result.scalar_one_or_none()
-    user_goal = profile.goal if profile else "performance"
+    user_goal = await _get_user_goal(db, current_user.id)
 
-    image_bytes = await photo.read()
-    analysis = await ai_service.analyze_food_photo(image_bytes, user_goal)
+    image = await read_image_upload(photo)
+    analysis = await ai_service.analyze_food_photo(image, user_goal)
 
     return AIAnalysisResponse(**analysis)
 
@@ -46,19 +94,45 @@ async def analyze_photo_text(
     current_user: User = Depends(get_current_user),
 ):
     """Analyze food from photo + text description combined for stronger accuracy."""
-    result = await db.execute(
-        select(UserProfile).where(UserProfile.user_id == current_user.id)
-    )
-    profile = result.scalar_one_or_none()
-    user_goal = profile.goal if profile else "performance"
+    user_goal = await _get_user_goal(db, current_user.id)
 
-    image_bytes = await photo.read()
+    image = await read_image_upload(photo)
     analysis = await ai_service.analyze_food_photo_with_text(
-        image_bytes, description, user_goal
+        image, description, user_goal
     )
     return AIAnalysisResponse(**analysis)
 
 
+@router.post("/analyze-photos", response_model=BatchAnalysisResponse)
+async def analyze_photos(
+    photos: list[UploadFile] = File(...),
+    descriptions: list[str] = Form(default=[]),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Analyze several photos of one meal (plate, drink, dessert) at once.
+
+    descriptions[i], if given and non-empty, describes photos[i].
+    """
+    if len(photos) > settings.AI_BATCH_MAX_PHOTOS:
+        raise BadRequestError(
+            f"At most {settings.AI_BATCH_MAX_PHOTOS} photos can be analyzed at once"
+        )
+    if len(descriptions) > len(photos):
+        raise BadRequestError("More descriptions than photos")
+
+    user_goal = await _get_user_goal(db, current_user.id)
+
+    batch = []
+    for index, photo in enumerate(photos):
+        image = await read_image_upload(photo)
+        description = descriptions[index].strip() if index < len(descriptions) else ""
+        batch.append((image, description or None))
+
+    analysis = await ai_service.analyze_food_batch(batch, user_goal)
+    return BatchAnalysisResponse(**analysis)
+
+
 @router.post("/analyze-text", response_model=AIAnalysisResponse)
 async def analyze_text(
     body: TextAnalyzeRequest,
@@ -66,16 +140,57 @@ async def analyze_text(
     current_user: User = Depends(get_current_user),
 ):
     """Analyze food from a text description using AI."""
-    result = await db.execute(
-        select(UserProfile).where(UserProfile.user_id == current_user.id)
-    )
-    profile = result.scalar_one_or_none()
-    user_goal = profile.goal if profile else "performance"
+    user_goal = await _get_user_goal(db, current_user.id)
 
     analysis = await ai_service.analyze_food_text(body.description, user_goal)
     return AIAnalysisResponse(**analysis)
 
 
+@router.post("/analyze-photo/stream")
+async def analyze_photo_stream(
+    photo: UploadFile = File(...),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Stream the photo analysis as Server-Sent Events."""
+    user_goal = await _get_user_goal(db, current_user.id)
+    image = await read_image_upload(photo)
+    events = await ai_service.stream_food_photo(image, user_goal)
+    return StreamingResponse(
+        _sse_analysis(events), media_type="text/event-stream", headers=SSE_HEADERS
+    )
+
+
+@router.post("/analyze-photo-text/stream")
+async def analyze_photo_text_stream(
+    photo: UploadFile = File(...),
+    description: str = Form(...),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Stream the photo + text analysis as Server-Sent Events."""
+    user_goal = await _get_user_goal(db, current_user.id)
+    image = await read_image_upload(photo)
+    events = await ai_service.stream_food_photo_with_text(image, description, user_goal)
+    return StreamingResponse(
+        _sse_analysis(events), media_type="text/event-stream", headers=SSE_HEADERS
+    )
+
+
+@router.post("/analyze-text/stream")
+async def analyze_text_stream(
+    body: TextAnalyzeRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Stream the text analysis as Server-Sent Events."""
+    user_goal = await _get_user_goal(db, current_user.id)
+    events = await ai_service.stream_food_text(body.description, user_goal)
+    return StreamingResponse(
+        _sse_analysis(events), media_type="text/event-stream", headers=SSE_HEADERS
+    )
+
+
 @router.post("/confirm-analysis", response_model=list[FoodEntryResponse])
 async def confirm_analysis(
     body: ConfirmAnalysisRequest,
@@ -83,10 +198,8 @@ async def confirm_analysis(
     current_user: User = Depends(get_current_user),
 ):
     entries = await food_service.confirm_ai_analysis(db, current_user.id, body)
-    # Update gamification stats for each entry (photo-based)
-    for _ in entries:
-        await gamification_service.record_food_log(db, current_user.id, is_photo=True)
-    await gamification_service.check_and_award_badges(db, current_user.id)
+    # Every item counts as a photo-based log
+    emit(db, FoodLogged(current_user.id, logs=len(entries), photos=len(entries)))
     return [FoodEntryResponse.model_validate(e) for e in entries]
 
 
@@ -97,9 +210,7 @@ async def manual_entry(
     current_user: User = Depends(get_current_user),
 ):
     entry = await food_service.add_manual_entry(db, current_user.id, body)
-    # Update gamification stats (manual entry)
-    await gamification_service.record_food_log(db, current_user.id, is_photo=False)
-    await gamification_service.check_and_award_badges(db, current_user.id)
+    emit(db, FoodLogged(current_user.id, logs=1))
     return FoodEntryResponse.model_validate(entry)
 
 
@@ -113,6 +224,17 @@ async def search_food(
     return [FoodEntryResponse.model_validate(e) for e in entries]
 
 
+@router.get("/frequent", response_model=list[FrequentFoodResponse])
+async def get_frequent_foods(
+    limit: int = Query(default=20, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """The user's most logged foods, one row per food and portion."""
+    foods = await food_usage_service.get_frequent_foods(db, current_user.id, limit)
+    return [FrequentFoodResponse.model_validate(f) for f in foods]
+
+
 @router.get("/favorites", response_model=list[FoodEntryResponse])
 async def get_favorites(
     db: AsyncSession = Depends(get_db),
@@ -0,0 +1,40 @@
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import get_db
+from app.dependencies import get_current_user
+from app.models.user import User
+from app.schemas.job import JobResponse
+from app.services import job_service
+
+router = APIRouter()
+
+
+@router.get("", response_model=list[JobResponse])
+async def list_jobs(
+    limit: int = Query(default=20, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    jobs = await job_service.get_jobs(db, current_user.id, limit)
+    return [JobResponse.model_validate(j) for j in jobs]
+
+
+@router.get("/{job_id}", response_model=JobResponse)
+async def get_job(
+    job_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    job = await job_service.get_job(db, current_user.id, job_id)
+    return JobResponse.model_validate(job)
+
+
+@router.post("/{job_id}/cancel", response_model=JobResponse)
+async def cancel_job(
+    job_id: str,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    job = await job_service.cancel_job(db, current_user.id, job_id)
+    return JobResponse.model_validate(job)
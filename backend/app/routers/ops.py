@@ -0,0 +1,45 @@
+import secrets
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, Query
+
+from app.config import get_settings
+from app.core import concurrency, openai_client
+from app.core.exceptions import ForbiddenError, NotFoundError
+from app.services import ai_ledger
+
+settings = get_settings()
+
+
+def require_ops_key(x_ops_key: str = Header(default="")) -> None:
+    if not settings.OPS_API_KEY:
+        raise NotFoundError()
+    if not secrets.compare_digest(x_ops_key, settings.OPS_API_KEY):
+        raise ForbiddenError("Invalid ops key")
+
+
+router = APIRouter(dependencies=[Depends(require_ops_key)])
+
+
+@router.get("/ai-ledger/stats")
+async def ai_ledger_stats(
+    hours: float = Query(default=24, gt=0, le=24 * 90),
+    endpoint: Optional[str] = Query(default=None),
+):
+    """p50/p95/p99 latency and tokens per AI endpoint, slowest first."""
+    return {
+        "hours": hours,
+        "endpoints": await ai_ledger.stats(hours, endpoint),
+    }
+
+
+@router.get("/openai-pool")
+async def openai_pool():
+    """Connection pool utilization of the shared OpenAI client."""
+    return openai_client.pool_stats()
+
+
+@router.get("/ai-upstream")
+async def ai_upstream():
+    """Adaptive limit, queue depth and circuit breaker state for model calls."""
+    return concurrency.stats()
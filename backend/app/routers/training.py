@@ -1,7 +1,9 @@
 from datetime import date
-from typing import Optional
+from typing import AsyncIterator, Optional
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from openai import OpenAIError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database import get_db
@@ -14,11 +16,48 @@ from app.schemas.training import (
     GeneratePlanRequest,
 )
 from app.schemas.gamification import WeeklyFeedbackResponse
-from app.services import training_service
+from app.schemas.job import JobResponse
+from app.services import training_service, job_service
+from app.utils.sse import SSE_HEADERS, sse_event
 
 router = APIRouter()
 
 
+async def _sse_plan_progress(
+    events: AsyncIterator[tuple[str, dict]],
+) -> AsyncIterator[str]:
+    """Relay plan generation progress as SSE: "plan", one "chunk" per stored
+    block of weeks (with its sessions), then "done" or "error"."""
+    try:
+        async for event, data in events:
+            if event == "plan":
+                plan = data["plan"]
+                yield sse_event("plan", {
+                    "plan_id": plan.id,
+                    "name": plan.name,
+                    "start_date": plan.start_date,
+                    "end_date": plan.end_date,
+                    "weeks": plan.weeks,
+                    "total_chunks": data["total_chunks"],
+                })
+            elif event == "chunk":
+                yield sse_event("chunk", {
+                    **data,
+                    "sessions": [
+                        TrainingSessionResponse.model_validate(s).model_dump()
+                        for s in data["sessions"]
+                    ],
+                })
+            else:
+                yield sse_event(event, data)
+    except HTTPException as exc:
+        yield sse_event("error", {"detail": exc.detail})
+    except (OpenAIError, ValueError):
+        yield sse_event(
+            "error", {"detail": "Plan generation failed. Please try again."}
+        )
+
+
 # --- Races ---
 @router.post("/races", response_model=RaceResponse)
 async def create_race(
@@ -114,6 +153,33 @@ async def generate_plan(
     return TrainingPlanResponse.model_validate(plan)
 
 
+@router.post("/plans/generate/stream")
+async def generate_plan_stream(
+    body: GeneratePlanRequest,
+    current_user: User = Depends(get_current_user),
+):
+    """Generate an AI plan week-chunk by week-chunk, streaming progress as SSE."""
+    events = training_service.generate_training_plan_stream(
+        current_user.id, body.model_dump()
+    )
+    return StreamingResponse(
+        _sse_plan_progress(events), media_type="text/event-stream", headers=SSE_HEADERS
+    )
+
+
+@router.post("/plans/generate/jobs", response_model=JobResponse, status_code=202)
+async def submit_generate_plan(
+    body: GeneratePlanRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Queue AI plan generation; poll /jobs/{id} for progress and the plan id."""
+    job = await job_service.submit_job(
+        db, current_user.id, "training_plan", body.model_dump(mode="json")
+    )
+    return JobResponse.model_validate(job)
+
+
 # --- Sessions ---
 @router.put("/sessions/{session_id}", response_model=TrainingSessionResponse)
 async def update_session(
@@ -149,3 +215,19 @@ async def generate_feedback(
         db, current_user.id, week_start
     )
     return WeeklyFeedbackResponse.model_validate(feedback)
+
+
+@router.post("/feedback/jobs", response_model=JobResponse, status_code=202)
+async def submit_feedback(
+    week_start: Optional[date] = Query(default=None),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Queue weekly feedback generation; the job result is the feedback."""
+    job = await job_service.submit_job(
+        db,
+        current_user.id,
+        "weekly_feedback",
+        {"week_start": week_start.isoformat() if week_start else None},
+    )
+    return JobResponse.model_validate(job)
@@ -26,3 +26,35 @@ class CalorieLogSummary(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class MealSubtotal(BaseModel):
+    meal_type: str
+    entry_count: int
+    calories: float
+    protein_g: float
+    carbs_g: float
+    fat_g: float
+    fiber_g: float
+
+    class Config:
+        from_attributes = True
+
+
+class DailySummaryResponse(BaseModel):
+    """Day totals and per-meal subtotals, read without the entries."""
+    log_date: str
+    target_kcal: float
+    consumed_kcal: float
+    remaining_kcal: float
+    status: str
+    protein_g: float
+    carbs_g: float
+    fat_g: float
+    fiber_g: float
+    meals: list[MealSubtotal] = []
+
+
+class FoodEntryPage(BaseModel):
+    items: list[FoodEntryResponse]
+    next_cursor: Optional[str] = None
@@ -23,6 +23,17 @@ class AIAnalysisResponse(BaseModel):
     health_tip: Optional[str] = None
 
 
+class BatchPhotoFailure(BaseModel):
+    photo_index: int
+    detail: str
+
+
+class BatchAnalysisResponse(AIAnalysisResponse):
+    """Merged analysis of several photos; photos that failed are listed
+    instead of failing the whole batch."""
+    failures: list[BatchPhotoFailure] = []
+
+
 class TextAnalyzeRequest(BaseModel):
     description: str = Field(min_length=3, max_length=1000)
 
@@ -73,3 +84,19 @@ class FoodEntryUpdate(BaseModel):
     carbs_g: Optional[float] = Field(default=None, ge=0)
     fat_g: Optional[float] = Field(default=None, ge=0)
     fiber_g: Optional[float] = Field(default=None, ge=0)
+
+
+class FrequentFoodResponse(BaseModel):
+    """A food the user logs often, with its typical macros per serving."""
+    food_name: str
+    portion_desc: Optional[str]
+    use_count: int
+    last_used_at: datetime
+    calories: float
+    protein_g: float
+    carbs_g: float
+    fat_g: float
+    fiber_g: float
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,20 @@
+from datetime import datetime
+from typing import Optional
+from pydantic import BaseModel
+
+
+class JobResponse(BaseModel):
+    id: str
+    kind: str
+    status: str
+    progress: Optional[dict]
+    result: Optional[dict]
+    error: Optional[str]
+    attempts: int
+    max_attempts: int
+    cancel_requested: bool
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
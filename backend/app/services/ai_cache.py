@@ -0,0 +1,101 @@
+import copy
+import hashlib
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, delete
+from sqlalchemy.dialects.mysql import insert
+
+from app.config import get_settings
+from app.core.cache import TTLCache
+from app.database import AsyncSessionLocal
+from app.models.ai_cache import AIAnalysisCache
+
+settings = get_settings()
+
+# Purge expired persistent rows once every N writes
+PURGE_EVERY_WRITES = 100
+
+_photo_memory = TTLCache(settings.AI_CACHE_MAX_ENTRIES, settings.AI_CACHE_TTL_SECONDS)
+# Text descriptions repeat across users, so they get their own, larger tier
+_text_memory = TTLCache(settings.AI_TEXT_CACHE_MAX_ENTRIES, settings.AI_CACHE_TTL_SECONDS)
+_writes_since_purge = 0
+
+
+def _memory_for(kind: str) -> TTLCache:
+    return _text_memory if kind == "text" else _photo_memory
+
+
+def make_key(*parts: str) -> str:
+    """Build a fixed-length cache key from its parts."""
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+async def get_cached(key: str, kind: str) -> dict | None:
+    """Look up an analysis in memory first, then in the persistent tier."""
+    if not settings.AI_CACHE_ENABLED:
+        return None
+
+    memory = _memory_for(kind)
+    value = memory.get(key)
+    if value is None and settings.AI_CACHE_PERSISTENT:
+        value = await _load_persistent(key)
+        if value is not None:
+            memory.set(key, value)
+
+    return copy.deepcopy(value) if value is not None else None
+
+
+async def store(key: str, kind: str, value: dict) -> None:
+    """Save an analysis in both cache tiers."""
+    if not settings.AI_CACHE_ENABLED:
+        return
+
+    _memory_for(kind).set(key, copy.deepcopy(value))
+    if settings.AI_CACHE_PERSISTENT:
+        await _save_persistent(key, kind, value)
+
+
+def clear_memory() -> None:
+    _photo_memory.clear()
+    _text_memory.clear()
+
+
+def stats() -> dict:
+    """Hit/miss counters for the in-process tiers."""
+    return {"photo": _photo_memory.stats(), "text": _text_memory.stats()}
+
+
+async def _load_persistent(key: str) -> dict | None:
+    now = datetime.now(timezone.utc)
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(AIAnalysisCache.result).where(
+                AIAnalysisCache.cache_key == key,
+                AIAnalysisCache.expires_at > now,
+            )
+        )
+        return result.scalar_one_or_none()
+
+
+async def _save_persistent(key: str, kind: str, value: dict) -> None:
+    global _writes_since_purge
+
+    now = datetime.now(timezone.utc)
+    expires_at = now + timedelta(seconds=settings.AI_CACHE_TTL_SECONDS)
+    stmt = insert(AIAnalysisCache).values(
+        cache_key=key, kind=kind, result=value, created_at=now, expires_at=expires_at
+    )
+    stmt = stmt.on_duplicate_key_update(
+        result=stmt.inserted.result, expires_at=stmt.inserted.expires_at
+    )
+
+    async with AsyncSessionLocal() as db:
+        await db.execute(stmt)
+
+        _writes_since_purge += 1
+        if _writes_since_purge >= PURGE_EVERY_WRITES:
+            _writes_since_purge = 0
+            await db.execute(
+                delete(AIAnalysisCache).where(AIAnalysisCache.expires_at <= now)
+            )
+        await db.commit()
@@ -0,0 +1,214 @@
+"""Append-only ledger of model calls, kept as rotating JSONL segment files.
+
+One line per call: endpoint, model, prompt hash, token counts, latency and
+outcome. Each process writes its own segment, so uvicorn workers never
+interleave lines; stats() replays every segment.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import AsyncIterator, Iterator
+
+from app.config import get_settings
+
+settings = get_settings()
+
+_lock = threading.Lock()
+_segment = None
+_segment_path: Path | None = None
+
+
+class LedgerCall:
+    """Filled in by the caller while a model call is in progress."""
+
+    def __init__(self, endpoint: str, model: str, prompt_hash: str, stream: bool):
+        self.endpoint = endpoint
+        self.model = model
+        self.prompt_hash = prompt_hash
+        self.stream = stream
+        self.usage = None
+
+    def set_usage(self, usage) -> None:
+        if usage is not None:
+            self.usage = usage
+
+
+def prompt_hash(messages: list[dict]) -> str:
+    """Hash the prompt text; image payloads are left out so the same prompt
+    on different photos hashes the same."""
+    parts = []
+    for message in messages:
+        content = message.get("content")
+        if isinstance(content, list):
+            content = [
+                part.get("text", "<image>") if isinstance(part, dict) else part
+                for part in content
+            ]
+        parts.append(f"{message.get('role')}:{json.dumps(content, ensure_ascii=False)}")
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+@asynccontextmanager
+async def record(
+    endpoint: str, model: str, messages: list[dict], stream: bool = False
+) -> AsyncIterator[LedgerCall]:
+    """Time a model call and append its outcome to the ledger."""
+    call = LedgerCall(endpoint, model, prompt_hash(messages), stream)
+    started = time.perf_counter()
+    outcome, error = "ok", None
+    try:
+        yield call
+    except asyncio.TimeoutError:
+        outcome = "timeout"
+        raise
+    except (asyncio.CancelledError, GeneratorExit):
+        # GeneratorExit: a streaming consumer went away mid-response
+        outcome = "cancelled"
+        raise
+    except Exception as exc:
+        outcome, error = "error", type(exc).__name__
+        raise
+    finally:
+        if settings.AI_LEDGER_ENABLED:
+            usage = call.usage
+            _append({
+                "ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+                "endpoint": call.endpoint,
+                "model": call.model,
+                "prompt_hash": call.prompt_hash,
+                "stream": call.stream,
+                "prompt_tokens": getattr(usage, "prompt_tokens", None),
+                "completion_tokens": getattr(usage, "completion_tokens", None),
+                "total_tokens": getattr(usage, "total_tokens", None),
+                "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+                "outcome": outcome,
+                "error": error,
+            })
+
+
+def _ledger_dir() -> Path:
+    return Path(settings.AI_LEDGER_DIR)
+
+
+def _open_segment() -> None:
+    global _segment, _segment_path
+    directory = _ledger_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+    _segment_path = directory / f"ledger-{stamp}-{os.getpid()}.jsonl"
+    _segment = open(_segment_path, "a", encoding="utf-8")
+
+
+def _prune_segments() -> None:
+    segments = sorted(_ledger_dir().glob("ledger-*.jsonl"))
+    # Recently written segments may still be open in another worker
+    active_after = time.time() - 60
+    for old in segments[: max(0, len(segments) - settings.AI_LEDGER_MAX_SEGMENTS)]:
+        try:
+            if old != _segment_path and old.stat().st_mtime < active_after:
+                old.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def _append(entry: dict) -> None:
+    global _segment
+    line = json.dumps(entry, separators=(",", ":")) + "\n"
+    try:
+        with _lock:
+            if _segment is None:
+                _open_segment()
+            _segment.write(line)
+            _segment.flush()
+            if _segment.tell() >= settings.AI_LEDGER_SEGMENT_BYTES:
+                _segment.close()
+                _open_segment()
+                _prune_segments()
+    except OSError:
+        # The ledger is diagnostics only; never fail a request over it
+        _segment = None
+
+
+def close() -> None:
+    global _segment
+    with _lock:
+        if _segment is not None:
+            _segment.close()
+            _segment = None
+
+
+def replay(since: datetime | None = None) -> Iterator[dict]:
+    """Yield ledger entries from every segment, oldest segment first."""
+    cutoff = since.isoformat() if since else None
+    for path in sorted(_ledger_dir().glob("ledger-*.jsonl")):
+        try:
+            with open(path, encoding="utf-8") as segment:
+                for line in segment:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line of a crashed process
+                    if cutoff is None or entry.get("ts", "") >= cutoff:
+                        yield entry
+        except FileNotFoundError:
+            continue  # pruned while we were reading
+
+
+def _percentiles(values: list[float]) -> dict:
+    if not values:
+        return {"p50": None, "p95": None, "p99": None}
+    ordered = sorted(values)
+    last = len(ordered) - 1
+    return {
+        f"p{pct}": ordered[min(last, int(round(pct / 100 * last)))]
+        for pct in (50, 95, 99)
+    }
+
+
+def _summarize(since: datetime | None, endpoint: str | None) -> list[dict]:
+    groups: dict[str, dict] = {}
+    for entry in replay(since):
+        name = entry.get("endpoint", "unknown")
+        if endpoint and name != endpoint:
+            continue
+        group = groups.setdefault(name, {
+            "calls": 0, "errors": 0, "latency": [],
+            "prompt_tokens": [], "completion_tokens": [], "total_tokens": [],
+        })
+        group["calls"] += 1
+        if entry.get("outcome") != "ok":
+            group["errors"] += 1
+        group["latency"].append(entry.get("latency_ms", 0))
+        for field in ("prompt_tokens", "completion_tokens", "total_tokens"):
+            if entry.get(field) is not None:
+                group[field].append(entry[field])
+
+    summary = []
+    for name, group in groups.items():
+        summary.append({
+            "endpoint": name,
+            "calls": group["calls"],
+            "errors": group["errors"],
+            "latency_ms": _percentiles(group["latency"]),
+            "prompt_tokens": _percentiles(group["prompt_tokens"]),
+            "completion_tokens": _percentiles(group["completion_tokens"]),
+            "total_tokens": {
+                **_percentiles(group["total_tokens"]),
+                "sum": sum(group["total_tokens"]),
+            },
+        })
+    # Slowest first: that's what the report is for
+    summary.sort(key=lambda s: s["latency_ms"]["p95"] or 0, reverse=True)
+    return summary
+
+
+async def stats(hours: float | None = 24, endpoint: str | None = None) -> list[dict]:
+    """Latency and token percentiles per endpoint over the last `hours`."""
+    since = datetime.now(timezone.utc) - timedelta(hours=hours) if hours else None
+    return await asyncio.to_thread(_summarize, since, endpoint)
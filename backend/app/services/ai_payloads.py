@@ -0,0 +1,68 @@
+"""Content-addressed store for raw AI analyses referenced by food entries.
+
+A meal's items all point at one row instead of each carrying a copy, and
+identical analyses (cache hits, re-logged meals) share it too.
+"""
+import hashlib
+import json
+import zlib
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, exists
+from sqlalchemy.dialects.mysql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.ai_payload import AIPayload
+from app.models.food_entry import FoodEntry
+
+# Orphans younger than this may belong to an entry insert still in flight
+ORPHAN_GRACE = timedelta(hours=1)
+
+
+def canonical_json(payload: dict) -> bytes:
+    return json.dumps(
+        payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False
+    ).encode("utf-8")
+
+
+def payload_key(raw: bytes) -> str:
+    return hashlib.sha256(raw).hexdigest()
+
+
+def encode(raw: bytes) -> tuple[str, bytes]:
+    """(encoding, data): zlib when it actually saves space."""
+    compressed = zlib.compress(raw, 6)
+    if len(compressed) < len(raw):
+        return "zlib", compressed
+    return "none", raw
+
+
+async def store(db: AsyncSession, payload: dict | None) -> str | None:
+    """Save a payload if it isn't stored yet; return its id."""
+    if not payload:
+        return None
+    raw = canonical_json(payload)
+    key = payload_key(raw)
+    encoding, data = encode(raw)
+    stmt = insert(AIPayload).values(
+        id=key,
+        encoding=encoding,
+        data=data,
+        size_bytes=len(raw),
+        created_at=datetime.now(timezone.utc),
+    )
+    # Re-stamping an existing row keeps purge_orphans off it (and its row
+    # lock holds purge back) until the referencing entries are committed
+    await db.execute(stmt.on_duplicate_key_update(created_at=stmt.inserted.created_at))
+    return key
+
+
+async def purge_orphans(db: AsyncSession) -> int:
+    """Delete payloads no entry references any more."""
+    result = await db.execute(
+        delete(AIPayload).where(
+            AIPayload.created_at < datetime.now(timezone.utc) - ORPHAN_GRACE,
+            ~exists().where(FoodEntry.ai_payload_id == AIPayload.id),
+        )
+    )
+    return result.rowcount
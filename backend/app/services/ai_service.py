@@ -1,20 +1,27 @@
-import base64
+import asyncio
+import copy
+import hashlib
 import json
+from typing import AsyncIterator, Awaitable, Callable
 
-from openai import AsyncOpenAI
+from fastapi import HTTPException
+from openai import OpenAIError
+from pydantic import ValidationError
 
 from app.config import get_settings
+from app.core import concurrency, openai_client
+from app.core.exceptions import UpstreamTimeoutError
+from app.core.singleflight import SingleFlight
+from app.schemas.food import AIAnalysisResponse
+from app.services import ai_cache, ai_ledger, nutrition_index
+from app.utils.food_text import canonicalize_description
+from app.utils.image import b64encode_stream, prepare_image
+from app.utils.json_stream import ArrayItemParser
+from app.utils.uploads import ImageUpload
 
 settings = get_settings()
 
-_client = None
-
-
-def _get_client() -> AsyncOpenAI:
-    global _client
-    if _client is None:
-        _client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
-    return _client
+_inflight = SingleFlight()
 
 
 SYSTEM_PROMPTS = {
@@ -65,81 +72,331 @@ TEXT_ANALYSIS_PROMPT = (
 )
 
 
-async def analyze_food_photo(image_bytes: bytes, user_goal: str) -> dict:
-    """Send food photo to OpenAI Vision, return structured analysis."""
-    base64_image = base64.b64encode(image_bytes).decode("utf-8")
+def _prompt_version() -> str:
+    """Fingerprint of the model and prompts; changing either invalidates cached analyses."""
+    parts = [
+        settings.OPENAI_MODEL,
+        PHOTO_ANALYSIS_PROMPT,
+        PHOTO_TEXT_ANALYSIS_PROMPT,
+        TEXT_ANALYSIS_PROMPT,
+    ]
+    parts.extend(SYSTEM_PROMPTS[goal] for goal in sorted(SYSTEM_PROMPTS))
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()[:12]
 
-    system_prompt = SYSTEM_PROMPTS.get(user_goal, SYSTEM_PROMPTS["performance"])
 
-    response = await _get_client().chat.completions.create(
-        model=settings.OPENAI_MODEL,
-        response_format={"type": "json_object"},
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {
-                "role": "user",
-                "content": [
-                    {"type": "text", "text": PHOTO_ANALYSIS_PROMPT},
-                    {
-                        "type": "image_url",
-                        "image_url": {
-                            "url": f"data:image/jpeg;base64,{base64_image}"
-                        },
+PROMPT_VERSION = _prompt_version()
+
+
+def _is_cacheable(analysis: dict) -> bool:
+    """Only cache responses that the API would accept."""
+    try:
+        AIAnalysisResponse(**analysis)
+    except (TypeError, ValidationError):
+        return False
+    return True
+
+
+async def _vision_messages(
+    system_prompt: str, prompt: str, image: ImageUpload
+) -> list[dict]:
+    """Downscale the photo off the event loop and build the vision request."""
+    jpeg = await prepare_image(image.file)
+    try:
+        base64_image = b64encode_stream(jpeg)
+    finally:
+        jpeg.close()
+    return [
+        {"role": "system", "content": system_prompt},
+        {
+            "role": "user",
+            "content": [
+                {"type": "text", "text": prompt},
+                {
+                    "type": "image_url",
+                    "image_url": {
+                        "url": f"data:image/jpeg;base64,{base64_image}"
                     },
-                ],
-            },
-        ],
-        max_tokens=1000,
-    )
+                },
+            ],
+        },
+    ]
 
-    return json.loads(response.choices[0].message.content)
 
+# (cache key, cache kind, coroutine factory building the chat messages)
+AnalysisRequest = tuple[str, str, Callable[[], Awaitable[list[dict]]]]
 
-async def analyze_food_photo_with_text(
-    image_bytes: bytes, description: str, user_goal: str
-) -> dict:
-    """Send food photo + text description to OpenAI Vision for stronger analysis."""
-    base64_image = base64.b64encode(image_bytes).decode("utf-8")
+
+def _photo_request(image: ImageUpload, user_goal: str) -> AnalysisRequest:
+    cache_key = ai_cache.make_key("photo", PROMPT_VERSION, user_goal, image.sha256)
     system_prompt = SYSTEM_PROMPTS.get(user_goal, SYSTEM_PROMPTS["performance"])
-    prompt = PHOTO_TEXT_ANALYSIS_PROMPT.format(description=description)
 
-    response = await _get_client().chat.completions.create(
-        model=settings.OPENAI_MODEL,
-        response_format={"type": "json_object"},
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {
-                "role": "user",
-                "content": [
-                    {"type": "text", "text": prompt},
-                    {
-                        "type": "image_url",
-                        "image_url": {
-                            "url": f"data:image/jpeg;base64,{base64_image}"
-                        },
-                    },
-                ],
-            },
-        ],
-        max_tokens=1000,
+    async def build_messages() -> list[dict]:
+        return await _vision_messages(system_prompt, PHOTO_ANALYSIS_PROMPT, image)
+
+    return cache_key, "photo", build_messages
+
+
+def _photo_text_request(
+    image: ImageUpload, description: str, user_goal: str
+) -> AnalysisRequest:
+    cache_key = ai_cache.make_key(
+        "photo_text", PROMPT_VERSION, user_goal, image.sha256, description.strip()
     )
+    system_prompt = SYSTEM_PROMPTS.get(user_goal, SYSTEM_PROMPTS["performance"])
+    prompt = PHOTO_TEXT_ANALYSIS_PROMPT.replace("{description}", description)
 
-    return json.loads(response.choices[0].message.content)
+    async def build_messages() -> list[dict]:
+        return await _vision_messages(system_prompt, prompt, image)
 
+    return cache_key, "photo_text", build_messages
 
-async def analyze_food_text(description: str, user_goal: str) -> dict:
-    """Analyze food from a text description, return structured analysis."""
+
+def _text_request(description: str, user_goal: str) -> AnalysisRequest:
+    cache_key = ai_cache.make_key(
+        "text", PROMPT_VERSION, user_goal, canonicalize_description(description)
+    )
     system_prompt = SYSTEM_PROMPTS.get(user_goal, SYSTEM_PROMPTS["performance"])
-    prompt = TEXT_ANALYSIS_PROMPT.format(description=description)
+    prompt = TEXT_ANALYSIS_PROMPT.replace("{description}", description)
 
-    response = await _get_client().chat.completions.create(
-        model=settings.OPENAI_MODEL,
-        response_format={"type": "json_object"},
-        messages=[
+    async def build_messages() -> list[dict]:
+        return [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": prompt},
-        ],
-        max_tokens=1000,
+        ]
+
+    return cache_key, "text", build_messages
+
+
+async def _analyze(
+    cache_key: str, kind: str, build_messages: Callable[[], Awaitable[list[dict]]]
+) -> dict:
+    """Serve from cache, else run one model call per key however many callers ask at once."""
+    cached = await ai_cache.get_cached(cache_key, kind)
+    if cached is not None:
+        return cached
+
+    # Build the request (reading the upload) in this caller, not in the shared
+    # call: if this request is cancelled and its file closed, the callers
+    # coalesced onto the flight must not fail with it
+    messages = None if cache_key in _inflight else await build_messages()
+
+    async def call() -> dict:
+        async with (
+            ai_ledger.record(f"food.{kind}", settings.OPENAI_MODEL, messages) as entry,
+            concurrency.guard("food"),
+        ):
+            response = await openai_client.get_client().chat.completions.create(
+                model=settings.OPENAI_MODEL,
+                response_format={"type": "json_object"},
+                messages=messages,
+                max_tokens=1000,
+                timeout=openai_client.timeout_for("food"),
+            )
+            entry.set_usage(response.usage)
+            analysis = json.loads(response.choices[0].message.content)
+        if _is_cacheable(analysis):
+            await ai_cache.store(cache_key, kind, analysis)
+        return analysis
+
+    try:
+        analysis = await _inflight.do(
+            cache_key, call, timeout=settings.AI_INFLIGHT_TIMEOUT_SECONDS
+        )
+    except asyncio.TimeoutError:
+        raise UpstreamTimeoutError("AI analysis timed out. Please try again.")
+
+    # Waiters share one result object; hand each caller its own copy
+    return copy.deepcopy(analysis)
+
+
+async def _open_stream(
+    cache_key: str, kind: str, build_messages: Callable[[], Awaitable[list[dict]]]
+) -> AsyncIterator[tuple[str, dict]]:
+    """Check the cache and build the request now, so input errors surface
+    before the response starts; the model output itself is streamed lazily."""
+    cached = await ai_cache.get_cached(cache_key, kind)
+    if cached is not None:
+        return _replay_cached(cached)
+
+    messages = await build_messages()
+    return _stream_completion(cache_key, kind, messages)
+
+
+async def _replay_cached(analysis: dict) -> AsyncIterator[tuple[str, dict]]:
+    for item in analysis.get("items", []):
+        yield "item", item
+    yield "result", analysis
+
+
+async def _stream_completion(
+    cache_key: str, kind: str, messages: list[dict]
+) -> AsyncIterator[tuple[str, dict]]:
+    """Yield ("item", item) as each food item is parsed, then ("result", analysis)."""
+    parser = ArrayItemParser("items")
+    async with (
+        ai_ledger.record(f"food.{kind}", settings.OPENAI_MODEL, messages, stream=True) as entry,
+        concurrency.guard("food"),
+    ):
+        stream = await openai_client.get_client().chat.completions.create(
+            model=settings.OPENAI_MODEL,
+            response_format={"type": "json_object"},
+            messages=messages,
+            max_tokens=1000,
+            stream=True,
+            stream_options={"include_usage": True},
+            timeout=openai_client.timeout_for("food"),
+        )
+
+        async for chunk in stream:
+            # With include_usage the last chunk carries usage and no choices
+            entry.set_usage(chunk.usage)
+            if not chunk.choices or not chunk.choices[0].delta.content:
+                continue
+            for item in parser.feed(chunk.choices[0].delta.content):
+                yield "item", item
+
+        analysis = json.loads(parser.text)
+    if _is_cacheable(analysis):
+        await ai_cache.store(cache_key, kind, analysis)
+    yield "result", analysis
+
+
+async def analyze_food_photo(image: ImageUpload, user_goal: str) -> dict:
+    """Send food photo to OpenAI Vision, return structured analysis."""
+    return await _analyze(*_photo_request(image, user_goal))
+
+
+async def analyze_food_photo_with_text(
+    image: ImageUpload, description: str, user_goal: str
+) -> dict:
+    """Send food photo + text description to OpenAI Vision for stronger analysis."""
+    return await _analyze(*_photo_text_request(image, description, user_goal))
+
+
+def _resolve_locally(description: str) -> dict | None:
+    """The analysis from the bundled nutrition table, if it knows every food."""
+    if not settings.NUTRITION_INDEX_ENABLED:
+        return None
+    items = nutrition_index.resolve_description(description)
+    if items is None:
+        return None
+    return _merge_analyses([{
+        "items": items,
+        "total_calories": sum(item["calories"] for item in items),
+    }])
+
+
+async def analyze_food_text(description: str, user_goal: str) -> dict:
+    """Analyze food from a text description, return structured analysis.
+
+    Descriptions made only of common foods are answered from the local
+    nutrition table; anything else goes to the model as written.
+    """
+    local = _resolve_locally(description)
+    if local is not None:
+        return local
+    return await _analyze(*_text_request(description, user_goal))
+
+
+HEALTH_ORDER = ("healthy", "average", "unhealthy")
+
+
+def _batch_failure_detail(exc: BaseException) -> str:
+    if isinstance(exc, HTTPException):
+        return str(exc.detail)
+    if isinstance(exc, OpenAIError):
+        return "AI analysis is unavailable. Please try again."
+    return "AI returned an invalid analysis. Please try again."
+
+
+def _merge_analyses(analyses: list[dict]) -> dict:
+    items = []
+    notes = []
+    ratings = []
+    tip = None
+    for analysis in analyses:
+        items.extend(analysis.get("items", []))
+        if analysis.get("meal_notes"):
+            notes.append(analysis["meal_notes"])
+        if analysis.get("health_evaluation") in HEALTH_ORDER:
+            ratings.append(analysis["health_evaluation"])
+        tip = tip or analysis.get("health_tip")
+
+    return {
+        "items": items,
+        "total_calories": sum(float(a.get("total_calories") or 0) for a in analyses),
+        "meal_notes": " ".join(notes),
+        # A meal is only as healthy as its least healthy part
+        "health_evaluation": max(ratings, key=HEALTH_ORDER.index) if ratings else None,
+        "health_tip": tip,
+    }
+
+
+async def analyze_food_batch(
+    photos: list[tuple[ImageUpload, str | None]], user_goal: str
+) -> dict:
+    """Analyse several photos of one meal and merge them into one analysis.
+
+    Each photo goes through the regular per-photo path (so it is cached and
+    coalesced on its own), at most AI_BATCH_CONCURRENCY at a time. Photos
+    that fail are reported in "failures"; the batch only fails if all do.
+    """
+    semaphore = asyncio.Semaphore(settings.AI_BATCH_CONCURRENCY)
+
+    async def analyze_one(image: ImageUpload, description: str | None) -> dict:
+        async with semaphore:
+            if description:
+                analysis = await analyze_food_photo_with_text(image, description, user_goal)
+            else:
+                analysis = await analyze_food_photo(image, user_goal)
+        AIAnalysisResponse(**analysis)
+        return analysis
+
+    results = await asyncio.gather(
+        *(analyze_one(image, description) for image, description in photos),
+        return_exceptions=True,
     )
 
-    return json.loads(response.choices[0].message.content)
+    analyses = []
+    failures = []
+    for index, result in enumerate(results):
+        if isinstance(result, (HTTPException, OpenAIError, ValueError, TypeError)):
+            failures.append((index, result))
+        elif isinstance(result, BaseException):
+            raise result
+        else:
+            analyses.append(result)
+
+    if not analyses:
+        raise failures[0][1]
+
+    merged = _merge_analyses(analyses)
+    merged["failures"] = [
+        {"photo_index": index, "detail": _batch_failure_detail(exc)}
+        for index, exc in failures
+    ]
+    return merged
+
+
+async def stream_food_photo(
+    image: ImageUpload, user_goal: str
+) -> AsyncIterator[tuple[str, dict]]:
+    """Streaming variant of analyze_food_photo."""
+    return await _open_stream(*_photo_request(image, user_goal))
+
+
+async def stream_food_photo_with_text(
+    image: ImageUpload, description: str, user_goal: str
+) -> AsyncIterator[tuple[str, dict]]:
+    """Streaming variant of analyze_food_photo_with_text."""
+    return await _open_stream(*_photo_text_request(image, description, user_goal))
+
+
+async def stream_food_text(
+    description: str, user_goal: str
+) -> AsyncIterator[tuple[str, dict]]:
+    """Streaming variant of analyze_food_text."""
+    local = _resolve_locally(description)
+    if local is not None:
+        return _replay_cached(local)
+    return await _open_stream(*_text_request(description, user_goal))
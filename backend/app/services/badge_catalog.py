@@ -0,0 +1,149 @@
+"""Process-wide badge catalog and the declarative rules that award badges.
+
+The catalog is built once from BADGE_DEFINITIONS plus the seeded badge ids
+and never changes afterwards. Each rule is a threshold on one UserStats
+counter; rules are indexed by counter and sorted by threshold, so finding
+the badges a counter change reaches is a bisect.
+"""
+import hashlib
+import json
+import logging
+from bisect import bisect_right
+from dataclasses import asdict, dataclass
+from types import MappingProxyType
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.gamification import Badge
+
+logger = logging.getLogger(__name__)
+
+BADGE_DEFINITIONS = [
+    # Logging badges
+    {"key": "first_log", "name": "First Bite", "description": "Log your first meal", "icon": "utensils", "category": "logging", "tier": 1, "xp_reward": 10},
+    {"key": "log_10", "name": "Consistent Logger", "description": "Log 10 meals", "icon": "clipboard-list", "category": "logging", "tier": 1, "xp_reward": 25},
+    {"key": "log_50", "name": "Dedicated Tracker", "description": "Log 50 meals", "icon": "clipboard-check", "category": "logging", "tier": 2, "xp_reward": 50},
+    {"key": "log_100", "name": "Nutrition Master", "description": "Log 100 meals", "icon": "award", "category": "logging", "tier": 3, "xp_reward": 100},
+    # Photo badges
+    {"key": "first_photo", "name": "Snap & Track", "description": "Use AI photo logging for the first time", "icon": "camera", "category": "photo", "tier": 1, "xp_reward": 15},
+    {"key": "photo_25", "name": "Shutterbug", "description": "Log 25 meals with photos", "icon": "image", "category": "photo", "tier": 2, "xp_reward": 50},
+    # Streak badges
+    {"key": "streak_3", "name": "On a Roll", "description": "3-day logging streak", "icon": "flame", "category": "streak", "tier": 1, "xp_reward": 15},
+    {"key": "streak_7", "name": "Week Warrior", "description": "7-day logging streak", "icon": "flame", "category": "streak", "tier": 2, "xp_reward": 30},
+    {"key": "streak_14", "name": "Two-Week Titan", "description": "14-day logging streak", "icon": "flame", "category": "streak", "tier": 2, "xp_reward": 50},
+    {"key": "streak_30", "name": "Monthly Machine", "description": "30-day logging streak", "icon": "flame", "category": "streak", "tier": 3, "xp_reward": 100},
+    {"key": "streak_100", "name": "Century Streak", "description": "100-day logging streak", "icon": "zap", "category": "streak", "tier": 4, "xp_reward": 250},
+    # Target badges
+    {"key": "on_target_1", "name": "Bullseye", "description": "Hit your calorie target for 1 day", "icon": "target", "category": "target", "tier": 1, "xp_reward": 10},
+    {"key": "on_target_7", "name": "Perfect Week", "description": "Hit your calorie target 7 days in a row", "icon": "trophy", "category": "target", "tier": 2, "xp_reward": 50},
+    {"key": "on_target_30", "name": "Laser Focused", "description": "Hit your calorie target 30 days total", "icon": "medal", "category": "target", "tier": 3, "xp_reward": 100},
+    # Running badges
+    {"key": "first_run", "name": "First Steps", "description": "Complete your first training session", "icon": "footprints", "category": "running", "tier": 1, "xp_reward": 15},
+    {"key": "run_50k", "name": "50K Club", "description": "Run a total of 50km", "icon": "map-pin", "category": "running", "tier": 2, "xp_reward": 50},
+    {"key": "run_100k", "name": "100K Achiever", "description": "Run a total of 100km", "icon": "mountain", "category": "running", "tier": 3, "xp_reward": 100},
+    # Race badges
+    {"key": "first_race", "name": "Race Ready", "description": "Add your first race", "icon": "flag", "category": "race", "tier": 1, "xp_reward": 15},
+    {"key": "race_finisher", "name": "Finisher", "description": "Complete a race", "icon": "medal", "category": "race", "tier": 2, "xp_reward": 50},
+]
+
+# badge key -> (UserStats counter, threshold)
+BADGE_RULES = {
+    "first_log": ("total_logs", 1),
+    "log_10": ("total_logs", 10),
+    "log_50": ("total_logs", 50),
+    "log_100": ("total_logs", 100),
+    "first_photo": ("total_photos", 1),
+    "photo_25": ("total_photos", 25),
+    "streak_3": ("current_streak", 3),
+    "streak_7": ("current_streak", 7),
+    "streak_14": ("current_streak", 14),
+    "streak_30": ("current_streak", 30),
+    "streak_100": ("current_streak", 100),
+    "on_target_1": ("days_on_target", 1),
+    "on_target_7": ("perfect_weeks", 1),
+    "on_target_30": ("days_on_target", 30),
+    "first_run": ("sessions_completed", 1),
+    "run_50k": ("distance_km", 50),
+    "run_100k": ("distance_km", 100),
+    "first_race": ("races_added", 1),
+    "race_finisher": ("races_completed", 1),
+}
+
+COUNTERS = tuple(sorted({counter for counter, _ in BADGE_RULES.values()}))
+
+CATALOG_VERSION = hashlib.sha256(
+    json.dumps([BADGE_DEFINITIONS, BADGE_RULES], sort_keys=True).encode("utf-8")
+).hexdigest()[:12]
+
+
+@dataclass(frozen=True)
+class BadgeDef:
+    id: str
+    key: str
+    name: str
+    description: str
+    icon: str
+    category: str
+    tier: int
+    xp_reward: int
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+class BadgeCatalog:
+    def __init__(self, badges: list[BadgeDef], version: str):
+        self.version = version
+        self.badges = tuple(badges)
+        self.by_key = MappingProxyType({b.key: b for b in badges})
+        self.by_id = MappingProxyType({b.id: b for b in badges})
+
+        rules: dict[str, list[tuple[float, str]]] = {}
+        for key, (counter, threshold) in BADGE_RULES.items():
+            if key in self.by_key:
+                rules.setdefault(counter, []).append((threshold, key))
+        self._thresholds = MappingProxyType({
+            counter: tuple(t for t, _ in sorted(entries)) for counter, entries in rules.items()
+        })
+        self._keys = MappingProxyType({
+            counter: tuple(k for _, k in sorted(entries)) for counter, entries in rules.items()
+        })
+
+    def reached(self, counter: str, value: float, above: float | None = None) -> tuple[str, ...]:
+        """Badges on `counter` with above < threshold <= value (all up to
+        value when above is None)."""
+        thresholds = self._thresholds.get(counter, ())
+        low = 0 if above is None else bisect_right(thresholds, above)
+        return self._keys.get(counter, ())[low:bisect_right(thresholds, value)]
+
+    def candidates(self, before: dict | None, after: dict) -> list[BadgeDef]:
+        """Badges whose thresholds the change from `before` to `after` crossed;
+        with before None, every badge the `after` counters satisfy."""
+        keys = []
+        for counter, value in after.items():
+            if before is None:
+                keys.extend(self.reached(counter, value))
+            elif value > before.get(counter, 0):
+                keys.extend(self.reached(counter, value, above=before.get(counter, 0)))
+        return [self.by_key[key] for key in keys]
+
+
+_catalog: BadgeCatalog | None = None
+
+
+async def load_catalog(db: AsyncSession) -> BadgeCatalog:
+    """(Re)build the catalog from the definitions and the seeded badge rows."""
+    global _catalog
+    result = await db.execute(select(Badge.key, Badge.id))
+    ids = dict(result.all())
+    badges = [
+        BadgeDef(id=ids[d["key"]], **d) for d in BADGE_DEFINITIONS if d["key"] in ids
+    ]
+    _catalog = BadgeCatalog(badges, CATALOG_VERSION)
+    logger.info("Loaded badge catalog %s (%d badges)", CATALOG_VERSION, len(badges))
+    return _catalog
+
+
+async def get_catalog(db: AsyncSession) -> BadgeCatalog:
+    return _catalog if _catalog is not None else await load_catalog(db)
@@ -1,27 +1,51 @@
 from datetime import date, datetime, timezone
 
-from sqlalchemy import select, func
+from sqlalchemy import select, func, update, case, and_, or_
+from sqlalchemy.dialects.mysql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import selectinload, load_only
+from sqlalchemy.orm.util import identity_key
 
 from app.core.exceptions import NotFoundError
-from app.models.calorie_log import CalorieLog
+from app.models.calorie_log import CalorieLog, CalorieLogMeal
 from app.models.food_entry import FoodEntry
 from app.models.user import UserProfile
+from app.utils.cursor import decode_cursor, encode_cursor
+
+# What FoodEntryResponse renders; lists load only these
+ENTRY_LIST_COLUMNS = (
+    FoodEntry.id, FoodEntry.meal_type, FoodEntry.source, FoodEntry.food_name,
+    FoodEntry.portion_desc, FoodEntry.calories, FoodEntry.protein_g,
+    FoodEntry.carbs_g, FoodEntry.fat_g, FoodEntry.fiber_g, FoodEntry.photo_url,
+    FoodEntry.ai_confidence, FoodEntry.is_favorite, FoodEntry.created_at,
+)
+
+# Columns of CalorieLogMeal; all but entry_count are FoodEntry fields too
+MEAL_TOTALS = ("entry_count", "calories", "protein_g", "carbs_g", "fat_g", "fiber_g")
 
 
 async def get_or_create_daily_log(
-    db: AsyncSession, user_id: str, log_date: date | None = None
+    db: AsyncSession,
+    user_id: str,
+    log_date: date | None = None,
+    with_entries: bool = False,
 ) -> CalorieLog:
-    """Get today's calorie log or create one from the user's profile target."""
+    """Get today's calorie log or create one from the user's profile target.
+
+    Entries are only loaded when asked for; writers just need the log id.
+    """
     if log_date is None:
         log_date = date.today()
 
-    result = await db.execute(
-        select(CalorieLog)
-        .options(selectinload(CalorieLog.entries))
-        .where(CalorieLog.user_id == user_id, CalorieLog.log_date == log_date)
+    query = select(CalorieLog).where(
+        CalorieLog.user_id == user_id, CalorieLog.log_date == log_date
     )
+    if with_entries:
+        query = query.options(
+            selectinload(CalorieLog.entries)
+            .load_only(*ENTRY_LIST_COLUMNS, raiseload=True)
+        )
+    result = await db.execute(query)
     log = result.scalar_one_or_none()
 
     if log:
@@ -43,25 +67,63 @@ async def get_or_create_daily_log(
     )
     db.add(log)
     await db.flush()
-    # Load entries relationship (empty for new log)
-    await db.refresh(log, ["entries"])
+    if with_entries:
+        # Load entries relationship (empty for new log)
+        await db.refresh(log, ["entries"])
     return log
 
 
 async def get_log_by_date(
-    db: AsyncSession, user_id: str, log_date: date
+    db: AsyncSession, user_id: str, log_date: date, with_entries: bool = True
 ) -> CalorieLog:
-    result = await db.execute(
-        select(CalorieLog)
-        .options(selectinload(CalorieLog.entries))
-        .where(CalorieLog.user_id == user_id, CalorieLog.log_date == log_date)
+    query = select(CalorieLog).where(
+        CalorieLog.user_id == user_id, CalorieLog.log_date == log_date
     )
+    if with_entries:
+        query = query.options(
+            selectinload(CalorieLog.entries)
+            .load_only(*ENTRY_LIST_COLUMNS, raiseload=True)
+        )
+    result = await db.execute(query)
     log = result.scalar_one_or_none()
     if not log:
         raise NotFoundError(f"No log found for {log_date}")
     return log
 
 
+async def get_entries_page(
+    db: AsyncSession,
+    user_id: str,
+    log_date: date,
+    limit: int = 20,
+    cursor: str | None = None,
+) -> tuple[list[FoodEntry], str | None]:
+    """One page of a day's entries in logging order, and the cursor of the
+    next page (None on the last). Keyset-paginated on (created_at, id)."""
+    query = (
+        select(FoodEntry)
+        .options(load_only(*ENTRY_LIST_COLUMNS, raiseload=True))
+        .join(CalorieLog, CalorieLog.id == FoodEntry.calorie_log_id)
+        .where(CalorieLog.user_id == user_id, CalorieLog.log_date == log_date)
+        .order_by(FoodEntry.created_at, FoodEntry.id)
+        .limit(limit + 1)
+    )
+    if cursor:
+        after_created, after_id = decode_cursor(cursor)
+        query = query.where(
+            or_(
+                FoodEntry.created_at > after_created,
+                and_(FoodEntry.created_at == after_created, FoodEntry.id > after_id),
+            )
+        )
+    result = await db.execute(query)
+    entries = list(result.scalars().all())
+    if len(entries) <= limit:
+        return entries, None
+    entries = entries[:limit]
+    return entries, encode_cursor(entries[-1].created_at, entries[-1].id)
+
+
 async def get_logs_in_range(
     db: AsyncSession, user_id: str, start: date, end: date
 ) -> list[CalorieLog]:
@@ -77,25 +139,159 @@ async def get_logs_in_range(
     return list(result.scalars().all())
 
 
-async def update_consumed_total(db: AsyncSession, calorie_log: CalorieLog) -> None:
-    """Recalculate consumed_kcal from all food entries."""
+def _status_expression():
+    """over above target, near_limit from 85%, under below 50% (when
+    anything was eaten), otherwise normal."""
+    consumed, target = CalorieLog.consumed_kcal, CalorieLog.target_kcal
+    return case(
+        (and_(target > 0, consumed > target), "over"),
+        (and_(target > 0, consumed >= target * 0.85), "near_limit"),
+        (and_(consumed > 0, or_(target <= 0, consumed < target * 0.5)), "under"),
+        else_="normal",
+    )
+
+
+async def apply_consumed_delta(db: AsyncSession, calorie_log_id: str, delta: float) -> None:
+    """Add `delta` kcal to a log and recompute its status in one atomic UPDATE.
+
+    MySQL evaluates single-table SET clauses left to right, so the status
+    CASE sees the new consumed_kcal. A loaded CalorieLog is expired so the
+    next read picks up the new values.
+    """
+    if not delta:
+        return
+    await db.execute(
+        update(CalorieLog)
+        .where(CalorieLog.id == calorie_log_id)
+        .ordered_values(
+            (CalorieLog.consumed_kcal, func.greatest(CalorieLog.consumed_kcal + delta, 0)),
+            (CalorieLog.status, _status_expression()),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    log = db.identity_map.get(identity_key(CalorieLog, calorie_log_id))
+    if log is not None:
+        db.expire(log, ["consumed_kcal", "status", "updated_at"])
+
+
+async def reconcile_consumed_totals(db: AsyncSession, since: date) -> int:
+    """Repair logs from `since` on whose consumed_kcal drifted from the sum
+    of their entries. Returns how many were repaired.
+
+    The drift is read in one snapshot and applied as a delta, so writes
+    committed in between are not overwritten.
+    """
+    totals = (
+        select(
+            FoodEntry.calorie_log_id,
+            func.sum(FoodEntry.calories).label("total"),
+        )
+        .join(CalorieLog, CalorieLog.id == FoodEntry.calorie_log_id)
+        .where(CalorieLog.log_date >= since)
+        .group_by(FoodEntry.calorie_log_id)
+        .subquery()
+    )
+    actual = func.coalesce(totals.c.total, 0)
+    result = await db.execute(
+        select(CalorieLog.id, actual - CalorieLog.consumed_kcal)
+        .outerjoin(totals, totals.c.calorie_log_id == CalorieLog.id)
+        .where(CalorieLog.log_date >= since, CalorieLog.consumed_kcal != actual)
+    )
+    drifted = result.all()
+    for log_id, drift in drifted:
+        await apply_consumed_delta(db, log_id, float(drift))
+    return len(drifted)
+
+
+def meal_deltas(entries, sign: int = 1, into: dict | None = None) -> dict[str, dict]:
+    """Change in per-meal totals from adding (sign=1) or removing (sign=-1)
+    entries, accumulated into `into` when given."""
+    deltas = {} if into is None else into
+    for entry in entries:
+        delta = deltas.setdefault(entry.meal_type, dict.fromkeys(MEAL_TOTALS, 0))
+        delta["entry_count"] += sign
+        for field in MEAL_TOTALS[1:]:
+            delta[field] += sign * float(getattr(entry, field) or 0)
+    return deltas
+
+
+async def _upsert_meal_deltas(
+    db: AsyncSession, calorie_log_id: str, deltas: dict[str, dict]
+) -> None:
+    stmt = insert(CalorieLogMeal).values([
+        {"calorie_log_id": calorie_log_id, "meal_type": meal_type, **delta}
+        for meal_type, delta in deltas.items()
+    ])
+    stmt = stmt.on_duplicate_key_update(**{
+        field: getattr(CalorieLogMeal, field) + getattr(stmt.inserted, field)
+        for field in MEAL_TOTALS
+    })
+    await db.execute(stmt)
+
+
+async def apply_meal_deltas(
+    db: AsyncSession, calorie_log_id: str, deltas: dict[str, dict]
+) -> None:
+    """Apply meal_deltas() to the log's meal subtotals and consumed_kcal."""
+    deltas = {meal: delta for meal, delta in deltas.items() if any(delta.values())}
+    if not deltas:
+        return
+    await _upsert_meal_deltas(db, calorie_log_id, deltas)
+    await apply_consumed_delta(
+        db, calorie_log_id, sum(delta["calories"] for delta in deltas.values())
+    )
+
+
+async def reconcile_meal_totals(db: AsyncSession, since: date) -> int:
+    """Repair meal subtotals from `since` on that drifted from their entries.
+    Returns how many were repaired.
+
+    Both reads see the transaction's snapshot; the difference is applied
+    as a delta, like reconcile_consumed_totals.
+    """
+    result = await db.execute(
+        select(
+            FoodEntry.calorie_log_id,
+            FoodEntry.meal_type,
+            func.count(),
+            *(func.coalesce(func.sum(getattr(FoodEntry, f)), 0) for f in MEAL_TOTALS[1:]),
+        )
+        .join(CalorieLog, CalorieLog.id == FoodEntry.calorie_log_id)
+        .where(CalorieLog.log_date >= since)
+        .group_by(FoodEntry.calorie_log_id, FoodEntry.meal_type)
+    )
+    actual = {(row[0], row[1]): row[2:] for row in result}
     result = await db.execute(
-        select(func.coalesce(func.sum(FoodEntry.calories), 0)).where(
-            FoodEntry.calorie_log_id == calorie_log.id
+        select(
+            CalorieLogMeal.calorie_log_id,
+            CalorieLogMeal.meal_type,
+            *(getattr(CalorieLogMeal, f) for f in MEAL_TOTALS),
         )
+        .join(CalorieLog, CalorieLog.id == CalorieLogMeal.calorie_log_id)
+        .where(CalorieLog.log_date >= since)
+    )
+    stored = {(row[0], row[1]): row[2:] for row in result}
+
+    zero = (0,) * len(MEAL_TOTALS)
+    repaired = 0
+    for log_id, meal_type in actual.keys() | stored.keys():
+        want = actual.get((log_id, meal_type), zero)
+        have = stored.get((log_id, meal_type), zero)
+        delta = {f: round(float(w) - float(h), 2) for f, w, h in zip(MEAL_TOTALS, want, have)}
+        if any(delta.values()):
+            await _upsert_meal_deltas(db, log_id, {meal_type: delta})
+            repaired += 1
+    return repaired
+
+
+async def get_daily_summary(
+    db: AsyncSession, user_id: str, log_date: date | None = None
+) -> tuple[CalorieLog, list[CalorieLogMeal]]:
+    """The day's log and its meal subtotals, without loading any entries."""
+    log = await get_or_create_daily_log(db, user_id, log_date)
+    result = await db.execute(
+        select(CalorieLogMeal)
+        .where(CalorieLogMeal.calorie_log_id == log.id)
+        .execution_options(populate_existing=True)
     )
-    total = float(result.scalar())
-    calorie_log.consumed_kcal = total
-
-    # Update status
-    target = float(calorie_log.target_kcal)
-    ratio = total / target if target > 0 else 0
-
-    if ratio > 1.0:
-        calorie_log.status = "over"
-    elif ratio >= 0.85:
-        calorie_log.status = "near_limit"
-    elif ratio < 0.5 and total > 0:
-        calorie_log.status = "under"
-    else:
-        calorie_log.status = "normal"
+    return log, list(result.scalars().all())
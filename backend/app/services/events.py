@@ -0,0 +1,239 @@
+"""In-process domain events, delivered through a durable outbox.
+
+emit() writes the event to event_outbox in the caller's transaction, so it
+exists exactly when the change it describes does, and the request returns
+without waiting for subscribers. After the commit the dispatcher wakes,
+leases a batch of pending events and hands each user's events to the
+subscribers in one transaction that also deletes them.
+
+Delivery is at least once: a failed batch is retried with backoff, and a
+dispatcher that dies mid-batch leaves its lease to expire.
+"""
+import asyncio
+import dataclasses
+import logging
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from itertools import groupby
+from typing import Awaitable, Callable
+
+from sqlalchemy import delete, select, update
+from sqlalchemy import event as sa_event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.config import get_settings
+from app.database import AsyncSessionLocal
+from app.models.outbox import OutboxEvent
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+RETRY_BASE_SECONDS = 5
+RETRY_MAX_SECONDS = 300
+
+
+@dataclass(frozen=True)
+class DomainEvent:
+    user_id: str
+
+
+@dataclass(frozen=True)
+class FoodLogged(DomainEvent):
+    logs: int
+    photos: int = 0
+    day: date = field(default_factory=date.today)
+
+
+@dataclass(frozen=True)
+class SessionCompleted(DomainEvent):
+    """A session's completion or credited distance changed; sessions is -1
+    when it is marked not completed again."""
+    sessions: int
+    distance_km: float
+
+
+@dataclass(frozen=True)
+class RaceAdded(DomainEvent):
+    completed: bool = False
+
+
+@dataclass(frozen=True)
+class RaceRemoved(DomainEvent):
+    completed: bool = False
+
+
+@dataclass(frozen=True)
+class RaceStatusChanged(DomainEvent):
+    """completed is +1 when a race became completed, -1 when it no longer is."""
+    completed: int
+
+
+EVENT_TYPES = {
+    cls.__name__: cls
+    for cls in (FoodLogged, SessionCompleted, RaceAdded, RaceRemoved, RaceStatusChanged)
+}
+
+# A subscriber gets one user's events of the types it subscribed to, oldest
+# first, and runs in the transaction that removes them from the outbox
+Subscriber = Callable[[AsyncSession, str, list[DomainEvent]], Awaitable[None]]
+
+_subscribers: list[tuple[Subscriber, tuple[type[DomainEvent], ...]]] = []
+_task: asyncio.Task | None = None
+_wakeup = asyncio.Event()
+
+
+def subscribe(*event_types: type[DomainEvent]) -> Callable[[Subscriber], Subscriber]:
+    def decorator(fn: Subscriber) -> Subscriber:
+        _subscribers.append((fn, event_types))
+        return fn
+    return decorator
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _to_payload(event: DomainEvent) -> dict:
+    data = dataclasses.asdict(event)
+    del data["user_id"]
+    return {k: v.isoformat() if isinstance(v, date) else v for k, v in data.items()}
+
+
+def _from_row(row: OutboxEvent) -> DomainEvent:
+    cls = EVENT_TYPES[row.name]
+    values = dict(row.payload)
+    for f in dataclasses.fields(cls):
+        if f.type is date and isinstance(values.get(f.name), str):
+            values[f.name] = date.fromisoformat(values[f.name])
+    return cls(user_id=row.user_id, **values)
+
+
+# --- API side ---
+def emit(db: AsyncSession, event: DomainEvent) -> None:
+    """Queue an event in the caller's transaction; it is dispatched once
+    that transaction commits."""
+    db.add(OutboxEvent(
+        user_id=event.user_id,
+        name=type(event).__name__,
+        payload=_to_payload(event),
+        status="pending",
+        attempts=0,
+    ))
+    db.info["events_emitted"] = True
+
+
+@sa_event.listens_for(Session, "after_commit")
+def _after_commit(session: Session) -> None:
+    if session.info.pop("events_emitted", False):
+        notify_dispatcher()
+
+
+@sa_event.listens_for(Session, "after_rollback")
+def _after_rollback(session: Session) -> None:
+    session.info.pop("events_emitted", None)
+
+
+def notify_dispatcher() -> None:
+    _wakeup.set()
+
+
+# --- Dispatcher side ---
+def _retry_delay(attempts: int) -> float:
+    return min(RETRY_BASE_SECONDS * 2 ** (attempts - 1), RETRY_MAX_SECONDS)
+
+
+async def _claim() -> list[OutboxEvent]:
+    """Lease the next batch of due events. SKIP LOCKED lets several
+    processes dispatch from the same table."""
+    now = _now()
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(OutboxEvent)
+            .where(OutboxEvent.status == "pending", OutboxEvent.available_at <= now)
+            .order_by(OutboxEvent.id)
+            .limit(settings.EVENT_BATCH_SIZE)
+            .with_for_update(skip_locked=True)
+        )
+        rows = list(result.scalars().all())
+        for row in rows:
+            row.attempts += 1
+            row.available_at = now + timedelta(seconds=settings.EVENT_LEASE_SECONDS)
+        await db.commit()
+    return rows
+
+
+async def _deliver(user_id: str, rows: list[OutboxEvent]) -> None:
+    events = [_from_row(row) for row in rows]
+    ids = [row.id for row in rows]
+    async with AsyncSessionLocal() as db:
+        for subscriber, event_types in _subscribers:
+            matching = [e for e in events if isinstance(e, event_types)]
+            if matching:
+                await subscriber(db, user_id, matching)
+        result = await db.execute(delete(OutboxEvent).where(OutboxEvent.id.in_(ids)))
+        if result.rowcount != len(ids):
+            # Our lease ran out and another dispatcher took these over
+            await db.rollback()
+            return
+        await db.commit()
+
+
+async def _fail(rows: list[OutboxEvent], exc: Exception) -> None:
+    now = _now()
+    error = repr(exc)[:1000]
+    async with AsyncSessionLocal() as db:
+        for row in rows:
+            if row.attempts >= settings.EVENT_MAX_ATTEMPTS:
+                values = {"status": "dead", "error": error}
+                logger.error("Event %s (%s) failed for good: %s", row.id, row.name, error)
+            else:
+                values = {"available_at": now + timedelta(seconds=_retry_delay(row.attempts)),
+                          "error": error}
+            await db.execute(update(OutboxEvent).where(OutboxEvent.id == row.id).values(**values))
+        await db.commit()
+
+
+async def dispatch_once() -> int:
+    """Deliver one batch of due events; returns how many were claimed."""
+    rows = await _claim()
+    rows.sort(key=lambda row: (row.user_id, row.id))
+    for user_id, group in groupby(rows, key=lambda row: row.user_id):
+        group = list(group)
+        try:
+            await _deliver(user_id, group)
+        except Exception as exc:
+            logger.warning("Delivering %d events for user %s failed: %r", len(group), user_id, exc)
+            await _fail(group, exc)
+    return len(rows)
+
+
+async def _dispatch_loop() -> None:
+    while True:
+        try:
+            claimed = await dispatch_once()
+        except Exception:
+            logger.exception("Could not dispatch events")
+            claimed = 0
+        if claimed >= settings.EVENT_BATCH_SIZE:
+            continue  # backlog: keep draining
+
+        try:
+            await asyncio.wait_for(_wakeup.wait(), settings.EVENT_POLL_INTERVAL_SECONDS)
+        except TimeoutError:
+            pass
+        _wakeup.clear()
+
+
+def start_dispatcher() -> None:
+    global _task
+    if _task is None:
+        _task = asyncio.create_task(_dispatch_loop())
+
+
+async def stop_dispatcher() -> None:
+    global _task
+    if _task is not None:
+        _task.cancel()
+        await asyncio.gather(_task, return_exceptions=True)
+        _task = None
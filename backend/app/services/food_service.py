@@ -1,13 +1,23 @@
+import re
 from datetime import date
 
-from sqlalchemy import select, update
+from sqlalchemy import and_, func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.exceptions import NotFoundError
 from app.models.food_entry import FoodEntry
-from app.models.calorie_log import CalorieLog
+from app.models.food_usage import UserFoodUsage
 from app.schemas.food import ManualFoodEntry, FoodEntryUpdate, ConfirmAnalysisRequest
-from app.services.calorie_service import get_or_create_daily_log, update_consumed_total
+from app.services import ai_payloads, food_usage_service
+from app.services.food_usage_service import usage_key
+from app.services.calorie_service import (
+    get_or_create_daily_log,
+    meal_deltas,
+    apply_meal_deltas,
+)
+
+SEARCH_LIMIT = 20
+_SEARCH_TERMS = re.compile(r"\w+")
 
 
 async def add_manual_entry(
@@ -31,7 +41,8 @@ async def add_manual_entry(
     db.add(entry)
     await db.flush()
 
-    await update_consumed_total(db, log)
+    await food_usage_service.add_usage(db, user_id, [entry])
+    await apply_meal_deltas(db, log.id, meal_deltas([entry]))
     return entry
 
 
@@ -39,6 +50,8 @@ async def confirm_ai_analysis(
     db: AsyncSession, user_id: str, data: ConfirmAnalysisRequest
 ) -> list[FoodEntry]:
     log = await get_or_create_daily_log(db, user_id)
+    # Stored once for the whole meal, not copied into every item row
+    payload_id = await ai_payloads.store(db, data.ai_raw_response)
     entries = []
 
     for item in data.items:
@@ -56,13 +69,14 @@ async def confirm_ai_analysis(
             fiber_g=item.fiber_g,
             ai_confidence=item.confidence,
             photo_url=data.photo_url,
-            ai_raw_response=data.ai_raw_response,
+            ai_payload_id=payload_id,
         )
         db.add(entry)
         entries.append(entry)
 
     await db.flush()
-    await update_consumed_total(db, log)
+    await food_usage_service.add_usage(db, user_id, entries)
+    await apply_meal_deltas(db, log.id, meal_deltas(entries))
     return entries
 
 
@@ -79,17 +93,14 @@ async def update_food_entry(
         raise NotFoundError("Food entry not found")
 
     update_data = data.model_dump(exclude_unset=True)
+    deltas = meal_deltas([entry], sign=-1)
+    await food_usage_service.remove_usage(db, user_id, [entry])
     for field, value in update_data.items():
         setattr(entry, field, value)
 
     await db.flush()
-
-    # Recalculate log total
-    log_result = await db.execute(
-        select(CalorieLog).where(CalorieLog.id == entry.calorie_log_id)
-    )
-    log = log_result.scalar_one()
-    await update_consumed_total(db, log)
+    await food_usage_service.add_usage(db, user_id, [entry])
+    await apply_meal_deltas(db, entry.calorie_log_id, meal_deltas([entry], into=deltas))
 
     return entry
 
@@ -106,16 +117,10 @@ async def delete_food_entry(
     if not entry:
         raise NotFoundError("Food entry not found")
 
-    calorie_log_id = entry.calorie_log_id
+    await food_usage_service.remove_usage(db, user_id, [entry])
     await db.delete(entry)
     await db.flush()
-
-    # Recalculate log total
-    log_result = await db.execute(
-        select(CalorieLog).where(CalorieLog.id == calorie_log_id)
-    )
-    log = log_result.scalar_one()
-    await update_consumed_total(db, log)
+    await apply_meal_deltas(db, entry.calorie_log_id, meal_deltas([entry], sign=-1))
 
 
 async def get_favorites(db: AsyncSession, user_id: str) -> list[FoodEntry]:
@@ -147,14 +152,60 @@ async def toggle_favorite(
 async def search_foods(
     db: AsyncSession, user_id: str, query: str
 ) -> list[FoodEntry]:
-    """Search user's past food entries by name."""
+    """Search the user's past foods by name, one entry per food.
+
+    Matches against the user's own user_food_usage rows (one per distinct
+    food and portion, reached through the user_id prefix of its unique key),
+    so the cost depends on how many foods this user has logged, not on the
+    whole food_entries table. Foods are ranked by how often they were
+    logged, then how recently; each is represented by its latest entry.
+    """
+    terms = _SEARCH_TERMS.findall(query.lower()) or [query.strip()]
+    ranked = await db.execute(
+        select(UserFoodUsage.name_key)
+        .where(
+            UserFoodUsage.user_id == user_id,
+            *(UserFoodUsage.food_name.contains(term, autoescape=True) for term in terms),
+        )
+        .group_by(UserFoodUsage.name_key)
+        .order_by(
+            func.sum(UserFoodUsage.use_count).desc(),
+            func.max(UserFoodUsage.last_used_at).desc(),
+        )
+        .limit(SEARCH_LIMIT)
+    )
+    rank = {name_key: i for i, name_key in enumerate(ranked.scalars())}
+    if not rank:
+        return []
+
+    # Latest entry per matching name, through the (user_id, food_name) index
+    names = select(UserFoodUsage.food_name).where(
+        UserFoodUsage.user_id == user_id, UserFoodUsage.name_key.in_(list(rank))
+    )
+    latest = (
+        select(FoodEntry.food_name, func.max(FoodEntry.created_at).label("last_used"))
+        .where(FoodEntry.user_id == user_id, FoodEntry.food_name.in_(names))
+        .group_by(FoodEntry.food_name)
+        .subquery()
+    )
     result = await db.execute(
         select(FoodEntry)
-        .where(
-            FoodEntry.user_id == user_id,
-            FoodEntry.food_name.ilike(f"%{query}%"),
+        .join(
+            latest,
+            and_(
+                FoodEntry.food_name == latest.c.food_name,
+                FoodEntry.created_at == latest.c.last_used,
+            ),
         )
-        .order_by(FoodEntry.created_at.desc())
-        .limit(20)
+        .where(FoodEntry.user_id == user_id)
     )
-    return list(result.scalars().all())
+
+    # Names differing only in case or plural share a key: keep the latest
+    best: dict[str, FoodEntry] = {}
+    for entry in result.scalars():
+        name_key = usage_key(entry.food_name, None)[0]
+        if name_key in rank and (
+            name_key not in best or entry.created_at > best[name_key].created_at
+        ):
+            best[name_key] = entry
+    return [best[name_key] for name_key in sorted(best, key=rank.__getitem__)]
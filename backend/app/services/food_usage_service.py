@@ -0,0 +1,115 @@
+"""Per-user "recent & frequent foods", kept in step with food_entries.
+
+food_service calls add_usage / remove_usage next to every entry write, in
+the same transaction, so the aggregate never needs a rebuild.
+"""
+import uuid
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.mysql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.food_usage import UserFoodUsage
+from app.utils.food_text import clean_description, normalize_fragment
+
+# FoodEntry attribute -> running sum column
+MACRO_SUMS = {
+    "calories": "calories_sum",
+    "protein_g": "protein_sum",
+    "carbs_g": "carbs_sum",
+    "fat_g": "fat_sum",
+    "fiber_g": "fiber_sum",
+}
+
+
+def usage_key(food_name: str, portion_desc: str | None) -> tuple[str, str]:
+    """("Scrambled Eggs", "2 Pieces") -> ("scrambled egg", "2 piece")."""
+    name = normalize_fragment(clean_description(food_name)) or food_name.strip().lower()
+    portion = normalize_fragment(clean_description(portion_desc or ""))
+    return name[:255], portion[:255]
+
+
+def _aggregate(entries) -> dict[tuple[str, str], dict]:
+    groups: dict[tuple[str, str], dict] = {}
+    for entry in entries:
+        key = usage_key(entry.food_name, entry.portion_desc)
+        group = groups.setdefault(key, {
+            "food_name": entry.food_name,
+            "portion_desc": entry.portion_desc,
+            "use_count": 0,
+            "last_used_at": entry.created_at,
+            **{column: 0.0 for column in MACRO_SUMS.values()},
+        })
+        group["use_count"] += 1
+        if entry.created_at >= group["last_used_at"]:
+            group.update(food_name=entry.food_name, portion_desc=entry.portion_desc,
+                         last_used_at=entry.created_at)
+        for field, column in MACRO_SUMS.items():
+            group[column] += float(getattr(entry, field) or 0)
+    return groups
+
+
+async def add_usage(db: AsyncSession, user_id: str, entries) -> None:
+    """Count flushed entries (created_at must be set) into the aggregate."""
+    groups = _aggregate(entries)
+    if not groups:
+        return
+
+    stmt = insert(UserFoodUsage).values([
+        {"id": str(uuid.uuid4()), "user_id": user_id,
+         "name_key": name_key, "portion_key": portion_key, **group}
+        for (name_key, portion_key), group in groups.items()
+    ])
+    stmt = stmt.on_duplicate_key_update(
+        food_name=stmt.inserted.food_name,
+        portion_desc=stmt.inserted.portion_desc,
+        use_count=UserFoodUsage.use_count + stmt.inserted.use_count,
+        last_used_at=func.greatest(UserFoodUsage.last_used_at, stmt.inserted.last_used_at),
+        **{
+            column: getattr(UserFoodUsage, column) + getattr(stmt.inserted, column)
+            for column in MACRO_SUMS.values()
+        },
+    )
+    await db.execute(stmt)
+
+
+async def remove_usage(db: AsyncSession, user_id: str, entries) -> None:
+    """Take entries back out of the aggregate, before they are edited or deleted."""
+    groups = _aggregate(entries)
+    if not groups:
+        return
+
+    for (name_key, portion_key), group in groups.items():
+        await db.execute(
+            update(UserFoodUsage)
+            .where(
+                UserFoodUsage.user_id == user_id,
+                UserFoodUsage.name_key == name_key,
+                UserFoodUsage.portion_key == portion_key,
+            )
+            .values(
+                use_count=UserFoodUsage.use_count - group["use_count"],
+                **{
+                    column: getattr(UserFoodUsage, column) - group[column]
+                    for column in MACRO_SUMS.values()
+                },
+            )
+        )
+    await db.execute(
+        delete(UserFoodUsage).where(
+            UserFoodUsage.user_id == user_id, UserFoodUsage.use_count <= 0
+        )
+    )
+
+
+async def get_frequent_foods(
+    db: AsyncSession, user_id: str, limit: int = 20
+) -> list[UserFoodUsage]:
+    """Most logged foods first, ties broken by recency (idx_food_usage_top)."""
+    result = await db.execute(
+        select(UserFoodUsage)
+        .where(UserFoodUsage.user_id == user_id)
+        .order_by(UserFoodUsage.use_count.desc(), UserFoodUsage.last_used_at.desc())
+        .limit(limit)
+    )
+    return list(result.scalars().all())
@@ -1,87 +1,65 @@
 import json
-from datetime import date, datetime, timezone, timedelta
+from datetime import date, datetime, timezone
 
 from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.config import get_settings
 from app.models.gamification import Badge, UserBadge, UserStats, WeeklyFeedback
 from app.models.calorie_log import CalorieLog
 from app.models.food_entry import FoodEntry
 from app.models.training import TrainingSession
+from app.services import events
+from app.services.badge_catalog import BADGE_DEFINITIONS, COUNTERS, get_catalog
+from app.utils.level_curve import LevelCurve
+from app.utils.streaks import advance_streak, live_streak
 
-# XP per level: level N requires N * 100 XP
-XP_PER_LEVEL = 100
-
-BADGE_DEFINITIONS = [
-    # Logging badges
-    {"key": "first_log", "name": "First Bite", "description": "Log your first meal", "icon": "utensils", "category": "logging", "tier": 1, "xp_reward": 10},
-    {"key": "log_10", "name": "Consistent Logger", "description": "Log 10 meals", "icon": "clipboard-list", "category": "logging", "tier": 1, "xp_reward": 25},
-    {"key": "log_50", "name": "Dedicated Tracker", "description": "Log 50 meals", "icon": "clipboard-check", "category": "logging", "tier": 2, "xp_reward": 50},
-    {"key": "log_100", "name": "Nutrition Master", "description": "Log 100 meals", "icon": "award", "category": "logging", "tier": 3, "xp_reward": 100},
-    # Photo badges
-    {"key": "first_photo", "name": "Snap & Track", "description": "Use AI photo logging for the first time", "icon": "camera", "category": "photo", "tier": 1, "xp_reward": 15},
-    {"key": "photo_25", "name": "Shutterbug", "description": "Log 25 meals with photos", "icon": "image", "category": "photo", "tier": 2, "xp_reward": 50},
-    # Streak badges
-    {"key": "streak_3", "name": "On a Roll", "description": "3-day logging streak", "icon": "flame", "category": "streak", "tier": 1, "xp_reward": 15},
-    {"key": "streak_7", "name": "Week Warrior", "description": "7-day logging streak", "icon": "flame", "category": "streak", "tier": 2, "xp_reward": 30},
-    {"key": "streak_14", "name": "Two-Week Titan", "description": "14-day logging streak", "icon": "flame", "category": "streak", "tier": 2, "xp_reward": 50},
-    {"key": "streak_30", "name": "Monthly Machine", "description": "30-day logging streak", "icon": "flame", "category": "streak", "tier": 3, "xp_reward": 100},
-    {"key": "streak_100", "name": "Century Streak", "description": "100-day logging streak", "icon": "zap", "category": "streak", "tier": 4, "xp_reward": 250},
-    # Target badges
-    {"key": "on_target_1", "name": "Bullseye", "description": "Hit your calorie target for 1 day", "icon": "target", "category": "target", "tier": 1, "xp_reward": 10},
-    {"key": "on_target_7", "name": "Perfect Week", "description": "Hit your calorie target 7 days in a row", "icon": "trophy", "category": "target", "tier": 2, "xp_reward": 50},
-    {"key": "on_target_30", "name": "Laser Focused", "description": "Hit your calorie target 30 days total", "icon": "medal", "category": "target", "tier": 3, "xp_reward": 100},
-    # Running badges
-    {"key": "first_run", "name": "First Steps", "description": "Complete your first training session", "icon": "footprints", "category": "running", "tier": 1, "xp_reward": 15},
-    {"key": "run_50k", "name": "50K Club", "description": "Run a total of 50km", "icon": "map-pin", "category": "running", "tier": 2, "xp_reward": 50},
-    {"key": "run_100k", "name": "100K Achiever", "description": "Run a total of 100km", "icon": "mountain", "category": "running", "tier": 3, "xp_reward": 100},
-    # Race badges
-    {"key": "first_race", "name": "Race Ready", "description": "Add your first race", "icon": "flag", "category": "race", "tier": 1, "xp_reward": 15},
-    {"key": "race_finisher", "name": "Finisher", "description": "Complete a race", "icon": "medal", "category": "race", "tier": 2, "xp_reward": 50},
-]
+settings = get_settings()
+
+LEVEL_CURVE = LevelCurve(settings.XP_LEVEL_BASE, settings.XP_LEVEL_STEP)
 
 
 async def seed_badges(db: AsyncSession):
-    """Seed badge definitions if not already present."""
-    result = await db.execute(select(func.count(Badge.id)))
-    count = result.scalar()
-    if count > 0:
+    """Seed badge definitions that are not already present."""
+    result = await db.execute(select(Badge.key))
+    existing = set(result.scalars().all())
+    missing = [d for d in BADGE_DEFINITIONS if d["key"] not in existing]
+    if not missing:
         return
 
-    for badge_def in BADGE_DEFINITIONS:
-        badge = Badge(**badge_def)
-        db.add(badge)
+    for badge_def in missing:
+        db.add(Badge(**badge_def))
     await db.commit()
 
 
-async def get_or_create_stats(db: AsyncSession, user_id: str) -> UserStats:
-    """Get or create user stats row."""
-    result = await db.execute(
-        select(UserStats).where(UserStats.user_id == user_id)
-    )
+async def get_or_create_stats(
+    db: AsyncSession, user_id: str, for_update: bool = False
+) -> UserStats:
+    """Get or create user stats row; for_update locks it until the request commits."""
+    query = select(UserStats).where(UserStats.user_id == user_id)
+    if for_update:
+        query = query.with_for_update()
+    result = await db.execute(query)
     stats = result.scalar_one_or_none()
     if not stats:
         stats = UserStats(user_id=user_id)
         db.add(stats)
-        await db.commit()
-        await db.refresh(stats)
+        await db.flush()
     return stats
 
 
 async def get_user_stats(db: AsyncSession, user_id: str) -> dict:
     """Get user stats with level progress."""
     stats = await get_or_create_stats(db, user_id)
-    level = stats.level
-    xp_for_current = level * XP_PER_LEVEL
-    xp_into_level = stats.total_xp - sum(i * XP_PER_LEVEL for i in range(1, level))
+    level, xp_into_level, xp_for_current = LEVEL_CURVE.progress(stats.total_xp)
     xp_progress = min(xp_into_level / xp_for_current * 100, 100) if xp_for_current > 0 else 0
 
     return {
         "total_xp": stats.total_xp,
-        "level": stats.level,
+        "level": level,
         "xp_for_next_level": xp_for_current,
         "xp_progress": round(xp_progress, 1),
-        "current_streak": stats.current_streak,
+        "current_streak": current_streak(stats),
         "longest_streak": stats.longest_streak,
         "total_logs": stats.total_logs,
         "total_photos": stats.total_photos,
@@ -92,89 +70,56 @@ async def get_user_stats(db: AsyncSession, user_id: str) -> dict:
 
 async def get_user_badges(db: AsyncSession, user_id: str) -> list[dict]:
     """Get all badges with earned status for user."""
-    all_badges_result = await db.execute(select(Badge))
-    all_badges = all_badges_result.scalars().all()
+    catalog = await get_catalog(db)
 
     earned_result = await db.execute(
-        select(UserBadge).where(UserBadge.user_id == user_id)
+        select(UserBadge.badge_id, UserBadge.earned_at).where(UserBadge.user_id == user_id)
     )
-    earned = {ub.badge_id: ub.earned_at for ub in earned_result.scalars().all()}
+    earned = dict(earned_result.all())
 
-    badges = []
-    for badge in all_badges:
-        badges.append({
-            "badge": {
-                "id": badge.id,
-                "key": badge.key,
-                "name": badge.name,
-                "description": badge.description,
-                "icon": badge.icon,
-                "category": badge.category,
-                "tier": badge.tier,
-                "xp_reward": badge.xp_reward,
-            },
+    return [
+        {
+            "badge": badge.as_dict(),
             "earned_at": earned.get(badge.id),
             "earned": badge.id in earned,
-        })
-
-    return badges
+        }
+        for badge in catalog.badges
+    ]
 
 
-async def add_xp(db: AsyncSession, user_id: str, xp: int):
+def _grant_xp(stats: UserStats, xp: int) -> None:
     """Add XP and update level."""
-    stats = await get_or_create_stats(db, user_id)
     stats.total_xp += xp
+    stats.level = LEVEL_CURVE.level_for(stats.total_xp)
 
-    # Recalculate level
-    total = stats.total_xp
-    level = 1
-    while total >= level * XP_PER_LEVEL:
-        total -= level * XP_PER_LEVEL
-        level += 1
-    stats.level = level
-    await db.commit()
 
+def _counters(stats: UserStats) -> dict[str, float]:
+    return {counter: float(getattr(stats, counter) or 0) for counter in COUNTERS}
 
-async def check_and_award_badges(db: AsyncSession, user_id: str) -> list[dict]:
-    """Check all badge conditions and award new badges. Returns newly earned badges."""
-    stats = await get_or_create_stats(db, user_id)
 
-    # Get already earned badge keys
+async def _award_badges(
+    db: AsyncSession, stats: UserStats, before: dict[str, float] | None
+) -> list[dict]:
+    """Award the badges reached since the `before` counters (all satisfied
+    badges when None), granting their XP at once."""
+    catalog = await get_catalog(db)
+    candidates = catalog.candidates(before, _counters(stats))
+    if not candidates:
+        return []
+
     earned_result = await db.execute(
-        select(UserBadge.badge_id).where(UserBadge.user_id == user_id)
+        select(UserBadge.badge_id).where(
+            UserBadge.user_id == stats.user_id,
+            UserBadge.badge_id.in_([badge.id for badge in candidates]),
+        )
     )
     earned_badge_ids = set(earned_result.scalars().all())
 
-    # Get all badges
-    all_badges_result = await db.execute(select(Badge))
-    all_badges = {b.key: b for b in all_badges_result.scalars().all()}
-
     new_badges = []
-
-    # Check conditions
-    checks = {
-        "first_log": stats.total_logs >= 1,
-        "log_10": stats.total_logs >= 10,
-        "log_50": stats.total_logs >= 50,
-        "log_100": stats.total_logs >= 100,
-        "first_photo": stats.total_photos >= 1,
-        "photo_25": stats.total_photos >= 25,
-        "streak_3": stats.current_streak >= 3,
-        "streak_7": stats.current_streak >= 7,
-        "streak_14": stats.current_streak >= 14,
-        "streak_30": stats.current_streak >= 30,
-        "streak_100": stats.current_streak >= 100,
-        "on_target_1": stats.days_on_target >= 1,
-        "on_target_7": stats.perfect_weeks >= 1,
-        "on_target_30": stats.days_on_target >= 30,
-    }
-
-    for key, condition in checks.items():
-        badge = all_badges.get(key)
-        if badge and badge.id not in earned_badge_ids and condition:
-            user_badge = UserBadge(user_id=user_id, badge_id=badge.id)
-            db.add(user_badge)
-            await add_xp(db, user_id, badge.xp_reward)
+    for badge in candidates:
+        if badge.id not in earned_badge_ids:
+            earned_badge_ids.add(badge.id)
+            db.add(UserBadge(user_id=stats.user_id, badge_id=badge.id))
             new_badges.append({
                 "key": badge.key,
                 "name": badge.name,
@@ -184,56 +129,96 @@ async def check_and_award_badges(db: AsyncSession, user_id: str) -> list[dict]:
             })
 
     if new_badges:
-        await db.commit()
-
+        _grant_xp(stats, sum(b["xp_reward"] for b in new_badges))
     return new_badges
 
 
-async def update_streak(db: AsyncSession, user_id: str):
-    """Update streak based on calorie log dates."""
-    stats = await get_or_create_stats(db, user_id)
+async def check_and_award_badges(db: AsyncSession, user_id: str) -> list[dict]:
+    """Check all badge conditions and award new badges. Returns newly earned badges."""
+    stats = await get_or_create_stats(db, user_id, for_update=True)
+    return await _award_badges(db, stats, before=None)
 
-    today = date.today()
-    result = await db.execute(
-        select(CalorieLog.log_date)
-        .where(CalorieLog.user_id == user_id)
-        .order_by(CalorieLog.log_date.desc())
+
+def _update_streak(stats: UserStats, day: date) -> None:
+    """Extend or restart the streak for a log on `day`, in O(1)."""
+    stats.last_log_date, stats.current_streak, stats.longest_streak = advance_streak(
+        stats.last_log_date, stats.current_streak, stats.longest_streak, day
     )
-    log_dates = [row[0] for row in result.all()]
 
-    if not log_dates:
-        stats.current_streak = 0
-        await db.commit()
-        return
 
-    streak = 0
-    check_date = today
-    for d in log_dates:
-        if d == check_date:
-            streak += 1
-            check_date -= timedelta(days=1)
-        elif d == check_date - timedelta(days=1):
-            check_date = d
-            streak += 1
-            check_date -= timedelta(days=1)
+def current_streak(stats: UserStats, today: date | None = None) -> int:
+    return live_streak(stats.last_log_date, stats.current_streak, today or date.today())
+
+
+async def record_food_logs(
+    db: AsyncSession, user_id: str, logs: int, photos: int = 0, day: date | None = None
+) -> list[dict]:
+    """Apply new food entries logged on `day` to stats, streak, badges and XP.
+
+    Nothing is committed here: the stats row is locked and updated in the
+    caller's transaction. Returns newly earned badges.
+    """
+    stats = await get_or_create_stats(db, user_id, for_update=True)
+    before = _counters(stats)
+    stats.total_logs += logs
+    stats.total_photos += photos
+    _update_streak(stats, day or date.today())
+    return await _award_badges(db, stats, before)
+
+
+async def record_training_progress(
+    db: AsyncSession,
+    user_id: str,
+    sessions: int = 0,
+    distance_km: float = 0,
+    races_added: int = 0,
+    races_completed: int = 0,
+) -> list[dict]:
+    """Apply changes in completed sessions, distance run and races to the
+    running and race badge counters. Like record_food_logs, no commit."""
+    if not (sessions or distance_km or races_added or races_completed):
+        return []
+    stats = await get_or_create_stats(db, user_id, for_update=True)
+    before = _counters(stats)
+    stats.sessions_completed += sessions
+    stats.distance_km = float(stats.distance_km or 0) + distance_km
+    stats.races_added += races_added
+    stats.races_completed += races_completed
+    return await _award_badges(db, stats, before)
+
+
+# --- Event subscribers: run by the outbox dispatcher after the request ---
+@events.subscribe(events.FoodLogged)
+async def _on_food_logged(db: AsyncSession, user_id: str, logged: list[events.FoodLogged]):
+    per_day: dict[date, list[int]] = {}
+    for event in logged:
+        totals = per_day.setdefault(event.day, [0, 0])
+        totals[0] += event.logs
+        totals[1] += event.photos
+    # Oldest day first so the streak advances in order
+    for day in sorted(per_day):
+        logs, photos = per_day[day]
+        await record_food_logs(db, user_id, logs, photos, day)
+
+
+@events.subscribe(
+    events.SessionCompleted, events.RaceAdded, events.RaceRemoved, events.RaceStatusChanged
+)
+async def _on_training_progress(db: AsyncSession, user_id: str, changes: list[events.DomainEvent]):
+    totals = {"sessions": 0, "distance_km": 0.0, "races_added": 0, "races_completed": 0}
+    for event in changes:
+        if isinstance(event, events.SessionCompleted):
+            totals["sessions"] += event.sessions
+            totals["distance_km"] += event.distance_km
+        elif isinstance(event, events.RaceAdded):
+            totals["races_added"] += 1
+            totals["races_completed"] += int(event.completed)
+        elif isinstance(event, events.RaceRemoved):
+            totals["races_added"] -= 1
+            totals["races_completed"] -= int(event.completed)
         else:
-            break
-
-    stats.current_streak = streak
-    if streak > stats.longest_streak:
-        stats.longest_streak = streak
-    await db.commit()
-
-
-async def record_food_log(db: AsyncSession, user_id: str, is_photo: bool = False):
-    """Called after a food entry is created to update stats."""
-    stats = await get_or_create_stats(db, user_id)
-    stats.total_logs += 1
-    if is_photo:
-        stats.total_photos += 1
-    await db.commit()
-
-    await update_streak(db, user_id)
+            totals["races_completed"] += event.completed
+    await record_training_progress(db, user_id, **totals)
 
 
 async def calculate_daily_score(db: AsyncSession, user_id: str, log_date: date = None) -> dict:
@@ -286,7 +271,7 @@ async def calculate_daily_score(db: AsyncSession, user_id: str, log_date: date =
     logging_bonus = min(entry_count * 10, 30)
 
     # Streak bonus: 5 per day, max 20
-    streak_bonus = min(stats.current_streak * 5, 20)
+    streak_bonus = min(current_streak(stats) * 5, 20)
 
     total = calorie_score + logging_bonus + streak_bonus
 
@@ -0,0 +1,354 @@
+import asyncio
+import logging
+from contextlib import aclosing
+from datetime import date, datetime, timedelta, timezone
+from typing import Awaitable, Callable
+
+from fastapi import HTTPException
+from sqlalchemy import select, update, func, and_, or_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.core.exceptions import NotFoundError, ConflictError, TooManyRequestsError
+from app.database import AsyncSessionLocal
+from app.models.job import Job
+from app.schemas.gamification import WeeklyFeedbackResponse
+from app.services import training_service
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ("queued", "running")
+FINISHED_STATUSES = ("succeeded", "failed", "cancelled")
+
+# A running job whose row hasn't been touched for this long belongs to a
+# worker that died; it becomes claimable again
+STALE_AFTER_SECONDS = settings.JOB_TIMEOUT_SECONDS + 60
+
+
+class JobCancelled(Exception):
+    pass
+
+
+JobHandler = Callable[[Job], Awaitable[dict]]
+
+_handlers: dict[str, JobHandler] = {}
+# Per-kind concurrency cap and slots in use. Slots are taken before claiming
+# and only touched from the event loop, so plain counters are enough
+_capacity: dict[str, int] = {}
+_busy: dict[str, int] = {}
+_running: dict[str, asyncio.Task] = {}
+_workers: list[asyncio.Task] = []
+_wakeup = asyncio.Event()
+
+
+def register(kind: str, concurrency: int) -> Callable[[JobHandler], JobHandler]:
+    """Register a handler for a job kind, with a per-process concurrency cap."""
+    def decorator(fn: JobHandler) -> JobHandler:
+        _handlers[kind] = fn
+        _capacity[kind] = concurrency
+        _busy[kind] = 0
+        return fn
+    return decorator
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+# --- API side ---
+async def submit_job(db: AsyncSession, user_id: str, kind: str, payload: dict) -> Job:
+    """Queue a job for the worker pool. Payload must be JSON-serializable."""
+    active = await db.execute(
+        select(func.count(Job.id)).where(
+            Job.user_id == user_id, Job.status.in_(ACTIVE_STATUSES)
+        )
+    )
+    if active.scalar() >= settings.JOB_MAX_ACTIVE_PER_USER:
+        raise TooManyRequestsError("Too many jobs in progress. Please wait for one to finish.")
+
+    job = Job(
+        user_id=user_id,
+        kind=kind,
+        payload=payload,
+        status="queued",
+        attempts=0,
+        max_attempts=settings.JOB_MAX_ATTEMPTS,
+        cancel_requested=False,
+    )
+    db.add(job)
+    # Commit before waking the workers so they can see the row
+    await db.commit()
+    notify_workers()
+    return job
+
+
+async def get_job(db: AsyncSession, user_id: str, job_id: str) -> Job:
+    result = await db.execute(
+        select(Job).where(Job.id == job_id, Job.user_id == user_id)
+    )
+    job = result.scalar_one_or_none()
+    if not job:
+        raise NotFoundError("Job not found")
+    return job
+
+
+async def get_jobs(db: AsyncSession, user_id: str, limit: int = 20) -> list[Job]:
+    result = await db.execute(
+        select(Job)
+        .where(Job.user_id == user_id)
+        .order_by(Job.created_at.desc())
+        .limit(limit)
+    )
+    return list(result.scalars().all())
+
+
+async def cancel_job(db: AsyncSession, user_id: str, job_id: str) -> Job:
+    """Cancel a queued job outright; ask a running one to stop."""
+    job = await get_job(db, user_id, job_id)
+    if job.status in FINISHED_STATUSES:
+        raise ConflictError("Job has already finished")
+
+    if job.status == "queued":
+        job.status = "cancelled"
+    else:
+        job.cancel_requested = True
+    await db.commit()
+
+    # Running here: stop it now. Running in another process: its worker sees
+    # cancel_requested at the next progress report.
+    task = _running.get(job.id)
+    if task is not None:
+        task.cancel()
+    return job
+
+
+def notify_workers() -> None:
+    _wakeup.set()
+
+
+# --- Worker side ---
+async def _set(job_id: str, **values) -> None:
+    async with AsyncSessionLocal() as db:
+        await db.execute(update(Job).where(Job.id == job_id).values(**values))
+        await db.commit()
+
+
+async def _requeue(job_id: str, **values) -> bool:
+    """Queue a failed job again unless the user asked to cancel it meanwhile."""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.cancel_requested.is_(False))
+            .values(status="queued", **values)
+        )
+        await db.commit()
+    return result.rowcount > 0
+
+
+async def report_progress(job_id: str, progress: dict) -> None:
+    """Store progress (doubles as a heartbeat); raises JobCancelled if the
+    user asked to cancel."""
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(Job).where(Job.id == job_id).values(progress=progress, updated_at=_now())
+        )
+        result = await db.execute(select(Job.cancel_requested).where(Job.id == job_id))
+        cancel_requested = result.scalar()
+        await db.commit()
+    if cancel_requested:
+        raise JobCancelled()
+
+
+async def _claim(kinds: list[str]) -> Job | None:
+    """Lock the next runnable job and mark it running.
+
+    SKIP LOCKED lets several workers (and processes) poll the same table
+    without handing out a job twice.
+    """
+    now = _now()
+    stale = now - timedelta(seconds=STALE_AFTER_SECONDS)
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(Job)
+            .where(
+                Job.kind.in_(kinds),
+                or_(
+                    and_(
+                        Job.status == "queued",
+                        Job.run_after <= now,
+                        Job.cancel_requested.is_(False),
+                    ),
+                    and_(Job.status == "running", Job.updated_at < stale),
+                ),
+            )
+            .order_by(Job.run_after)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+        job = result.scalar_one_or_none()
+        if job is None:
+            return None
+
+        if job.cancel_requested:
+            # Its worker died after the user asked to cancel
+            job.status = "cancelled"
+        elif job.status == "running" and job.attempts >= job.max_attempts:
+            job.status = "failed"
+            job.error = "Job timed out"
+        else:
+            job.status = "running"
+            job.attempts += 1
+            job.updated_at = now
+        await db.commit()
+        return job
+
+
+def _retry_delay(attempts: int) -> float:
+    delay = settings.JOB_RETRY_BASE_SECONDS * 2 ** (attempts - 1)
+    return min(delay, settings.JOB_RETRY_MAX_SECONDS)
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    # Client errors (missing profile, bad input) won't fix themselves
+    return not (isinstance(exc, HTTPException) and exc.status_code < 500)
+
+
+async def _execute(job: Job) -> None:
+    task = asyncio.create_task(_handlers[job.kind](job))
+    _running[job.id] = task
+    try:
+        done, _ = await asyncio.wait({task}, timeout=settings.JOB_TIMEOUT_SECONDS)
+    except asyncio.CancelledError:
+        # Worker shutting down: hand the job back without using up an attempt
+        task.cancel()
+        await _set(job.id, status="queued", attempts=job.attempts - 1, run_after=_now())
+        raise
+    finally:
+        _running.pop(job.id, None)
+
+    if not done:
+        task.cancel()
+        exc: BaseException | None = TimeoutError("Job timed out")
+    elif task.cancelled():
+        exc = JobCancelled()
+    else:
+        exc = task.exception()
+
+    if exc is None:
+        await _set(job.id, status="succeeded", result=task.result(), error=None)
+    elif isinstance(exc, JobCancelled):
+        await _set(job.id, status="cancelled")
+    elif _is_retryable(exc) and job.attempts < job.max_attempts:
+        run_after = _now() + timedelta(seconds=_retry_delay(job.attempts))
+        if await _requeue(job.id, run_after=run_after, error=str(exc)[:1000]):
+            logger.warning("Job %s (%s) failed, retrying: %r", job.id, job.kind, exc)
+        else:
+            await _set(job.id, status="cancelled")
+    else:
+        detail = exc.detail if isinstance(exc, HTTPException) else str(exc)
+        await _set(job.id, status="failed", error=str(detail)[:1000])
+        logger.error("Job %s (%s) failed: %r", job.id, job.kind, exc)
+
+
+def _try_acquire(kind: str) -> bool:
+    if _busy[kind] >= _capacity[kind]:
+        return False
+    _busy[kind] += 1
+    return True
+
+
+def _release(kind: str) -> None:
+    _busy[kind] -= 1
+
+
+async def _worker_loop() -> None:
+    while True:
+        # Hold a slot for every kind we may claim *before* claiming, so a
+        # claimed job never waits (unheartbeated) for its slot and gets
+        # reclaimed as stale by another worker
+        held = [kind for kind in _capacity if _try_acquire(kind)]
+        job = None
+        try:
+            if held:
+                job = await _claim(held)
+        except Exception:
+            logger.exception("Could not claim a job")
+        finally:
+            for kind in held:
+                if job is None or job.status != "running" or kind != job.kind:
+                    _release(kind)
+
+        if job is None:
+            try:
+                await asyncio.wait_for(_wakeup.wait(), settings.JOB_POLL_INTERVAL_SECONDS)
+            except TimeoutError:
+                pass
+            _wakeup.clear()
+            continue
+
+        if job.status != "running":
+            continue
+        try:
+            await _execute(job)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Could not record the outcome of job %s", job.id)
+        finally:
+            _release(job.kind)
+
+
+def start_workers() -> None:
+    for _ in range(settings.JOB_WORKERS):
+        _workers.append(asyncio.create_task(_worker_loop()))
+
+
+async def stop_workers() -> None:
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
+
+
+# --- Handlers ---
+@register("training_plan", settings.JOB_PLAN_CONCURRENCY)
+async def _run_training_plan(job: Job) -> dict:
+    # A previous attempt that died mid-generation (worker crash, stale
+    # reclaim) left its inactive plan behind; start this attempt clean
+    previous_plan_id = (job.progress or {}).get("plan_id")
+    if previous_plan_id:
+        async with AsyncSessionLocal() as db:
+            await training_service.discard_unfinished_plan(db, previous_plan_id)
+            await db.commit()
+
+    plan_id = None
+    events = training_service.generate_training_plan_stream(job.user_id, job.payload)
+    async with aclosing(events):
+        async for event, data in events:
+            if event == "plan":
+                plan_id = data["plan"].id
+                await report_progress(job.id, {
+                    "plan_id": plan_id,
+                    "completed_chunks": 0,
+                    "total_chunks": data["total_chunks"],
+                })
+            elif event == "chunk":
+                await report_progress(job.id, {
+                    "plan_id": plan_id,
+                    "completed_chunks": data["completed_chunks"],
+                    "total_chunks": data["total_chunks"],
+                })
+    return {"plan_id": plan_id}
+
+
+@register("weekly_feedback", settings.JOB_FEEDBACK_CONCURRENCY)
+async def _run_weekly_feedback(job: Job) -> dict:
+    week_start = job.payload.get("week_start")
+    # Heartbeat and cancellation check before the model call
+    await report_progress(job.id, {"stage": "generating"})
+    async with AsyncSessionLocal() as db:
+        feedback = await training_service.generate_weekly_feedback(
+            db, job.user_id, date.fromisoformat(week_start) if week_start else None
+        )
+    return WeeklyFeedbackResponse.model_validate(feedback).model_dump(mode="json")
@@ -0,0 +1,148 @@
+"""Bundled nutrition table for common foods, used before the text AI call.
+
+The table (app/data/nutrition_index.json) is loaded once into a dict keyed
+by normalized name and alias, so resolving a fragment is a parse plus one
+dict lookup. A description is answered locally only when every part of it
+resolves confidently; anything else goes to the model whole.
+"""
+import json
+import re
+from pathlib import Path
+
+from app.utils.food_text import (
+    clean_description,
+    drops_characters,
+    normalize_fragment,
+    parse_quantity,
+)
+
+DATA_FILE = Path(__file__).resolve().parent.parent / "data" / "nutrition_index.json"
+
+MASS_G = {"g": 1.0, "kg": 1000.0, "oz": 28.35, "lb": 453.6}
+# Generic volumes, used when a food has no weight of its own for the unit
+VOLUME_ML = {"ml": 1.0, "l": 1000.0, "cup": 240.0, "tbsp": 15.0, "tsp": 5.0,
+             "glass": 250.0, "bowl": 300.0}
+
+# Portions estimated from a typical serving are less certain than weighed ones
+CONFIDENCE_MEASURED = 0.9
+CONFIDENCE_SERVING = 0.8
+
+# Refuse absurd quantities rather than log "5000 bananas"
+MAX_GRAMS = 5000
+
+# Commas and semicolons only ever list foods. "and", "plus", "&" and "+"
+# also join dish names ("mac and cheese", "bread and butter pudding"), so a
+# food after one of them must state its quantity ("2 eggs and a banana")
+_LIST_SEPARATORS = re.compile(r"\s*[,;]\s*")
+_JOINERS = re.compile(r"\s*(?:&|\+|\band\b|\bplus\b)\s*")
+_WITH = re.compile(r"\s*\bwith\b\s*")
+
+
+class NutritionFood:
+    __slots__ = ("name", "per_100g", "units", "serving_g", "g_per_ml", "rating")
+
+    def __init__(self, name: str, data: dict):
+        self.name = name
+        self.per_100g = data["per_100g"]
+        self.units = data.get("units", {})
+        self.serving_g = data["serving_g"]
+        self.g_per_ml = data.get("g_per_ml", 1.0)
+        self.rating = data.get("rating")
+
+    def grams_for(self, quantity: float, unit: str | None) -> float | None:
+        if unit is None:
+            per_unit = self.units.get("piece", self.serving_g)
+        elif unit in self.units:
+            per_unit = self.units[unit]
+        elif unit in MASS_G:
+            per_unit = MASS_G[unit]
+        elif unit in VOLUME_ML:
+            per_unit = VOLUME_ML[unit] * self.g_per_ml
+        elif unit == "serving":
+            per_unit = self.serving_g
+        else:
+            return None  # e.g. "a slice of banana": let the model judge
+        return quantity * per_unit
+
+
+_index: dict[str, NutritionFood] | None = None
+
+
+def _load() -> dict[str, NutritionFood]:
+    global _index
+    if _index is None:
+        with open(DATA_FILE, encoding="utf-8") as f:
+            raw = json.load(f)
+        index = {}
+        for name, data in raw.items():
+            food = NutritionFood(name, data)
+            for key in [name, *data.get("aliases", [])]:
+                index.setdefault(normalize_fragment(key), food)
+        _index = index
+    return _index
+
+
+def lookup(name: str) -> NutritionFood | None:
+    return _load().get(normalize_fragment(name))
+
+
+def _portion_text(quantity: float, unit: str | None, food: NutritionFood, grams: float) -> str:
+    if unit is None:
+        unit = "piece" if "piece" in food.units else "serving"
+    if unit not in MASS_G and unit not in VOLUME_ML and quantity != 1:
+        unit += "es" if unit.endswith(("ch", "sh", "s")) else "s"
+    if unit in MASS_G or unit == "ml":
+        return f"{quantity:g} {unit}"
+    return f"{quantity:g} {unit} ({grams:.0f} g)"
+
+
+def resolve_fragment(fragment: str, require_quantity: bool = False) -> dict | None:
+    """A FoodItemAI-shaped dict for one fragment, or None if unknown."""
+    quantity, unit, name = parse_quantity(fragment)
+    if quantity is None and unit is None and require_quantity:
+        return None
+    quantity = 1.0 if quantity is None else quantity
+    if not name or quantity <= 0:
+        return None
+    food = _load().get(name)
+    if food is None:
+        return None
+    grams = food.grams_for(quantity, unit)
+    if grams is None or grams > MAX_GRAMS:
+        return None
+
+    factor = grams / 100
+    kcal, protein, carbs, fat, fiber = food.per_100g
+    return {
+        "name": food.name.capitalize(),
+        "portion": _portion_text(quantity, unit, food, grams),
+        "calories": round(kcal * factor),
+        "protein_g": round(protein * factor, 1),
+        "carbs_g": round(carbs * factor, 1),
+        "fat_g": round(fat * factor, 1),
+        "fiber_g": round(fiber * factor, 1),
+        "confidence": CONFIDENCE_SERVING if unit in (None, "serving") else CONFIDENCE_MEASURED,
+        "health_rating": food.rating,
+    }
+
+
+def resolve_description(description: str) -> list[dict] | None:
+    """FoodItemAI-shaped dicts for the whole description, or None unless the
+    table resolves every part of it.
+
+    "Coffee with milk" means a splash, not a default serving of milk: an
+    add-on needs a stated quantity, like a food after "and".
+    """
+    if drops_characters(description):
+        return None
+    items = []
+    for group in _LIST_SEPARATORS.split(clean_description(description)):
+        parts = [part for part in _JOINERS.split(group) if part.strip()]
+        for position, part in enumerate(parts):
+            head, *extras = [p for p in _WITH.split(part) if p.strip()] or [part]
+            resolved = [resolve_fragment(head, require_quantity=position > 0)]
+            resolved += [resolve_fragment(extra, require_quantity=True) for extra in extras]
+            if not all(resolved):
+                return None
+            items.extend(resolved)
+    return items or None
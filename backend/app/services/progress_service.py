@@ -4,6 +4,8 @@ from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.calorie_log import CalorieLog
+from app.models.gamification import UserStats
+from app.utils.streaks import live_streak
 
 
 async def get_weekly_summary(
@@ -114,49 +116,18 @@ async def get_monthly_summary(
 
 
 async def get_streak(db: AsyncSession, user_id: str) -> dict:
+    """Read from the incrementally maintained user_stats row."""
     result = await db.execute(
-        select(CalorieLog.log_date)
-        .where(CalorieLog.user_id == user_id, CalorieLog.consumed_kcal > 0)
-        .order_by(CalorieLog.log_date.desc())
+        select(UserStats.last_log_date, UserStats.current_streak, UserStats.longest_streak)
+        .where(UserStats.user_id == user_id)
     )
-    dates = [row[0] for row in result.all()]
-
-    if not dates:
+    row = result.one_or_none()
+    if row is None:
         return {"current_streak": 0, "longest_streak": 0}
 
-    # Calculate current streak (consecutive days ending today or yesterday)
-    current_streak = 0
-    today = date.today()
-    check_date = today
-
-    for d in dates:
-        if d == check_date:
-            current_streak += 1
-            check_date -= timedelta(days=1)
-        elif d == check_date - timedelta(days=1) and current_streak == 0:
-            # Allow streak to start from yesterday
-            check_date = d
-            current_streak = 1
-            check_date -= timedelta(days=1)
-        else:
-            break
-
-    # Calculate longest streak
-    longest_streak = 0
-    current_run = 1
-    sorted_dates = sorted(set(dates))
-
-    for i in range(1, len(sorted_dates)):
-        if (sorted_dates[i] - sorted_dates[i - 1]).days == 1:
-            current_run += 1
-        else:
-            longest_streak = max(longest_streak, current_run)
-            current_run = 1
-    longest_streak = max(longest_streak, current_run)
-
     return {
-        "current_streak": current_streak,
-        "longest_streak": longest_streak,
+        "current_streak": live_streak(row.last_log_date, row.current_streak, date.today()),
+        "longest_streak": row.longest_streak,
     }
 
 
@@ -0,0 +1,55 @@
+"""Periodic repair of denormalized totals that are maintained by deltas,
+plus cleanup of AI payloads no entry references any more."""
+import asyncio
+import logging
+from datetime import date, timedelta
+
+from app.config import get_settings
+from app.database import AsyncSessionLocal
+from app.services import ai_payloads
+from app.services.calorie_service import reconcile_consumed_totals, reconcile_meal_totals
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+_task: asyncio.Task | None = None
+
+
+async def reconcile_once() -> int:
+    since = date.today() - timedelta(days=settings.CALORIE_RECONCILE_DAYS)
+    async with AsyncSessionLocal() as db:
+        logs = await reconcile_consumed_totals(db, since)
+        meals = await reconcile_meal_totals(db, since)
+        await db.commit()
+        purged = await ai_payloads.purge_orphans(db)
+        await db.commit()
+    if purged:
+        logger.info("Purged %d orphaned AI payloads", purged)
+    if logs or meals:
+        logger.warning(
+            "Repaired drift in %d calorie logs and %d meal subtotals", logs, meals
+        )
+    return logs + meals
+
+
+async def _reconcile_loop() -> None:
+    while True:
+        await asyncio.sleep(settings.CALORIE_RECONCILE_INTERVAL_SECONDS)
+        try:
+            await reconcile_once()
+        except Exception:
+            logger.exception("Calorie reconciliation failed")
+
+
+def start_reconciler() -> None:
+    global _task
+    if settings.CALORIE_RECONCILE_INTERVAL_SECONDS > 0 and _task is None:
+        _task = asyncio.create_task(_reconcile_loop())
+
+
+async def stop_reconciler() -> None:
+    global _task
+    if _task is not None:
+        _task.cancel()
+        await asyncio.gather(_task, return_exceptions=True)
+        _task = None
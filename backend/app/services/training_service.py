@@ -1,34 +1,29 @@
+import asyncio
 import json
 from datetime import date, timedelta
+from typing import AsyncIterator
 
-from sqlalchemy import select, and_
+from sqlalchemy import delete, select, update, and_
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from openai import AsyncOpenAI
-
 from app.config import get_settings
+from app.core import concurrency, openai_client
+from app.database import AsyncSessionLocal, release_connection
 from app.models.training import TrainingPlan, TrainingSession, Race
 from app.models.user import UserProfile
 from app.models.calorie_log import CalorieLog
 from app.core.exceptions import NotFoundError, BadRequestError
+from app.services import ai_ledger, events
 
 settings = get_settings()
 
-_ai_client = None
-
-
-def _get_ai_client() -> AsyncOpenAI:
-    global _ai_client
-    if _ai_client is None:
-        _ai_client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
-    return _ai_client
-
 
 # --- Race CRUD ---
 async def create_race(db: AsyncSession, user_id: str, data: dict) -> Race:
     race = Race(user_id=user_id, **data)
     db.add(race)
+    events.emit(db, events.RaceAdded(user_id, completed=race.status == "completed"))
     await db.commit()
     await db.refresh(race)
     return race
@@ -55,9 +50,12 @@ async def get_race(db: AsyncSession, user_id: str, race_id: str) -> Race:
 
 async def update_race(db: AsyncSession, user_id: str, race_id: str, data: dict) -> Race:
     race = await get_race(db, user_id, race_id)
+    was_completed = race.status == "completed"
     for key, value in data.items():
         if value is not None:
             setattr(race, key, value)
+    if (race.status == "completed") != was_completed:
+        events.emit(db, events.RaceStatusChanged(user_id, completed=-1 if was_completed else 1))
     await db.commit()
     await db.refresh(race)
     return race
@@ -66,6 +64,7 @@ async def update_race(db: AsyncSession, user_id: str, race_id: str, data: dict)
 async def delete_race(db: AsyncSession, user_id: str, race_id: str):
     race = await get_race(db, user_id, race_id)
     await db.delete(race)
+    events.emit(db, events.RaceRemoved(user_id, completed=race.status == "completed"))
     await db.commit()
 
 
@@ -114,6 +113,13 @@ async def get_plan(db: AsyncSession, user_id: str, plan_id: str) -> TrainingPlan
     return plan
 
 
+def _credited_distance(session: TrainingSession) -> float:
+    """Distance a session counts towards the running badges."""
+    if not session.completed:
+        return 0.0
+    return float(session.actual_distance_km or session.target_distance_km or 0)
+
+
 async def update_session(
     db: AsyncSession, user_id: str, session_id: str, data: dict
 ) -> TrainingSession:
@@ -127,9 +133,14 @@ async def update_session(
     if not session:
         raise NotFoundError("Session not found")
 
+    was_completed, was_credited = session.completed, _credited_distance(session)
     for key, value in data.items():
         if value is not None:
             setattr(session, key, value)
+    sessions = int(bool(session.completed)) - int(bool(was_completed))
+    distance_km = _credited_distance(session) - was_credited
+    if sessions or distance_km:
+        events.emit(db, events.SessionCompleted(user_id, sessions=sessions, distance_km=distance_km))
     await db.commit()
     await db.refresh(session)
     return session
@@ -150,17 +161,20 @@ async def get_week_sessions(
 
 
 # --- AI Training Plan Generation ---
-async def generate_training_plan(
-    db: AsyncSession, user_id: str, data: dict
-) -> TrainingPlan:
-    """Use AI to generate a training plan."""
-    # Get user profile for context
-    profile_result = await db.execute(
-        select(UserProfile).where(UserProfile.user_id == user_id)
-    )
-    profile = profile_result.scalar_one_or_none()
+PLAN_SYSTEM_PROMPT = (
+    "You are an expert running coach certified in periodization methodology. "
+    "You design training plans following Lydiard, Daniels, and Pfitzinger principles. "
+    "Generate detailed, scientifically periodized training plans that include proper "
+    "load management, recovery scheduling, and sports massage integration."
+)
 
-    # Build context
+DAY_OFFSETS = {
+    "monday": 0, "tuesday": 1, "wednesday": 2, "thursday": 3,
+    "friday": 4, "saturday": 5, "sunday": 6,
+}
+
+
+def _plan_context(profile: UserProfile | None, data: dict) -> str:
     context_parts = []
     if profile:
         context_parts.append(
@@ -197,32 +211,69 @@ async def generate_training_plan(
     if pbs:
         context_parts.append(f"Personal bests: {', '.join(pbs)}")
 
-    weeks = data.get("weeks", 12)
-    today = date.today()
-    start_date = today + timedelta(days=(7 - today.weekday()))  # Next Monday
-    end_date = start_date + timedelta(weeks=weeks)
+    return chr(10).join(context_parts)
+
+
+def _plan_phases(weeks: int) -> list[tuple[str, int, int]]:
+    """Split a plan into (phase, first_week, last_week) so chunks generated in
+    parallel agree on where each phase starts and ends."""
+    taper = 2 if weeks < 12 else 3
+    remaining = weeks - taper
+    base = max(1, round(remaining * 0.4))
+    peak = max(1, round(remaining * 0.2))
+    build = max(0, remaining - base - peak)
+
+    phases = []
+    week = 1
+    for name, length in (
+        ("Base/Foundation", base), ("Build/Specific", build),
+        ("Peak", peak), ("Taper", taper),
+    ):
+        if length > 0:
+            phases.append((name, week, week + length - 1))
+            week += length
+    return phases
+
+
+def _plan_chunks(weeks: int) -> list[tuple[int, int]]:
+    size = max(1, settings.TRAINING_PLAN_CHUNK_WEEKS)
+    return [(first, min(first + size - 1, weeks)) for first in range(1, weeks + 1, size)]
+
+
+def _chunk_prompt(
+    context: str, weeks: int, start_date: date, end_date: date,
+    first_week: int, last_week: int,
+) -> str:
+    phase_layout = chr(10).join(
+        f"- Weeks {first}-{last}: {name}" for name, first, last in _plan_phases(weeks)
+    )
+    chunk_weeks = last_week - first_week + 1
+    plan_name_field = '  "plan_name": "descriptive name",\n' if first_week == 1 else ""
 
-    prompt = f"""Generate a {weeks}-week running training plan using proper periodization theory.
+    return f"""You are writing part of a {weeks}-week running training plan using proper periodization theory.
+Generate ONLY weeks {first_week} to {last_week}; the other weeks are generated separately.
 
 Context:
-{chr(10).join(context_parts)}
+{context}
 
 Plan starts: {start_date}, ends: {end_date}
 
-PERIODIZATION STRUCTURE (apply based on plan length):
-1. **Base/Foundation Phase** (~30-40% of plan): Build aerobic base with mostly easy runs, gradually increasing weekly volume by no more than 10% per week. Include 1 long run per week.
-2. **Build/Specific Phase** (~30-40% of plan): Introduce quality workouts — tempo runs, intervals, and race-specific sessions. Maintain long run progression. Add elevation work if race has significant climbing.
-3. **Peak Phase** (~15-20% of plan): Highest training load. Race-pace workouts, back-to-back long runs for ultra distances. Simulate race conditions.
-4. **Taper Phase** (final 2-3 weeks): Reduce volume by 40-60% while maintaining intensity. Keep short sharp sessions, drop volume.
+PHASE LAYOUT FOR THE WHOLE PLAN (follow it exactly):
+{phase_layout}
+
+PERIODIZATION STRUCTURE:
+1. **Base/Foundation Phase**: Build aerobic base with mostly easy runs, gradually increasing weekly volume by no more than 10% per week. Include 1 long run per week.
+2. **Build/Specific Phase**: Introduce quality workouts — tempo runs, intervals, and race-specific sessions. Maintain long run progression. Add elevation work if race has significant climbing.
+3. **Peak Phase**: Highest training load. Race-pace workouts, back-to-back long runs for ultra distances. Simulate race conditions.
+4. **Taper Phase**: Reduce volume by 40-60% while maintaining intensity. Keep short sharp sessions, drop volume.
 
 LOAD MANAGEMENT:
-- Follow a 3:1 load/recovery cycle — every 4th week should be a recovery week (reduce volume 20-30%)
+- Follow a 3:1 load/recovery cycle — every 4th week of the plan (weeks 4, 8, 12, ...) is a recovery week (reduce volume 20-30%)
 - Hard/easy day alternation — never schedule two hard sessions back to back
 - Weekly long run should be 25-35% of total weekly distance
 
 SPORTS MASSAGE / RECOVERY SCHEDULING:
-- Schedule a "recovery" session with description "Sports massage — recovery & injury prevention" every 2 weeks
-- Time these after the highest-volume weeks or after accumulating ~100-150km
+- Schedule a "recovery" session with description "Sports massage — recovery & injury prevention" every 2 weeks (even-numbered weeks)
 - Place them on a rest day or the day after the long run
 
 PACING (use personal bests if provided to calculate training paces):
@@ -232,10 +283,9 @@ PACING (use personal bests if provided to calculate training paces):
 
 Return a JSON object:
 {{
-  "plan_name": "descriptive name",
-  "sessions": [
+{plan_name_field}  "sessions": [
     {{
-      "week": 1,
+      "week": {first_week},
       "day": "monday",
       "time_of_day": "morning",
       "type": "easy_run|tempo|interval|long_run|recovery|rest|strength|cross_training|trail",
@@ -247,59 +297,55 @@ Return a JSON object:
   ]
 }}
 
-Generate sessions for EVERY day of EVERY week (7 sessions per week, {weeks * 7} total).
+Generate sessions for EVERY day of weeks {first_week}-{last_week} (7 sessions per week, {chunk_weeks * 7} total).
 Use session types: easy_run, tempo, interval, long_run, recovery, rest, strength, cross_training, trail.
 Mark rest and massage days as type "rest" or "recovery" respectively."""
 
-    response = await _get_ai_client().chat.completions.create(
-        model=settings.OPENAI_MODEL,
-        response_format={"type": "json_object"},
-        messages=[
-            {
-                "role": "system",
-                "content": (
-                    "You are an expert running coach certified in periodization methodology. "
-                    "You design training plans following Lydiard, Daniels, and Pfitzinger principles. "
-                    "Generate detailed, scientifically periodized training plans that include proper "
-                    "load management, recovery scheduling, and sports massage integration."
-                ),
-            },
-            {"role": "user", "content": prompt},
-        ],
-        max_tokens=16000,
-    )
 
-    result = json.loads(response.choices[0].message.content)
+async def _generate_chunk(
+    context: str, weeks: int, start_date: date, end_date: date,
+    first_week: int, last_week: int,
+) -> dict:
+    messages = [
+        {"role": "system", "content": PLAN_SYSTEM_PROMPT},
+        {
+            "role": "user",
+            "content": _chunk_prompt(
+                context, weeks, start_date, end_date, first_week, last_week
+            ),
+        },
+    ]
+    async with (
+        ai_ledger.record("training.plan_chunk", settings.OPENAI_MODEL, messages) as entry,
+        concurrency.guard("training_plan"),
+    ):
+        response = await openai_client.get_client().chat.completions.create(
+            model=settings.OPENAI_MODEL,
+            response_format={"type": "json_object"},
+            messages=messages,
+            max_tokens=settings.TRAINING_PLAN_CHUNK_MAX_TOKENS,
+            timeout=openai_client.timeout_for("training_plan"),
+        )
+        entry.set_usage(response.usage)
+        return json.loads(response.choices[0].message.content)
 
-    # Create plan
-    plan_name = result.get("plan_name", f"AI Plan - {weeks} Weeks")
-    plan = TrainingPlan(
-        user_id=user_id,
-        name=plan_name,
-        race_id=data.get("race_id"),
-        start_date=start_date,
-        end_date=end_date,
-        weeks=weeks,
-        source="ai_generated",
-        is_active=True,
-    )
-    db.add(plan)
-    await db.flush()
 
-    # Create sessions
-    day_map = {
-        "monday": 0, "tuesday": 1, "wednesday": 2, "thursday": 3,
-        "friday": 4, "saturday": 5, "sunday": 6,
-    }
+def _sessions_from_chunk(
+    plan: TrainingPlan, result: dict, first_week: int, last_week: int
+) -> list[TrainingSession]:
+    sessions = []
     for sess in result.get("sessions", []):
-        week_num = sess.get("week", 1)
+        week_num = sess.get("week", first_week)
+        # Ignore weeks that belong to another chunk
+        if not first_week <= week_num <= last_week:
+            continue
         day = sess.get("day", "monday").lower()
-        day_offset = day_map.get(day, 0)
-        session_date = start_date + timedelta(weeks=week_num - 1, days=day_offset)
+        day_offset = DAY_OFFSETS.get(day, 0)
+        session_date = plan.start_date + timedelta(weeks=week_num - 1, days=day_offset)
 
-        session = TrainingSession(
+        sessions.append(TrainingSession(
             plan_id=plan.id,
-            user_id=user_id,
+            user_id=plan.user_id,
             session_date=session_date,
             week_number=week_num,
             day_of_week=day,
@@ -309,11 +355,128 @@ Mark rest and massage days as type "rest" or "recovery" respectively."""
             target_distance_km=sess.get("distance_km"),
             target_duration_min=sess.get("duration_min"),
             elevation_gain_m=sess.get("elevation_m"),
+        ))
+    return sessions
+
+
+async def discard_unfinished_plan(db: AsyncSession, plan_id: str) -> bool:
+    """Delete an AI plan whose generation never finished (its sessions go
+    with it via ON DELETE CASCADE). Finished, active plans are kept."""
+    result = await db.execute(
+        delete(TrainingPlan).where(
+            TrainingPlan.id == plan_id, TrainingPlan.is_active.is_(False)
         )
-        db.add(session)
+    )
+    return result.rowcount > 0
+
+
+async def generate_training_plan_stream(
+    user_id: str, data: dict
+) -> AsyncIterator[tuple[str, dict]]:
+    """Generate an AI plan in week chunks with bounded concurrency.
+
+    Each chunk is committed as soon as it arrives, so the first weeks are
+    usable long before the whole plan is done. Yields ("plan", ...) once,
+    ("chunk", ...) per persisted chunk and finally ("done", ...). The plan
+    stays inactive until every chunk has been stored; if generation fails or
+    the consumer goes away first, the partial plan is deleted.
+    """
+    async with AsyncSessionLocal() as db:
+        profile_result = await db.execute(
+            select(UserProfile).where(UserProfile.user_id == user_id)
+        )
+        profile = profile_result.scalar_one_or_none()
 
-    await db.commit()
-    return await get_plan(db, user_id, plan.id)
+        weeks = data.get("weeks", 12)
+        today = date.today()
+        start_date = today + timedelta(days=(7 - today.weekday()))  # Next Monday
+        end_date = start_date + timedelta(weeks=weeks)
+
+        plan = TrainingPlan(
+            user_id=user_id,
+            name=f"AI Plan - {weeks} Weeks",
+            race_id=data.get("race_id"),
+            start_date=start_date,
+            end_date=end_date,
+            weeks=weeks,
+            source="ai_generated",
+            is_active=False,
+        )
+        db.add(plan)
+        await db.commit()
+
+    context = _plan_context(profile, data)
+    chunks = _plan_chunks(weeks)
+    semaphore = asyncio.Semaphore(settings.TRAINING_PLAN_CHUNK_CONCURRENCY)
+
+    async def run_chunk(first_week: int, last_week: int):
+        async with semaphore:
+            result = await _generate_chunk(
+                context, weeks, start_date, end_date, first_week, last_week
+            )
+        return first_week, last_week, result
+
+    tasks: list[asyncio.Task] = []
+    finished = False
+    try:
+        yield "plan", {"plan": plan, "total_chunks": len(chunks)}
+
+        tasks = [asyncio.create_task(run_chunk(first, last)) for first, last in chunks]
+        for completed, next_chunk in enumerate(asyncio.as_completed(tasks), start=1):
+            first_week, last_week, result = await next_chunk
+            sessions = _sessions_from_chunk(plan, result, first_week, last_week)
+
+            async with AsyncSessionLocal() as db:
+                db.add_all(sessions)
+                if first_week == 1 and result.get("plan_name"):
+                    plan.name = result["plan_name"]
+                    await db.execute(
+                        update(TrainingPlan)
+                        .where(TrainingPlan.id == plan.id)
+                        .values(name=plan.name)
+                    )
+                await db.commit()
+
+            yield "chunk", {
+                "first_week": first_week,
+                "last_week": last_week,
+                "completed_chunks": completed,
+                "total_chunks": len(chunks),
+                "sessions": sessions,
+            }
+
+        async with AsyncSessionLocal() as db:
+            await db.execute(
+                update(TrainingPlan)
+                .where(TrainingPlan.id == plan.id)
+                .values(is_active=True)
+            )
+            await db.commit()
+        plan.is_active = True
+        finished = True
+    finally:
+        for task in tasks:
+            task.cancel()
+        if not finished:
+            # Generation is all-or-nothing: don't leave a partial plan behind
+            async with AsyncSessionLocal() as db:
+                await discard_unfinished_plan(db, plan.id)
+                await db.commit()
+
+    yield "done", {"plan_id": plan.id}
+
+
+async def generate_training_plan(
+    db: AsyncSession, user_id: str, data: dict
+) -> TrainingPlan:
+    """Use AI to generate a training plan."""
+    # The stream uses its own short sessions; don't hold this one meanwhile
+    await release_connection(db)
+    plan_id = None
+    async for event, payload in generate_training_plan_stream(user_id, data):
+        if event == "done":
+            plan_id = payload["plan_id"]
+    return await get_plan(db, user_id, plan_id)
 
 
 # --- AI Weekly Feedback ---
@@ -363,6 +526,9 @@ async def generate_weekly_feedback(
             f"{f', {float(s.actual_distance_km):.1f}km' if s.actual_distance_km else ''}"
         )
 
+    # Everything the prompt needs is loaded; free the connection for the model call
+    await release_connection(db)
+
     prompt = f"""Analyze this runner's week and provide feedback.
 
 Runner: {profile.age}yo {profile.gender}, {profile.weight_kg}kg, goal: {profile.goal if profile else 'performance'}
@@ -384,20 +550,26 @@ Return JSON:
   "highlights": "positive highlights from the week"
 }}"""
 
-    response = await _get_ai_client().chat.completions.create(
-        model=settings.OPENAI_MODEL,
-        response_format={"type": "json_object"},
-        messages=[
-            {
-                "role": "system",
-                "content": "You are a supportive running coach and nutritionist. Give encouraging but honest feedback.",
-            },
-            {"role": "user", "content": prompt},
-        ],
-        max_tokens=1000,
-    )
-
-    result = json.loads(response.choices[0].message.content)
+    messages = [
+        {
+            "role": "system",
+            "content": "You are a supportive running coach and nutritionist. Give encouraging but honest feedback.",
+        },
+        {"role": "user", "content": prompt},
+    ]
+    async with (
+        ai_ledger.record("training.weekly_feedback", settings.OPENAI_MODEL, messages) as entry,
+        concurrency.guard("feedback"),
+    ):
+        response = await openai_client.get_client().chat.completions.create(
+            model=settings.OPENAI_MODEL,
+            response_format={"type": "json_object"},
+            messages=messages,
+            max_tokens=1000,
+            timeout=openai_client.timeout_for("feedback"),
+        )
+        entry.set_usage(response.usage)
+        result = json.loads(response.choices[0].message.content)
 
     feedback = WeeklyFeedback(
         user_id=user_id,
@@ -0,0 +1,193 @@
+import re
+
+NUMBER_WORDS = {
+    "a": "1",
+    "an": "1",
+    "one": "1",
+    "two": "2",
+    "three": "3",
+    "four": "4",
+    "five": "5",
+    "six": "6",
+    "seven": "7",
+    "eight": "8",
+    "nine": "9",
+    "ten": "10",
+    "eleven": "11",
+    "twelve": "12",
+    "dozen": "12",
+    "half": "0.5",
+    "quarter": "0.25",
+}
+
+UNIT_WORDS = {
+    "g": "g",
+    "gr": "g",
+    "gram": "g",
+    "grams": "g",
+    "kg": "kg",
+    "kilogram": "kg",
+    "kilograms": "kg",
+    "ml": "ml",
+    "milliliter": "ml",
+    "milliliters": "ml",
+    "millilitre": "ml",
+    "millilitres": "ml",
+    "l": "l",
+    "liter": "l",
+    "liters": "l",
+    "litre": "l",
+    "litres": "l",
+    "oz": "oz",
+    "ounce": "oz",
+    "ounces": "oz",
+    "lb": "lb",
+    "lbs": "lb",
+    "pound": "lb",
+    "pounds": "lb",
+    "cup": "cup",
+    "cups": "cup",
+    "tbsp": "tbsp",
+    "tablespoon": "tbsp",
+    "tablespoons": "tbsp",
+    "tsp": "tsp",
+    "teaspoon": "tsp",
+    "teaspoons": "tsp",
+    "slice": "slice",
+    "slices": "slice",
+    "piece": "piece",
+    "pieces": "piece",
+    "pc": "piece",
+    "pcs": "piece",
+    "bowl": "bowl",
+    "bowls": "bowl",
+    "glass": "glass",
+    "glasses": "glass",
+    "serving": "serving",
+    "servings": "serving",
+    "scoop": "scoop",
+    "scoops": "scoop",
+    "can": "can",
+    "cans": "can",
+    "bottle": "bottle",
+    "bottles": "bottle",
+    "bar": "bar",
+    "bars": "bar",
+    "handful": "handful",
+    "handfuls": "handful",
+}
+
+_UNITS = set(UNIT_WORDS.values())
+
+FILLER_WORDS = {"of", "some", "the", "my", "i", "had", "ate"}
+
+# Separators between distinct foods in a free-text description
+ITEM_SEPARATORS = re.compile(r"\s*(?:,|;|&|\+|\band\b|\bwith\b|\bplus\b)\s*")
+
+_FRACTION = re.compile(r"\b(\d+)\s*/\s*(\d+)\b")
+_NUMBER_UNIT = re.compile(r"\b(\d+(?:\.\d+)?)([a-z]+)\b")
+_NON_WORD = re.compile(r"[^a-z0-9./\s,;&+]")
+
+
+def _format_number(value: float) -> str:
+    return f"{value:g}"
+
+
+def _fraction(match: re.Match) -> str:
+    numerator, denominator = int(match.group(1)), int(match.group(2))
+    if denominator == 0:
+        return match.group(0)
+    return _format_number(numerator / denominator)
+
+
+def _split_number_unit(match: re.Match) -> str:
+    if match.group(2) in UNIT_WORDS:
+        return f"{match.group(1)} {match.group(2)}"
+    return match.group(0)
+
+
+def _singular(word: str) -> str:
+    if len(word) > 3 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def _normalize_token(token: str) -> str | None:
+    token = token.strip("./")
+    if not token or token in FILLER_WORDS:
+        return None
+    if token in NUMBER_WORDS:
+        return NUMBER_WORDS[token]
+    if token in UNIT_WORDS:
+        return UNIT_WORDS[token]
+    try:
+        return _format_number(float(token))
+    except ValueError:
+        return _singular(token)
+
+
+def split_items(text: str) -> list[str]:
+    """Split a lowercased description into its individual food fragments."""
+    return [part for part in ITEM_SEPARATORS.split(text) if part.strip()]
+
+
+def normalize_fragment(fragment: str) -> str:
+    """Canonical form of one food fragment, e.g. "Two Eggs" -> "2 egg"."""
+    fragment = _FRACTION.sub(_fraction, fragment)
+    fragment = _NUMBER_UNIT.sub(_split_number_unit, fragment)
+    tokens = (_normalize_token(t) for t in fragment.split())
+    return " ".join(t for t in tokens if t)
+
+
+def clean_description(description: str) -> str:
+    """Lowercase a description and drop characters the parsers don't use."""
+    return _NON_WORD.sub(" ", description.lower())
+
+
+def drops_characters(description: str) -> bool:
+    """True if clean_description would discard part of the text, e.g. the
+    "%" of "2% milk", which then reads as a different food or quantity."""
+    return _NON_WORD.search(description.lower()) is not None
+
+
+def parse_quantity(fragment: str) -> tuple[float | None, str | None, str]:
+    """Split one fragment into (quantity, unit, food name).
+
+    "2 slices of toast" -> (2, "slice", "toast"); "half a banana" ->
+    (0.5, None, "banana"). Leading numbers multiply, so "a dozen eggs" is 12.
+    Quantity is None when the fragment states none ("rice").
+    """
+    tokens = normalize_fragment(fragment).split()
+    quantity = 1.0
+    numbers = 0
+    while numbers < len(tokens):
+        try:
+            quantity *= float(tokens[numbers])
+        except ValueError:
+            break
+        numbers += 1
+
+    rest = tokens[numbers:]
+    unit = None
+    if rest and rest[0] in _UNITS:
+        unit, rest = rest[0], rest[1:]
+    return (quantity if numbers else None), unit, " ".join(rest)
+
+
+def canonicalize_description(description: str) -> str:
+    """Stable key for a food description, independent of case, spacing,
+    quantity wording and the order in which foods are listed.
+
+    Text the parser can't read whole ("米饭", "2% milk", "café") keys on its
+    lowercased, whitespace-collapsed form instead, so different foods never
+    share a key.
+    """
+    if not drops_characters(description):
+        text = clean_description(description)
+        fragments = (normalize_fragment(f) for f in split_items(text))
+        key = " | ".join(sorted(f for f in fragments if f))
+        if key:
+            return key
+    return " ".join(description.lower().split())
@@ -0,0 +1,70 @@
+import asyncio
+import base64
+import io
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from app.config import get_settings
+from app.core.exceptions import BadRequestError
+
+settings = get_settings()
+
+# Multiple of 3 so each chunk base64-encodes without padding
+B64_CHUNK_SIZE = 3 * 16 * 1024
+
+_executor = ThreadPoolExecutor(
+    max_workers=settings.IMAGE_PROCESSING_WORKERS, thread_name_prefix="image"
+)
+
+
+def preprocess_image(source: bytes | BinaryIO) -> BinaryIO:
+    """Decode, upright, downscale and re-encode a photo as a metadata-free JPEG.
+
+    The long edge is capped at IMAGE_MAX_EDGE; smaller photos keep their size.
+    Returns a spooled buffer positioned at the start of the JPEG.
+    """
+    stream = io.BytesIO(source) if isinstance(source, bytes) else source
+    stream.seek(0)
+    max_edge = settings.IMAGE_MAX_EDGE
+
+    try:
+        with Image.open(stream) as img:
+            # Let the JPEG decoder scale down while decoding instead of
+            # materializing the full-resolution bitmap first
+            img.draft("RGB", (max_edge, max_edge))
+            img = ImageOps.exif_transpose(img)
+            if img.mode != "RGB":
+                img = img.convert("RGB")
+            img.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+
+            out = tempfile.SpooledTemporaryFile(max_size=settings.IMAGE_SPOOL_MAX_MEMORY)
+            # No exif/icc arguments: the re-encoded file carries no metadata
+            img.save(
+                out, format="JPEG", quality=settings.IMAGE_JPEG_QUALITY, optimize=True
+            )
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError):
+        raise BadRequestError("Uploaded file is not a supported image")
+
+    out.seek(0)
+    return out
+
+
+def b64encode_stream(file: BinaryIO) -> str:
+    """Base64-encode a file chunk by chunk instead of reading it whole first."""
+    encoded = io.StringIO()
+    while chunk := file.read(B64_CHUNK_SIZE):
+        encoded.write(base64.b64encode(chunk).decode("ascii"))
+    return encoded.getvalue()
+
+
+async def prepare_image(source: bytes | BinaryIO) -> BinaryIO:
+    """Run preprocess_image on the image worker pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, preprocess_image, source)
+
+
+def shutdown_executor() -> None:
+    _executor.shutdown(wait=False, cancel_futures=True)
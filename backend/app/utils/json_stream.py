@@ -0,0 +1,79 @@
+import json
+
+
+class ArrayItemParser:
+    """Incrementally pull complete objects out of one top-level array while a
+    JSON document is still streaming in.
+
+    feed() returns the objects of the array named `key` that were completed by
+    the new chunk; `text` holds everything fed so far for the final parse.
+    """
+
+    def __init__(self, key: str):
+        self.key = key
+        self.text = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_key: str | None = None
+        self._array_depth: int | None = None
+        self._item_start: int | None = None
+        self._array_done = False
+
+    def feed(self, chunk: str) -> list[dict]:
+        self.text += chunk
+        text = self.text
+        items = []
+
+        for i in range(self._pos, len(text)):
+            ch = text[i]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._last_key = text[self._string_start + 1 : i]
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                self._string_start = i
+            elif ch == "{" or ch == "[":
+                self._depth += 1
+                if (
+                    ch == "["
+                    and self._depth == 2
+                    and not self._array_done
+                    and self._last_key == self.key
+                ):
+                    self._array_depth = self._depth
+                elif (
+                    ch == "{"
+                    and self._array_depth is not None
+                    and self._depth == self._array_depth + 1
+                ):
+                    self._item_start = i
+            elif ch == "}" or ch == "]":
+                if (
+                    ch == "}"
+                    and self._item_start is not None
+                    and self._depth == self._array_depth + 1
+                ):
+                    try:
+                        items.append(json.loads(text[self._item_start : i + 1]))
+                    except ValueError:
+                        pass
+                    self._item_start = None
+                elif ch == "]" and self._depth == self._array_depth:
+                    self._array_depth = None
+                    self._array_done = True
+                self._depth -= 1
+
+        self._pos = len(text)
+        return items
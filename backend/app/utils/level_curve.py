@@ -0,0 +1,50 @@
+from bisect import bisect_right
+from math import isqrt
+
+
+class LevelCurve:
+    """XP needed per level grows linearly: level N costs base + (N - 1) * step.
+
+    Cumulative thresholds for the first `table_levels` levels are precomputed
+    and searched with bisect; higher levels use the closed form of the
+    quadratic, so a lookup never walks the levels one by one.
+    """
+
+    def __init__(self, base: int, step: int, table_levels: int = 1000):
+        if base <= 0 or step < 0:
+            raise ValueError("Level curve needs base > 0 and step >= 0")
+        self.base = base
+        self.step = step
+        # thresholds[i]: total XP at which level i + 1 is reached
+        self.thresholds = tuple(self.xp_to_reach(level) for level in range(1, table_levels + 1))
+
+    def xp_for_level(self, level: int) -> int:
+        """XP to go from `level` to the next one."""
+        return self.base + (level - 1) * self.step
+
+    def xp_to_reach(self, level: int) -> int:
+        """Total XP at which `level` is reached (0 for level 1)."""
+        done = level - 1
+        return done * self.base + self.step * done * (done - 1) // 2
+
+    def level_for(self, total_xp: int) -> int:
+        total_xp = max(0, total_xp)
+        if total_xp < self.thresholds[-1]:
+            return bisect_right(self.thresholds, total_xp)
+        if self.step == 0:
+            return total_xp // self.base + 1
+
+        # Largest n with step*n^2 + (2*base - step)*n <= 2*total_xp
+        b = 2 * self.base - self.step
+        done = (isqrt(b * b + 8 * self.step * total_xp) - b) // (2 * self.step)
+        # isqrt floors; settle the boundary exactly
+        while self.xp_to_reach(done + 2) <= total_xp:
+            done += 1
+        while self.xp_to_reach(done + 1) > total_xp:
+            done -= 1
+        return done + 1
+
+    def progress(self, total_xp: int) -> tuple[int, int, int]:
+        """(level, XP earned into it, XP the level costs)."""
+        level = self.level_for(total_xp)
+        return level, max(0, total_xp) - self.xp_to_reach(level), self.xp_for_level(level)
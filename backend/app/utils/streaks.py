@@ -0,0 +1,32 @@
+from datetime import date, timedelta
+from typing import Iterable
+
+ONE_DAY = timedelta(days=1)
+
+
+def advance_streak(
+    last_log_date: date | None, current: int, longest: int, day: date
+) -> tuple[date, int, int]:
+    """Streak state after logging on `day`: (last_log_date, current, longest)."""
+    if last_log_date is not None and day <= last_log_date:
+        return last_log_date, current, longest  # same day (or a backdated log)
+    if last_log_date is not None and day - last_log_date == ONE_DAY:
+        current += 1
+    else:
+        current = 1
+    return day, current, max(longest, current)
+
+
+def live_streak(last_log_date: date | None, current: int, today: date) -> int:
+    """The stored run still counts if the user logged today or yesterday."""
+    if last_log_date is None or today - last_log_date > ONE_DAY:
+        return 0
+    return current
+
+
+def streak_from_dates(dates: Iterable[date]) -> tuple[date | None, int, int]:
+    """Replay every log day from scratch (backfill and verification)."""
+    last, current, longest = None, 0, 0
+    for day in sorted(set(dates)):
+        last, current, longest = advance_streak(last, current, longest, day)
+    return last, current, longest
@@ -0,0 +1,48 @@
+import hashlib
+from typing import BinaryIO
+
+from fastapi import UploadFile
+
+from app.config import get_settings
+from app.core.exceptions import BadRequestError, PayloadTooLargeError
+
+settings = get_settings()
+
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+
+class ImageUpload:
+    """An uploaded image left in its spooled buffer, plus its content hash."""
+
+    def __init__(self, file: BinaryIO, sha256: str, size: int):
+        self.file = file
+        self.sha256 = sha256
+        self.size = size
+
+
+async def read_image_upload(upload: UploadFile) -> ImageUpload:
+    """Hash an upload chunk by chunk without loading it into memory.
+
+    The multipart parser has already spooled the file (to disk past 1 MB);
+    this only streams over it once to hash it and enforce MAX_UPLOAD_BYTES,
+    then rewinds it for the image pipeline.
+    """
+    max_bytes = settings.MAX_UPLOAD_BYTES
+    too_large = f"Photo is larger than {max_bytes // (1024 * 1024)} MB"
+    if upload.size is not None and upload.size > max_bytes:
+        raise PayloadTooLargeError(too_large)
+
+    digest = hashlib.sha256()
+    size = 0
+    await upload.seek(0)
+    while chunk := await upload.read(UPLOAD_CHUNK_SIZE):
+        size += len(chunk)
+        if size > max_bytes:
+            raise PayloadTooLargeError(too_large)
+        digest.update(chunk)
+
+    if size == 0:
+        raise BadRequestError("Uploaded photo is empty")
+
+    await upload.seek(0)
+    return ImageUpload(upload.file, digest.hexdigest(), size)
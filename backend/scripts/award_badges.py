@@ -0,0 +1,72 @@
+"""Award the badges users already qualify for but never received.
+
+Badges are awarded when a counter crosses its threshold, so counters set in
+bulk (the training/race counters backfilled by migration c6e8a2d4f9b1) earn
+nothing until the next matching event. This runs the full badge check for
+every user with stats:
+
+    cd backend
+    python -m scripts.award_badges            # report what would be awarded
+    python -m scripts.award_badges --apply    # award badges and their XP
+
+Safe to run more than once: badges a user already has are skipped.
+"""
+import argparse
+import asyncio
+from collections import Counter
+
+from sqlalchemy import select
+
+from app.database import AsyncSessionLocal, engine
+from app.models.gamification import UserStats
+from app.services.gamification_service import check_and_award_badges, seed_badges
+
+BATCH_USERS = 500
+
+
+async def run(apply: bool) -> None:
+    users = awarded_users = 0
+    awarded: Counter[str] = Counter()
+    async with AsyncSessionLocal() as db:
+        await seed_badges(db)
+        last_id = ""
+        while True:
+            user_ids = list((await db.execute(
+                select(UserStats.user_id)
+                .where(UserStats.user_id > last_id)
+                .order_by(UserStats.user_id)
+                .limit(BATCH_USERS)
+            )).scalars().all())
+            if not user_ids:
+                break
+            last_id = user_ids[-1]
+
+            for user_id in user_ids:
+                new_badges = await check_and_award_badges(db, user_id)
+                users += 1
+                if new_badges:
+                    awarded_users += 1
+                    awarded.update(b["key"] for b in new_badges)
+                # Commit per user so each stats row lock is held briefly
+                if apply:
+                    await db.commit()
+                else:
+                    await db.rollback()
+
+    await engine.dispose()
+
+    print(f"users checked:        {users}")
+    print(f"users awarded:        {awarded_users}")
+    for key, count in sorted(awarded.items()):
+        print(f"  {key}: {count}")
+    print("applied" if apply else "report only (pass --apply to award)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--apply", action="store_true", help="award the badges")
+    asyncio.run(run(parser.parse_args().apply))
+
+
+if __name__ == "__main__":
+    main()
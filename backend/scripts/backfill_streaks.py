@@ -0,0 +1,132 @@
+"""Backfill or verify the incremental streak state in user_stats.
+
+Replays every user's log days (days with calories logged) and compares the
+result with user_stats.last_log_date / current_streak / longest_streak:
+
+    cd backend
+    python -m scripts.backfill_streaks            # verify, report mismatches
+    python -m scripts.backfill_streaks --apply    # write the replayed values
+
+The migration that adds last_log_date fills it the same way, so the verify
+pass should report no mismatches after it. --apply repairs drift; run it
+while traffic is low, since a user logging mid-run can be overwritten with
+the state from just before, and run the verify pass again afterwards.
+"""
+import argparse
+import asyncio
+from datetime import date
+
+from sqlalchemy import and_, select, update
+
+from app.database import AsyncSessionLocal, engine
+from app.models.calorie_log import CalorieLog
+from app.models.gamification import UserStats
+from app.utils.streaks import streak_from_dates
+
+BATCH_USERS = 500
+
+
+async def _stored_state(db, user_ids: list[str]) -> dict[str, tuple]:
+    result = await db.execute(
+        select(
+            UserStats.user_id, UserStats.last_log_date,
+            UserStats.current_streak, UserStats.longest_streak,
+        ).where(UserStats.user_id.in_(user_ids))
+    )
+    return {row.user_id: tuple(row[1:]) for row in result}
+
+
+async def _check_batch(db, batch: dict[str, tuple], apply: bool) -> tuple[int, int]:
+    """Returns (mismatched, missing stats rows)."""
+    stored = await _stored_state(db, list(batch))
+    mismatched = missing = 0
+    for user_id, replayed in batch.items():
+        if user_id not in stored:
+            missing += 1
+            if apply:
+                last, current, longest = replayed
+                db.add(UserStats(
+                    user_id=user_id, last_log_date=last,
+                    current_streak=current, longest_streak=longest,
+                ))
+        elif stored[user_id] != replayed:
+            mismatched += 1
+            if mismatched <= 20:
+                print(f"  {user_id}: stored {stored[user_id]} replayed {replayed}")
+            if apply:
+                last, current, longest = replayed
+                await db.execute(
+                    update(UserStats)
+                    .where(UserStats.user_id == user_id)
+                    .values(last_log_date=last, current_streak=current, longest_streak=longest)
+                )
+    if apply:
+        await db.commit()
+    return mismatched, missing
+
+
+async def run(apply: bool) -> None:
+    users = mismatched = missing = 0
+    async with AsyncSessionLocal() as reader, AsyncSessionLocal() as writer:
+        rows = await reader.stream(
+            select(CalorieLog.user_id, CalorieLog.log_date)
+            .where(CalorieLog.consumed_kcal > 0)
+            .order_by(CalorieLog.user_id, CalorieLog.log_date)
+        )
+        batch: dict[str, tuple[date | None, int, int]] = {}
+        current_user, dates = None, []
+        async for user_id, log_date in rows:
+            if user_id != current_user:
+                if current_user is not None:
+                    batch[current_user] = streak_from_dates(dates)
+                current_user, dates = user_id, []
+            dates.append(log_date)
+            if len(batch) >= BATCH_USERS:
+                counts = await _check_batch(writer, batch, apply)
+                users += len(batch)
+                mismatched += counts[0]
+                missing += counts[1]
+                batch = {}
+        if current_user is not None:
+            batch[current_user] = streak_from_dates(dates)
+        if batch:
+            counts = await _check_batch(writer, batch, apply)
+            users += len(batch)
+            mismatched += counts[0]
+            missing += counts[1]
+
+        # Users with stats but no log days at all
+        stale = (
+            select(UserStats.user_id)
+            .outerjoin(
+                CalorieLog,
+                and_(CalorieLog.user_id == UserStats.user_id, CalorieLog.consumed_kcal > 0),
+            )
+            .where(CalorieLog.id.is_(None), UserStats.current_streak != 0)
+        )
+        stale_ids = list((await writer.execute(stale)).scalars().all())
+        if apply and stale_ids:
+            await writer.execute(
+                update(UserStats)
+                .where(UserStats.user_id.in_(stale_ids))
+                .values(last_log_date=None, current_streak=0, longest_streak=0)
+            )
+            await writer.commit()
+
+    await engine.dispose()
+
+    print(f"users with log days:  {users}")
+    print(f"mismatched:           {mismatched}")
+    print(f"missing stats rows:   {missing}")
+    print(f"streak without logs:  {len(stale_ids)}")
+    print("applied" if apply else "verify only (pass --apply to write)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--apply", action="store_true", help="write the replayed state")
+    asyncio.run(run(parser.parse_args().apply))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Micro-benchmark: level lookups from total XP, old loop vs LevelCurve.
+
+The old code walked the levels one by one on every XP grant and summed
+every earlier level on every stats read, so cost grew with the level.
+LevelCurve bisects a precomputed table and falls back to the closed form
+above it. No database needed:
+
+    cd backend
+    python -m scripts.bench_level_curve
+    python -m scripts.bench_level_curve --levels 1 100 1000 6500 --number 20000
+"""
+import argparse
+import timeit
+
+from app.utils.level_curve import LevelCurve
+
+XP_PER_LEVEL = 100
+
+
+def loop_level(total_xp: int) -> int:
+    """The level lookup _grant_xp used before LevelCurve."""
+    level = 1
+    while total_xp >= level * XP_PER_LEVEL:
+        total_xp -= level * XP_PER_LEVEL
+        level += 1
+    return level
+
+
+def loop_progress(total_xp: int, level: int) -> int:
+    """The XP-into-level sum get_user_stats used before LevelCurve."""
+    return total_xp - sum(i * XP_PER_LEVEL for i in range(1, level))
+
+
+def _per_call_us(fn, number: int) -> float:
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e6
+
+
+def run(args) -> None:
+    curve = LevelCurve(XP_PER_LEVEL, XP_PER_LEVEL)
+    no_table = LevelCurve(XP_PER_LEVEL, XP_PER_LEVEL, table_levels=1)
+    print(f"{'level':>6} {'total XP':>14} {'old loop':>10} {'old stats':>10} "
+          f"{'bisect':>10} {'closed':>10}   (us per call)")
+    for level in args.levels:
+        total_xp = curve.xp_to_reach(level) + XP_PER_LEVEL // 2
+        assert loop_level(total_xp) == curve.level_for(total_xp) == no_table.level_for(total_xp)
+        timings = [
+            _per_call_us(lambda: loop_level(total_xp), args.number),
+            _per_call_us(lambda: loop_progress(total_xp, level), args.number),
+            _per_call_us(lambda: curve.progress(total_xp), args.number),
+            _per_call_us(lambda: no_table.progress(total_xp), args.number),
+        ]
+        print(f"{level:>6} {total_xp:>14} " + " ".join(f"{t:>10.2f}" for t in timings))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 10, 100, 1000, 5000, 6500],
+                        help="user levels to time (6554 is the cap of a 32-bit total_xp)")
+    parser.add_argument("--number", type=int, default=10000, help="calls per timing")
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
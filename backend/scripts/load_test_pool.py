@@ -0,0 +1,139 @@
+"""Load test: do slow AI calls still starve the DB connection pool?
+
+Fires many concurrent /food/analyze-text requests against the app (in
+process, over ASGI) with the model call replaced by a fixed delay, while
+probing a cheap DB-only endpoint and sampling pool checkouts.
+
+Needs the configured MySQL database and an existing user with a profile:
+
+    cd backend
+    python -m scripts.load_test_pool --user-id <uuid>
+    python -m scripts.load_test_pool --user-id <uuid> --hold-connection
+
+--hold-connection restores the old behaviour (the request keeps its
+connection during the model call) for comparison: checkouts climb to the
+pool limit and the probes queue behind the AI requests.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from types import SimpleNamespace
+
+import httpx
+
+from app.core import openai_client
+from app.core.security import create_access_token
+from app.database import engine
+from app.main import app
+from app.routers import food
+
+FAKE_ANALYSIS = {
+    "items": [{
+        "name": "Test meal", "portion": "1 plate", "calories": 500,
+        "protein_g": 30, "carbs_g": 50, "fat_g": 15, "confidence": 0.9,
+    }],
+    "total_calories": 500,
+    "meal_notes": "",
+}
+
+
+class SlowCompletions:
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    async def create(self, **kwargs):
+        await asyncio.sleep(self.latency)
+        message = SimpleNamespace(content=json.dumps(FAKE_ANALYSIS))
+        usage = SimpleNamespace(prompt_tokens=300, completion_tokens=80, total_tokens=380)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=usage)
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def run(args) -> None:
+    completions = SlowCompletions(args.latency)
+    fake_client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    openai_client.get_client = lambda: fake_client
+    if args.hold_connection:
+        async def hold(db):
+            return None
+        food.release_connection = hold
+
+    headers = {"Authorization": f"Bearer {create_access_token(args.user_id)}"}
+    pool = engine.pool
+    capacity = pool.size() + pool._max_overflow
+    peak_checked_out = 0
+    probe_latencies: list[float] = []
+    ai_statuses: list[int] = []
+    done = asyncio.Event()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://loadtest", headers=headers,
+        timeout=args.latency + 60,
+    ) as client:
+
+        async def analyze(i: int):
+            # Unique descriptions so the analysis cache can't short-circuit
+            response = await client.post(
+                "/api/v1/food/analyze-text",
+                json={"description": f"load test meal {i} {time.time_ns()}"},
+            )
+            ai_statuses.append(response.status_code)
+
+        async def sample_pool():
+            nonlocal peak_checked_out
+            while not done.is_set():
+                peak_checked_out = max(peak_checked_out, pool.checkedout())
+                await asyncio.sleep(0.05)
+
+        async def probe():
+            while not done.is_set():
+                start = time.perf_counter()
+                await client.get("/api/v1/calories/today")
+                probe_latencies.append(time.perf_counter() - start)
+                await asyncio.sleep(args.probe_interval)
+
+        background = [asyncio.create_task(sample_pool()), asyncio.create_task(probe())]
+        started = time.perf_counter()
+        await asyncio.gather(*(analyze(i) for i in range(args.requests)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await asyncio.gather(*background)
+
+    await engine.dispose()
+
+    print(f"mode:                 {'hold connection' if args.hold_connection else 'release connection'}")
+    print(f"AI requests:          {args.requests} x {args.latency:.1f}s in {elapsed:.1f}s")
+    print(f"AI responses:         {sorted(set(ai_statuses))}")
+    print(f"pool capacity:        {capacity}")
+    print(f"peak checked out:     {peak_checked_out}")
+    print(f"probe requests:       {len(probe_latencies)}")
+    print(f"probe p50 / p95 / max: "
+          f"{statistics.median(probe_latencies) * 1000:.0f} / "
+          f"{_percentile(probe_latencies, 95) * 1000:.0f} / "
+          f"{max(probe_latencies) * 1000:.0f} ms")
+    saturated = peak_checked_out >= capacity
+    print(f"pool saturated:       {'YES' if saturated else 'no'}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--user-id", required=True, help="existing user with a profile")
+    parser.add_argument("--requests", type=int, default=60, help="concurrent AI requests")
+    parser.add_argument("--latency", type=float, default=3.0, help="simulated model latency (s)")
+    parser.add_argument("--probe-interval", type=float, default=0.1)
+    parser.add_argument("--hold-connection", action="store_true",
+                        help="keep the connection during the model call (old behaviour)")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,20 @@
+from app.utils.food_text import canonicalize_description
+
+
+def test_equivalent_descriptions_share_a_key():
+    assert canonicalize_description("Two Eggs and toast") == canonicalize_description(
+        "toast, 2 eggs"
+    )
+
+
+def test_non_latin_descriptions_keep_distinct_keys():
+    rice = canonicalize_description("米饭")
+    eggs = canonicalize_description("鸡蛋 两个")
+    assert rice and eggs
+    assert rice != eggs
+
+
+def test_dropped_characters_do_not_collide():
+    assert canonicalize_description("2% milk") != canonicalize_description("2 milk")
+    assert canonicalize_description("café au lait") == "café au lait"
+    assert canonicalize_description("Café  au   LAIT") == "café au lait"